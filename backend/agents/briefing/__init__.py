@@ -1,3 +1,4 @@
 from .agent import generate_briefing
+from .cache import invalidate_briefing
 
-__all__ = ["generate_briefing"]
+__all__ = ["generate_briefing", "invalidate_briefing"]
@@ -3,44 +3,122 @@ Morning Briefing Agent
 Orchestrates wellness and productivity data to generate daily briefing
 """
 
-from langchain_groq import ChatGroq
 from langchain_core.prompts import ChatPromptTemplate
+import asyncio
 import os
 
+from agents.llm import get_llm, PRIORITY_INTERACTIVE
 
-async def generate_briefing(user_email: str) -> dict:
+from .cache import (
+    briefing_fingerprint,
+    get_fresh_briefing,
+    get_briefing_for_inputs,
+    store_briefing
+)
+
+# per-source deadlines (seconds) - a slow upstream gets dropped from the
+# briefing instead of holding up the whole thing
+HEALTH_TIMEOUT = float(os.getenv("BRIEFING_HEALTH_TIMEOUT", "2"))
+TASKS_TIMEOUT = float(os.getenv("BRIEFING_TASKS_TIMEOUT", "4"))
+EMAILS_TIMEOUT = float(os.getenv("BRIEFING_EMAILS_TIMEOUT", "4"))
+
+
+async def _fetch_health(user_email: str) -> dict:
+    """latest health log -> sleep score"""
+    from database.operations import get_latest_health_log
+    health_log = await get_latest_health_log(user_email)
+
+    sleep_score = 0
+    if health_log:
+        # Calculate sleep score (0-100 based on hours)
+        sleep_hours = health_log.get("sleep_hours", 0)
+        sleep_score = min(int(sleep_hours * 12), 100)  # 8h = 96 points
+    return {"sleep_score": sleep_score, "health_log": health_log}
+
+
+async def _fetch_tasks(user_email: str) -> dict:
+    """incomplete local + google todos"""
+    # Use the unified service that gets Local + Google tasks
+    from api.todos import get_todos_service
+    from database.connection import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        # This returns List[TodoResponse] - every local todo, no limit
+        all_todos, _ = await get_todos_service(db, user_email)
+
+    # Filter for incomplete
+    incomplete_todos = [t for t in all_todos if not t.completed]
+    return {
+        "tasks_today": len(incomplete_todos),
+        "task_titles": [t.text for t in incomplete_todos],
+        "todo_keys": [(str(t.id), t.text, t.completed) for t in all_todos]
+    }
+
+
+async def _fetch_emails(tokens: dict) -> dict:
+    """unread gmail count + snippets for the summary"""
+    from tools.google_client import AsyncGoogleClient
+
+    client = AsyncGoogleClient(tokens)
+    # Fetch specifically unread emails
+    emails = await client.fetch_recent_emails(max_results=10, query='is:unread')
+
+    # Get snippets for first 5 for the summary
+    email_summaries = []
+    for e in emails[:5]:
+        snippet = e.get('snippet', '')
+        email_summaries.append(f"- {snippet[:150]}...")
+
+    return {
+        "critical_emails": len(emails),
+        "email_summaries": email_summaries,
+        "email_ids": [e["id"] for e in emails]
+    }
+
+
+async def _with_deadline(name: str, coro, timeout: float):
+    """run one source under its deadline - returns None if it fails or times out"""
+    try:
+        return await asyncio.wait_for(coro, timeout=timeout)
+    except asyncio.TimeoutError:
+        print(f"Briefing {name} fetch timed out after {timeout}s")
+    except Exception as e:
+        print(f"Briefing {name} fetch error: {e}")
+    return None
+
+
+async def generate_briefing(
+    user_email: str,
+    refresh: bool = False,
+    priority: int = PRIORITY_INTERACTIVE
+) -> dict:
     """
     Generate morning briefing combining health + productivity data
-    
+
+    health, tasks and emails are fetched concurrently, each under its own
+    deadline - a source that misses it is left out and listed in
+    missing_sources
+
+    briefings are cached per user on the inputs they were built from:
+    a fresh cache entry is returned as-is, and a stale one is reused when
+    the re-fetched inputs haven't changed, so the llm only runs on new data
+
     Args:
         user_email: User's email address
-        
+        refresh: skip the cache and rebuild
+        priority: llm queue priority - background callers pass PRIORITY_BATCH
+
     Returns:
         dict with greeting, sleep_score, critical_emails, schedule_updated, summary
     """
     user_email = user_email.lower()
-    
-    # 1. Get health data
-    sleep_score = 0
-    try:
-        from database.operations import get_latest_health_log
-        health_log = get_latest_health_log(user_email)
-        
-        if health_log:
-            # Calculate sleep score (0-100 based on hours)
-            sleep_hours = health_log.get("sleep_hours", 0)
-            sleep_score = min(int(sleep_hours * 12), 100)  # 8h = 96 points
-    except Exception as e:
-        print(f"Health data fetch error: {e}")
-    
-    # 2. Get Tasks & Emails
-    tasks_today = 0
-    schedule_updated = False
-    task_titles = []
-    critical_emails = 0
-    email_summaries = []
-    
-    # Get tokens ONCE for both services
+
+    if not refresh:
+        cached = get_fresh_briefing(user_email)
+        if cached:
+            return cached
+
+    # Get tokens ONCE for both google sources
     try:
         from state.user_tokens import get_user_tokens
         tokens = get_user_tokens(user_email)
@@ -48,96 +126,95 @@ async def generate_briefing(user_email: str) -> dict:
         print(f"Token fetch error: {e}")
         tokens = None
 
-    # TASKS
-    try:
-        # Use the unified service that gets Local + Google tasks
-        from api.todos import get_todos_service
-        from database.connection import SessionLocal
-        
-        db = SessionLocal()
-        try:
-            # This returns List[TodoResponse]
-            all_todos = get_todos_service(db, user_email)
-            
-            # Filter for incomplete
-            incomplete_todos = [t for t in all_todos if not t.completed]
-            tasks_today = len(incomplete_todos)
-            schedule_updated = tasks_today > 0
-            task_titles = [t.text for t in incomplete_todos]
-        finally:
-            db.close()
-        
-    except Exception as e:
-        print(f"Tasks fetch error: {e}")
-
-    # EMAILS
+    sources = {
+        "health": _with_deadline("health", _fetch_health(user_email), HEALTH_TIMEOUT),
+        "tasks": _with_deadline("tasks", _fetch_tasks(user_email), TASKS_TIMEOUT),
+    }
     if tokens:
-        try:
-            from tools.google_auth import get_gmail_service, fetch_recent_emails
-            
-            service = get_gmail_service(tokens)
-            # Fetch specifically unread emails
-            emails = fetch_recent_emails(service, max_results=10, query='is:unread')
-            critical_emails = len(emails)
-            
-            # Get snippets for first 5 for the summary
-            for e in emails[:5]:
-                snippet = e.get('snippet', '')
-                email_summaries.append(f"- {snippet[:150]}...")
-                
-        except Exception as e:
-            print(f"Email fetch error: {e}")
+        sources["emails"] = _with_deadline("emails", _fetch_emails(tokens), EMAILS_TIMEOUT)
+
+    # 1-3. fan out - latency tracks the slowest source, not the sum
+    results = dict(zip(sources, await asyncio.gather(*sources.values())))
+    missing_sources = [name for name, result in results.items() if result is None]
+
+    health = results.get("health") or {}
+    tasks = results.get("tasks") or {}
+    emails = results.get("emails") or {}
+
+    sleep_score = health.get("sleep_score", 0)
+    tasks_today = tasks.get("tasks_today", 0)
+    task_titles = tasks.get("task_titles", [])
+    schedule_updated = tasks_today > 0
+    critical_emails = emails.get("critical_emails", 0)
+    email_summaries = emails.get("email_summaries", [])
+
+    # only complete input sets are cacheable
+    fingerprint = None
+    if not missing_sources:
+        fingerprint = briefing_fingerprint(
+            health.get("health_log"),
+            tasks.get("todo_keys", []),
+            emails.get("email_ids", [])
+        )
+        if not refresh:
+            cached = get_briefing_for_inputs(user_email, fingerprint)
+            if cached:
+                return cached
 
     # 4. Generate AI summary
     summary = ""
     try:
-        llm = ChatGroq(
-            model="llama-3.3-70b-versatile",
-            api_key=os.getenv("GROQ_API_KEY"),
-            temperature=0.7
-        )
-        
+        llm = get_llm(temperature=0.7, priority=priority)
+
         prompt = ChatPromptTemplate.from_template(
             """You are a helpful AI assistant creating a brief morning summary.
-            
+
             User's data:
             - Sleep score: {sleep_score}/100 (If 0, assume no data tracked)
             - Unread Emails: {emails}
             - Recent Email Snippets: {email_context}
             - Tasks Count: {tasks}
             - Task List: {task_list}
-            
+
             Generate a warm, encouraging morning briefing (max 3 sentences).
             1. Acknowledge their health status (if sleep score > 0). If 0, suggest tracking sleep or taking it easy.
             2. Mention their workload (tasks). Mention specific high-priority sounding tasks if any.
             3. Mention if checking emails is urgent based on snippets.
-            
+
             Keep it friendly, concise, and actionable.
             """
         )
-        
+
         chain = prompt | llm
-        response = chain.invoke({
+        response = await chain.ainvoke({
             "sleep_score": sleep_score,
             "emails": critical_emails,
             "email_context": "; ".join(email_summaries) if email_summaries else "No recent emails",
             "tasks": tasks_today,
             "task_list": ", ".join(task_titles[:5]) # Pass first 5 task titles
         })
-        
+
         summary = response.content
     except Exception as e:
         print(f"LLM summary error: {e}")
         summary = "Have a great day! Focus on your priorities."
-    
+        # don't pin the fallback text in the cache
+        fingerprint = None
+
     # Extract user name from email
     user_name = user_email.split('@')[0].title()
-    
-    return {
+
+    briefing = {
         "greeting": f"Good morning, {user_name}",
         "sleep_score": sleep_score,
         "critical_emails": critical_emails,
         "schedule_updated": schedule_updated,
         "tasks_count": tasks_today,
-        "summary": summary
+        "summary": summary,
+        "missing_sources": missing_sources
     }
+
+    if fingerprint:
+        store_briefing(user_email, fingerprint, briefing)
+
+    return briefing
@@ -0,0 +1,66 @@
+"""
+Briefing cache
+Per-user briefings keyed on the inputs they were built from
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import Optional
+
+# how long a cached briefing is served without re-checking its inputs.
+# writes we own (health logs, todos) invalidate straight away - this only
+# bounds staleness for gmail, which changes outside the app
+BRIEFING_CACHE_TTL = float(os.getenv("BRIEFING_CACHE_TTL", "600"))
+
+# user_email -> {"fingerprint", "briefing", "checked_at"}
+_briefing_cache = {}
+
+
+def briefing_fingerprint(health: Optional[dict], todos: list, email_ids: list) -> str:
+    """
+    hash of everything the briefing was built from
+    health: latest health log fields, todos: (id, text, completed) tuples,
+    email_ids: unread gmail message ids
+    """
+    payload = {
+        "health": health,
+        "todos": sorted(todos),
+        "emails": sorted(email_ids),
+    }
+    raw = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def get_fresh_briefing(user_email: str) -> Optional[dict]:
+    """cached briefing if it hasn't been invalidated and is inside the ttl"""
+    entry = _briefing_cache.get(user_email.lower())
+    if not entry:
+        return None
+    if time.monotonic() - entry["checked_at"] > BRIEFING_CACHE_TTL:
+        return None
+    return dict(entry["briefing"])
+
+
+def get_briefing_for_inputs(user_email: str, fingerprint: str) -> Optional[dict]:
+    """cached briefing if it was built from exactly these inputs - refreshes the ttl"""
+    entry = _briefing_cache.get(user_email.lower())
+    if not entry or entry["fingerprint"] != fingerprint:
+        return None
+    entry["checked_at"] = time.monotonic()
+    return dict(entry["briefing"])
+
+
+def store_briefing(user_email: str, fingerprint: str, briefing: dict):
+    _briefing_cache[user_email.lower()] = {
+        "fingerprint": fingerprint,
+        "briefing": dict(briefing),
+        "checked_at": time.monotonic(),
+    }
+
+
+def invalidate_briefing(user_email: Optional[str]):
+    """drop a user's cached briefing - call whenever its inputs change"""
+    if user_email:
+        _briefing_cache.pop(user_email.lower(), None)
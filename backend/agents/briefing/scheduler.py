@@ -0,0 +1,169 @@
+"""
+Morning Briefing Scheduler
+Sends each user's briefing at their daily_checkin_time in their own timezone
+
+Opt-in with BRIEFING_SCHEDULER_ENABLED=true - while it's off, a user's first
+health log of the day sends their briefing, as before. Precompute only warms
+the in-process briefing cache of the worker running the scheduler - a send
+job another process picks up generates the briefing from scratch
+"""
+
+import asyncio
+import os
+from datetime import datetime, time, timedelta, timezone
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import select, or_
+
+from agents.llm import PRIORITY_BATCH
+from database import AsyncSessionLocal, User, UserProfile
+
+from .agent import generate_briefing
+
+BRIEFING_SCHEDULER_ENABLED = os.getenv("BRIEFING_SCHEDULER_ENABLED", "false").lower() == "true"
+
+# how often we look for due users (seconds)
+SCHEDULER_INTERVAL = float(os.getenv("BRIEFING_SCHEDULER_INTERVAL", "60"))
+# max briefings queued/precomputed at once - keeps groq + db load flat
+MAX_CONCURRENT_BRIEFINGS = int(os.getenv("BRIEFING_MAX_CONCURRENCY", "8"))
+# warm the briefing cache this many minutes before check-in time
+# (this process's cache only - other workers don't see it)
+PRECOMPUTE_MINUTES = int(os.getenv("BRIEFING_PRECOMPUTE_MINUTES", "30"))
+# still send if we're this late (restart, long tick) - past it we skip the day
+SEND_WINDOW_MINUTES = int(os.getenv("BRIEFING_SEND_WINDOW_MINUTES", "120"))
+
+DEFAULT_TIMEZONE = "Asia/Kolkata"
+DEFAULT_CHECKIN_TIME = time(8, 0)
+
+# user_email -> local date the briefing was queued / precomputed
+# in-process only, one scheduler per deployment
+_sent_on = {}
+_precomputed_on = {}
+
+_scheduler_task: Optional[asyncio.Task] = None
+
+
+def user_zone(tz_name: Optional[str]) -> ZoneInfo:
+    try:
+        return ZoneInfo(tz_name or DEFAULT_TIMEZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo(DEFAULT_TIMEZONE)
+
+
+async def find_due_users(now: datetime) -> tuple[list, list]:
+    """
+    split users into (send now, precompute now) for this tick
+    one query for everyone - timezone maths happens in python
+    """
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            select(User.email, User.timezone, UserProfile.daily_checkin_time)
+            .outerjoin(UserProfile, UserProfile.user_id == User.id)
+            .where(or_(
+                UserProfile.notification_enabled.is_(None),
+                UserProfile.notification_enabled.is_(True)
+            ))
+        )).all()
+
+    send, precompute = [], []
+    for email, tz_name, checkin in rows:
+        email = email.lower()
+        zone = user_zone(tz_name)
+        local_now = now.astimezone(zone)
+        local_date = local_now.date()
+
+        if _sent_on.get(email) == local_date:
+            continue
+
+        checkin_at = datetime.combine(local_date, checkin or DEFAULT_CHECKIN_TIME, tzinfo=zone)
+
+        if checkin_at <= local_now < checkin_at + timedelta(minutes=SEND_WINDOW_MINUTES):
+            send.append((email, local_date))
+        elif (
+            checkin_at - timedelta(minutes=PRECOMPUTE_MINUTES) <= local_now < checkin_at
+            and _precomputed_on.get(email) != local_date
+        ):
+            precompute.append((email, local_date))
+
+    return send, precompute
+
+
+async def _send_one(email: str, local_date, semaphore: asyncio.Semaphore):
+    from jobs import enqueue_job, job_exists
+
+    async with semaphore:
+        # delivery + retries happen on the job queue. the dedupe key only
+        # blocks a live job, so check for a finished one too - keeps it to
+        # one email per local day even across restarts
+        dedupe_key = f"briefing:{email}:{local_date}"
+        try:
+            if not await job_exists(dedupe_key):
+                await enqueue_job(
+                    "send_briefing_email",
+                    {"email": email},
+                    max_attempts=3,
+                    dedupe_key=dedupe_key
+                )
+            _sent_on[email] = local_date
+        except Exception as e:
+            print(f"Briefing enqueue failed for {email}: {e}")
+
+
+async def _precompute_one(email: str, local_date, semaphore: asyncio.Semaphore):
+    async with semaphore:
+        try:
+            # rebuild into the briefing cache - the send at check-in time
+            # then reuses it unless the inputs moved
+            await generate_briefing(email, refresh=True, priority=PRIORITY_BATCH)
+            _precomputed_on[email] = local_date
+        except Exception as e:
+            print(f"Briefing precompute failed for {email}: {e}")
+
+
+async def run_briefing_round(now: Optional[datetime] = None) -> dict:
+    """one scheduler tick - queue due briefings and precompute upcoming ones"""
+    now = now or datetime.now(timezone.utc)
+    send, precompute = await find_due_users(now)
+
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_BRIEFINGS)
+    await asyncio.gather(
+        *[_send_one(email, d, semaphore) for email, d in send],
+        *[_precompute_one(email, d, semaphore) for email, d in precompute]
+    )
+
+    return {"sent": len(send), "precomputed": len(precompute)}
+
+
+async def briefing_scheduler_loop():
+    while True:
+        try:
+            result = await run_briefing_round()
+            if result["sent"] or result["precomputed"]:
+                print(f"Briefing scheduler: {result}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Briefing scheduler error: {e}")
+        await asyncio.sleep(SCHEDULER_INTERVAL)
+
+
+def start_briefing_scheduler() -> Optional[asyncio.Task]:
+    """start the background loop on the running event loop"""
+    global _scheduler_task
+    if not BRIEFING_SCHEDULER_ENABLED:
+        return None
+    if _scheduler_task is None or _scheduler_task.done():
+        _scheduler_task = asyncio.create_task(briefing_scheduler_loop())
+    return _scheduler_task
+
+
+async def stop_briefing_scheduler():
+    global _scheduler_task
+    if _scheduler_task is not None:
+        _scheduler_task.cancel()
+        try:
+            await _scheduler_task
+        except asyncio.CancelledError:
+            pass
+    _scheduler_task = None
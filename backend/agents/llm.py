@@ -0,0 +1,204 @@
+# shared llm clients
+# every ChatGroq in the app comes from here: one keep-alive http pool, and
+# one token bucket sized to our groq tokens-per-minute quota. callers waiting
+# on the bucket are served by priority, so live chat goes ahead of batch
+# work like scheduled briefings instead of both tripping 429s
+
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+from typing import Any, Optional
+
+import httpx
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.rate_limiters import BaseRateLimiter
+from langchain_groq import ChatGroq
+
+DEFAULT_MODEL = "llama-3.3-70b-versatile"
+
+# groq quota for the model we use (tokens per minute)
+GROQ_TOKENS_PER_MINUTE = int(os.getenv("GROQ_TOKENS_PER_MINUTE", "12000"))
+# charged up front per call, corrected once the real usage comes back
+LLM_TOKENS_PER_CALL_ESTIMATE = int(os.getenv("LLM_TOKENS_PER_CALL_ESTIMATE", "1500"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_REQUEST_TIMEOUT = float(os.getenv("LLM_REQUEST_TIMEOUT", "60"))
+
+# lower number = served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+# how often a queued caller re-checks the bucket (seconds)
+_POLL_INTERVAL = 0.05
+
+
+class TokenBucket:
+    """
+    tokens-per-minute bucket with a priority queue in front of it
+    only the head of the queue may take tokens, so a batch caller can't
+    grab the budget an interactive one is waiting for. usable from threads
+    (sync tools) and the event loop alike
+    """
+
+    def __init__(self, tokens_per_minute: int):
+        self.capacity = float(tokens_per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._waiters = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _enqueue(self, priority: int) -> tuple:
+        entry = (priority, next(self._seq))
+        with self._lock:
+            heapq.heappush(self._waiters, entry)
+        return entry
+
+    def _try_take(self, entry: tuple, cost: float) -> Optional[float]:
+        """take tokens if it's our turn - returns None on success, else seconds to wait"""
+        with self._lock:
+            self._refill()
+            if self._waiters[0] == entry and self.tokens >= cost:
+                heapq.heappop(self._waiters)
+                self.tokens -= cost
+                return None
+            if self._waiters[0] != entry:
+                return _POLL_INTERVAL
+            return max(_POLL_INTERVAL, (cost - self.tokens) / self.rate)
+
+    def _dequeue(self, entry: tuple):
+        with self._lock:
+            if entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+
+    def acquire(self, cost: float, priority: int):
+        cost = min(cost, self.capacity)
+        entry = self._enqueue(priority)
+        try:
+            while (wait := self._try_take(entry, cost)) is not None:
+                time.sleep(min(wait, 1.0))
+        finally:
+            self._dequeue(entry)
+
+    async def aacquire(self, cost: float, priority: int):
+        cost = min(cost, self.capacity)
+        entry = self._enqueue(priority)
+        try:
+            while (wait := self._try_take(entry, cost)) is not None:
+                await asyncio.sleep(min(wait, 1.0))
+        finally:
+            self._dequeue(entry)
+
+    def settle(self, charged: float, actual: float):
+        """correct an up-front estimate with the real token count"""
+        with self._lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens + charged - actual)
+
+    def available(self) -> float:
+        with self._lock:
+            self._refill()
+            return self.tokens
+
+
+_bucket = TokenBucket(GROQ_TOKENS_PER_MINUTE)
+
+
+class PriorityRateLimiter(BaseRateLimiter):
+    """langchain rate limiter that draws from the shared bucket at a fixed priority"""
+
+    def __init__(self, bucket: TokenBucket, priority: int):
+        self.bucket = bucket
+        self.priority = priority
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        if not blocking:
+            return self.bucket.available() >= LLM_TOKENS_PER_CALL_ESTIMATE
+        self.bucket.acquire(LLM_TOKENS_PER_CALL_ESTIMATE, self.priority)
+        return True
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        if not blocking:
+            return self.bucket.available() >= LLM_TOKENS_PER_CALL_ESTIMATE
+        await self.bucket.aacquire(LLM_TOKENS_PER_CALL_ESTIMATE, self.priority)
+        return True
+
+
+class _UsageCallback(BaseCallbackHandler):
+    """settles the up-front estimate against the token usage groq reports"""
+
+    def on_llm_end(self, response, **kwargs: Any):
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        total = usage.get("total_tokens")
+        if total is None:
+            # streamed responses carry usage on the message instead
+            for generations in response.generations:
+                for generation in generations:
+                    metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                    if metadata:
+                        total = metadata.get("total_tokens")
+        if total is not None:
+            _bucket.settle(LLM_TOKENS_PER_CALL_ESTIMATE, total)
+
+
+_limits = httpx.Limits(max_connections=LLM_MAX_CONNECTIONS, max_keepalive_connections=LLM_MAX_CONNECTIONS)
+_http_client: Optional[httpx.Client] = None
+_http_async_client: Optional[httpx.AsyncClient] = None
+
+# (model, temperature, priority) -> ChatGroq
+_llms = {}
+
+
+def _get_http_clients() -> tuple[httpx.Client, httpx.AsyncClient]:
+    global _http_client, _http_async_client
+    if _http_client is None:
+        _http_client = httpx.Client(limits=_limits, timeout=LLM_REQUEST_TIMEOUT)
+    if _http_async_client is None or _http_async_client.is_closed:
+        _http_async_client = httpx.AsyncClient(limits=_limits, timeout=LLM_REQUEST_TIMEOUT)
+    return _http_client, _http_async_client
+
+
+def get_llm(
+    temperature: float = 0.7,
+    priority: int = PRIORITY_INTERACTIVE,
+    model: str = DEFAULT_MODEL
+) -> ChatGroq:
+    """
+    shared ChatGroq for these settings
+    callers bind tools / structured output on top - that doesn't mutate it
+    """
+    key = (model, temperature, priority)
+    llm = _llms.get(key)
+    if llm is None:
+        http_client, http_async_client = _get_http_clients()
+        llm = ChatGroq(
+            model=model,
+            temperature=temperature,
+            api_key=os.getenv("GROQ_API_KEY"),
+            http_client=http_client,
+            http_async_client=http_async_client,
+            rate_limiter=PriorityRateLimiter(_bucket, priority),
+            callbacks=[_UsageCallback()]
+        )
+        _llms[key] = llm
+    return llm
+
+
+async def close_llm_clients():
+    """drop the pooled connections on shutdown"""
+    global _http_client, _http_async_client
+    if _http_async_client is not None:
+        await _http_async_client.aclose()
+    if _http_client is not None:
+        _http_client.close()
+    _http_client, _http_async_client = None, None
+    _llms.clear()
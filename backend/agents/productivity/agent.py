@@ -1,9 +1,7 @@
 # productivity agent - langgraph implementation
 
-import os
 from typing import Literal
 
-from langchain_groq import ChatGroq
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
@@ -13,6 +11,8 @@ from .state import ProductivityState
 from .tools import PRODUCTIVITY_TOOLS
 
 from agents.constants import FORMATTING_PROMPT
+from agents.llm import get_llm
+from utils.turn_cache import turn_scope
 
 SYSTEM_PROMPT = f"""You are a helpful productivity assistant named Equinox Work.
 
@@ -37,14 +37,9 @@ Guidelines:
 def create_productivity_agent():
     """create and return the productivity agent graph"""
     
-    llm = ChatGroq(
-        model="llama-3.3-70b-versatile",
-        temperature=0.5,
-        api_key=os.getenv("GROQ_API_KEY")
-    )
-    llm_with_tools = llm.bind_tools(PRODUCTIVITY_TOOLS)
+    llm_with_tools = get_llm(temperature=0.5).bind_tools(PRODUCTIVITY_TOOLS)
     
-    def call_model(state: ProductivityState):
+    async def call_model(state: ProductivityState):
         messages = state["messages"]
         user_id = state.get("user_id", "unknown_user")
         
@@ -54,7 +49,7 @@ def create_productivity_agent():
             context_prompt = f"{SYSTEM_PROMPT}\n\nCurrent User Email: {user_id}\nUse this email for all tool calls that require 'user_email'."
             messages = [SystemMessage(content=context_prompt)] + list(messages)
             
-        response = llm_with_tools.invoke(messages)
+        response = await llm_with_tools.ainvoke(messages)
         return {"messages": [response]}
     
     def should_continue(state: ProductivityState) -> Literal["tools", "end"]:
@@ -89,7 +84,15 @@ def get_productivity_agent():
     return _productivity_agent
 
 
-def chat_with_productivity_agent(user_id: str, message: str) -> str:
+def build_initial_state(user_id: str, message: str) -> dict:
+    """fresh graph state for one user message"""
+    return {
+        "messages": [HumanMessage(content=message)],
+        "user_id": user_id
+    }
+
+
+async def chat_with_productivity_agent(user_id: str, message: str) -> str:
     """
     Send a message to the productivity agent and get response
     
@@ -102,13 +105,10 @@ def chat_with_productivity_agent(user_id: str, message: str) -> str:
     """
     agent = get_productivity_agent()
     
-    initial_state = {
-        "messages": [HumanMessage(content=message)],
-        "user_id": user_id
-    }
-    
     opik_tracer = OpikTracer(project_name="equinox")
-    result = agent.invoke(initial_state, config={"callbacks": [opik_tracer]})
+    # identical gmail / tasks / db reads across this turn's tools are made once
+    async with turn_scope():
+        result = await agent.ainvoke(build_initial_state(user_id, message), config={"callbacks": [opik_tracer]})
     
     last_message = result["messages"][-1]
     return last_message.content
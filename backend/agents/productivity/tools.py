@@ -4,10 +4,12 @@
 from langchain_core.tools import tool
 from typing import Optional, List
 from datetime import datetime
+import asyncio
+import os
 import uuid
 
-# Import database dependencies
-from database import SessionLocal
+# tools in one turn share the turn's db session
+from utils.turn_cache import turn_session
 
 # Import Services
 from api.notes import (
@@ -22,11 +24,16 @@ from api.todos import (
     update_todo_service
 )
 
-from tools import google_auth
+from tools.google_client import AsyncGoogleClient
+from agents.briefing.cache import invalidate_briefing
+from utils.pagination import page_size
+
+# notes / todos per tool call - enough to answer from, small enough for the context window
+TOOL_PAGE_SIZE = int(os.getenv("TOOL_PAGE_SIZE", "25"))
 
 
 @tool
-def fetch_recent_emails(user_id: str) -> dict:
+async def fetch_recent_emails(user_id: str) -> dict:
     """
     Fetch recent emails from Gmail.
     Useful for summarizing work or checking for missed messages.
@@ -37,145 +44,132 @@ def fetch_recent_emails(user_id: str) -> dict:
     if not tokens:
         return {"error": "No Google tokens found. User needs to sign in."}
         
-    service = google_auth.get_gmail_service(tokens)
-    emails = google_auth.fetch_recent_emails(service)
+    emails = await AsyncGoogleClient(tokens).fetch_recent_emails()
     return {"recent_emails": emails}
 
 # Notes Tools
 
 @tool
-def fetch_notes(user_email: str) -> dict:
+async def fetch_notes(user_email: str, cursor: Optional[str] = None, limit: int = TOOL_PAGE_SIZE) -> dict:
     """
-    Fetch all notes for a specific user.
+    Fetch a user's notes, newest first, a page at a time.
+    If next_cursor comes back, pass it as cursor to get older notes.
     """
-    session = SessionLocal()
-    try:
-        notes = get_user_notes_service(session, user_email)
-        # Serialize
-        notes_list = [
-            {
-                "id": str(n.id),
-                "title": n.title,
-                "content": n.content,
-                "created_at": n.created_at.isoformat() if n.created_at else None
-            }
-            for n in notes
-        ]
-        return {"notes": notes_list}
-    except Exception as e:
-        return {"error": str(e)}
-    finally:
-        session.close()
+    async with turn_session() as session:
+        try:
+            notes, next_cursor = await get_user_notes_service(session, user_email, page_size(limit), cursor)
+            # Serialize
+            notes_list = [
+                {
+                    "id": str(n.id),
+                    "title": n.title,
+                    "content": n.content,
+                    "created_at": n.created_at.isoformat() if n.created_at else None
+                }
+                for n in notes
+            ]
+            return {"notes": notes_list, "next_cursor": next_cursor}
+        except Exception as e:
+            return {"error": str(e)}
 
 @tool
-def create_note(user_email: str, title: str, content: str) -> dict:
+async def create_note(user_email: str, title: str, content: str) -> dict:
     """
     Create a new note for the user. 
     """
-    session = SessionLocal()
-    try:
-        new_note = create_note_service(session, user_email, title, content, source='ai_agent')
-        return {
-            "status": "success", 
-            "note_id": str(new_note.id), 
-            "message": f"Note '{title}' created."
-        }
-    except Exception as e:
-        return {"error": str(e)}
-    finally:
-        session.close()
+    async with turn_session() as session:
+        try:
+            new_note = await create_note_service(session, user_email, title, content, source='ai_agent')
+            return {
+                "status": "success", 
+                "note_id": str(new_note.id), 
+                "message": f"Note '{title}' created."
+            }
+        except Exception as e:
+            return {"error": str(e)}
 
 @tool
-def delete_note(note_id: str) -> dict:
+async def delete_note(note_id: str) -> dict:
     """
     Delete a note by its ID.
     """
-    session = SessionLocal()
+    # Validate UUID
     try:
-        # Validate UUID
-        try:
-            n_uuid = uuid.UUID(note_id)
-        except ValueError:
-            return {"error": "Invalid Note ID format."}
+        n_uuid = uuid.UUID(note_id)
+    except ValueError:
+        return {"error": "Invalid Note ID format."}
 
-        success = delete_note_service(session, n_uuid)
-        if success:
-             return {"status": "success", "message": "Note deleted."}
-        else:
-             return {"error": "Note not found."}
-    except Exception as e:
-        return {"error": str(e)}
-    finally:
-        session.close()
+    async with turn_session() as session:
+        try:
+            success = await delete_note_service(session, n_uuid)
+            if success:
+                 return {"status": "success", "message": "Note deleted."}
+            else:
+                 return {"error": "Note not found."}
+        except Exception as e:
+            return {"error": str(e)}
 
 # Todos Tools
 
 @tool
-def fetch_todos(user_email: str) -> dict:
+async def fetch_todos(user_email: str, cursor: Optional[str] = None, limit: int = TOOL_PAGE_SIZE) -> dict:
     """
-    Fetch all todos for a specific user.
+    Fetch a user's todos, newest first, a page at a time (google tasks come with the first page).
+    If next_cursor comes back, pass it as cursor to get older todos.
     """
-    session = SessionLocal()
-    try:
-        todos = get_todos_service(session, user_email)
-        # Convert Pydantic/SQLAlchemy objects to dicts
-        # If todos are SQLAlchemy models, we need manual conversion or use Pydantic models if returned as such.
-        # The service returns SQLAlchemy models with .id stringified.
-        todos_list = []
-        for t in todos:
-             todos_list.append({
-                 "id": str(t.id),
-                 "text": t.text,
-                 "completed": t.completed,
-                 "due_date": t.due_date.isoformat() if t.due_date else None,
-                 "created_at": t.created_at.isoformat() if t.created_at else None
-             })
-        return {"todos": todos_list}
-    except Exception as e:
-        return {"error": str(e)}
-    finally:
-        session.close()
+    async with turn_session() as session:
+        try:
+            todos, next_cursor = await get_todos_service(session, user_email, page_size(limit), cursor)
+            # Service returns TodoResponse models (local + google merged)
+            todos_list = []
+            for t in todos:
+                 todos_list.append({
+                     "id": str(t.id),
+                     "text": t.text,
+                     "completed": t.completed,
+                     "due_date": t.due_date.isoformat() if t.due_date else None,
+                     "created_at": t.created_at.isoformat() if t.created_at else None
+                 })
+            return {"todos": todos_list, "next_cursor": next_cursor}
+        except Exception as e:
+            return {"error": str(e)}
 
 @tool
-def create_todo(user_email: str, text: str, due_date: Optional[str] = None) -> dict:
+async def create_todo(user_email: str, text: str, due_date: Optional[str] = None) -> dict:
     """
     Create a new todo item.
     """
-    session = SessionLocal()
-    try:
-        parsed_date = None
-        if due_date:
-            try:
-                parsed_date = datetime.strptime(due_date, "%Y-%m-%d").date()
-            except ValueError:
-                return {"error": "Invalid date format. Use YYYY-MM-DD."}
+    parsed_date = None
+    if due_date:
+        try:
+            parsed_date = datetime.strptime(due_date, "%Y-%m-%d").date()
+        except ValueError:
+            return {"error": "Invalid date format. Use YYYY-MM-DD."}
 
-        new_todo = create_todo_service(session, user_email, text, parsed_date)
-        return {"status": "success", "todo_id": str(new_todo.id), "message": f"Todo '{text}' created."}
-    except Exception as e:
-        return {"error": str(e)}
-    finally:
-        session.close()
+    async with turn_session() as session:
+        try:
+            new_todo = await create_todo_service(session, user_email, text, parsed_date)
+            return {"status": "success", "todo_id": str(new_todo.id), "message": f"Todo '{text}' created."}
+        except Exception as e:
+            return {"error": str(e)}
 
 @tool
-def delete_todo(todo_id: str) -> dict:
+async def delete_todo(todo_id: str) -> dict:
     """
     Delete a todo by its ID.
     """
-    session = SessionLocal()
-    try:
-        success = delete_todo_service(session, todo_id)
-        if success:
-            return {"status": "success", "message": "Todo deleted."}
-        else:
-            return {"error": "Todo not found."}
-    except Exception as e:
-        return {"error": str(e)}
-    finally:
-        session.close()
+    async with turn_session() as session:
+        try:
+            success = await delete_todo_service(session, todo_id)
+            if success:
+                return {"status": "success", "message": "Todo deleted."}
+            else:
+                return {"error": "Todo not found."}
+        except Exception as e:
+            return {"error": str(e)}
 
 @tool
-def update_todo(todo_id: str, completed: Optional[bool] = None, text: Optional[str] = None) -> dict:
+async def update_todo(todo_id: str, completed: Optional[bool] = None, text: Optional[str] = None) -> dict:
     """
     Update a todo item. Can mark as complete/incomplete or update the text.
     Args:
@@ -184,34 +178,28 @@ def update_todo(todo_id: str, completed: Optional[bool] = None, text: Optional[s
         text: Optional new text for the todo
     """
     from api.todos import TodoUpdate
-    session = SessionLocal()
-    try:
-        updates = TodoUpdate(completed=completed, text=text)
-        updated = update_todo_service(session, todo_id, updates)
-        if updated:
-            return {
-                "status": "success", 
-                "message": f"Todo updated. Completed: {updated.completed}",
-                "todo": {
-                    "id": str(updated.id),
-                    "text": updated.text,
-                    "completed": updated.completed
+    async with turn_session() as session:
+        try:
+            updates = TodoUpdate(completed=completed, text=text)
+            updated = await update_todo_service(session, todo_id, updates)
+            if updated:
+                return {
+                    "status": "success", 
+                    "message": f"Todo updated. Completed: {updated.completed}",
+                    "todo": {
+                        "id": str(updated.id),
+                        "text": updated.text,
+                        "completed": updated.completed
+                    }
                 }
-            }
-        else:
-            return {"error": "Todo not found."}
-    except Exception as e:
-        return {"error": str(e)}
-    finally:
-        session.close()
-
-
-
-
+            else:
+                return {"error": "Todo not found."}
+        except Exception as e:
+            return {"error": str(e)}
 # Google Tasks Tools
 
 @tool
-def get_google_tasks(user_id: str) -> dict:
+async def get_google_tasks(user_id: str) -> dict:
     """
     Get all tasks from Google Tasks.
     Use this to see the user's task list from Google.
@@ -227,8 +215,7 @@ def get_google_tasks(user_id: str) -> dict:
         return {"error": "No Google tokens found. User needs to sign in."}
     
     try:
-        service = google_auth.get_tasks_service(tokens)
-        tasks = google_auth.fetch_tasks(service)
+        tasks = await AsyncGoogleClient(tokens).fetch_tasks('@default')
         
         formatted_tasks = [{
             "title": task.get('title', 'Untitled'),
@@ -243,7 +230,7 @@ def get_google_tasks(user_id: str) -> dict:
 
 
 @tool
-def create_google_task(user_id: str, title: str, notes: Optional[str] = None) -> dict:
+async def create_google_task(user_id: str, title: str, notes: Optional[str] = None) -> dict:
     """
     Create a new task in Google Tasks.
     Args:
@@ -261,21 +248,20 @@ def create_google_task(user_id: str, title: str, notes: Optional[str] = None) ->
         return {"error": "No Google tokens found. User needs to sign in."}
     
     try:
-        service = google_auth.get_tasks_service(tokens)
-        result = google_auth.create_task(service, title, notes)
+        result = await AsyncGoogleClient(tokens).create_task(title, notes)
+        invalidate_briefing(user_id)
         return {"status": "success", "task_id": result.get('id'), "message": f"Task '{title}' created in Google Tasks."}
     except Exception as e:
         return {"error": f"Failed to create Google Task: {str(e)}"}
 
 
 @tool  
-def get_email_summary(user_id: str) -> dict:
+async def get_email_summary(user_id: str) -> dict:
     """
     Get a summary of recent emails highlighting urgent items and action items.
     Use this when the user asks about their email priorities or what needs attention.
     """
-    import os
-    from langchain_groq import ChatGroq
+    from agents.llm import get_llm
     from opik.integrations.langchain import OpikTracer
     from state.user_tokens import get_user_tokens, user_tokens_store
     
@@ -287,13 +273,13 @@ def get_email_summary(user_id: str) -> dict:
         return {"error": "No Google tokens found. User needs to sign in."}
     
     try:
-        service = google_auth.get_gmail_service(tokens)
-        email_ids = google_auth.fetch_recent_emails(service, max_results=5)
+        # same listing fetch_recent_emails made earlier in the turn is reused
+        client = AsyncGoogleClient(tokens)
+        email_ids = await client.fetch_recent_emails(max_results=5)
         
-        emails = []
-        for email_meta in email_ids:
-            details = google_auth.get_email_details(service, email_meta['id'])
-            emails.append(details)
+        emails = await asyncio.gather(*[
+            client.get_email_details(email_meta['id']) for email_meta in email_ids
+        ])
         
         if not emails:
             return {"summary": "No recent emails found.", "email_count": 0}
@@ -303,11 +289,7 @@ def get_email_summary(user_id: str) -> dict:
             for e in emails
         ])
         
-        llm = ChatGroq(
-            model="llama-3.3-70b-versatile",
-            temperature=0.3,
-            api_key=os.getenv("GROQ_API_KEY")
-        )
+        llm = get_llm(temperature=0.3)
         
         prompt = f"""Summarize these emails in 2-3 sentences. Highlight:
 1. Urgent items needing immediate attention
@@ -318,7 +300,7 @@ Emails:
 
 Brief summary:"""
 
-        response = llm.invoke(prompt, config={"callbacks": [OpikTracer(project_name="equinox")]})
+        response = await llm.ainvoke(prompt, config={"callbacks": [OpikTracer(project_name="equinox")]})
         
         return {"summary": response.content, "email_count": len(emails)}
     except Exception as e:
@@ -1,18 +1,20 @@
 # wellness agent - langgraph implementation
 
-import os
 from typing import Literal
 
-from langchain_groq import ChatGroq
 from opik.integrations.langchain import OpikTracer
-from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+from langchain_core.messages import HumanMessage, AIMessage, SystemMessage, ToolMessage
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
 
 from .state import WellnessState
 from .tools import WELLNESS_TOOLS
+from .tools.health_tools import current_user_id
+from .context import prefetch_wellness_context
 
 from agents.constants import FORMATTING_PROMPT
+from agents.llm import get_llm
+from utils.turn_cache import turn_scope
 
 # system prompt for the wellness agent
 SYSTEM_PROMPT = f"""You are a friendly wellness coach AI. Your name is Equinox.
@@ -22,6 +24,7 @@ Your job is to help users track and improve their wellness. You have access to t
 - Calculate their readiness score
 - Check their sleep debt
 - Analyze wellness trends
+- Read tomorrow's forecast (readiness, energy through the day, sleep need)
 - Suggest activities based on their energy
 
 Guidelines:
@@ -56,15 +59,10 @@ def create_wellness_agent():
     """create and return the wellness agent graph"""
     
     # init llm with tools
-    llm = ChatGroq(
-        model="llama-3.3-70b-versatile",
-        temperature=0.7,
-        api_key=os.getenv("GROQ_API_KEY")
-    )
-    llm_with_tools = llm.bind_tools(WELLNESS_TOOLS)
+    llm_with_tools = get_llm(temperature=0.7).bind_tools(WELLNESS_TOOLS)
     
     # define nodes
-    def call_model(state: WellnessState):
+    async def call_model(state: WellnessState):
         """call the llm, possibly requesting tool use"""
         messages = state["messages"]
         
@@ -72,7 +70,12 @@ def create_wellness_agent():
         if not any(isinstance(m, SystemMessage) for m in messages):
             messages = [SystemMessage(content=SYSTEM_PROMPT)] + list(messages)
         
-        response = llm_with_tools.invoke(messages)
+        # first pass of the turn - load health data while the llm decides
+        # which tools it wants, so they find it ready
+        if not any(isinstance(m, ToolMessage) for m in messages):
+            prefetch_wellness_context(current_user_id())
+        
+        response = await llm_with_tools.ainvoke(messages)
         return {"messages": [response]}
     
     def should_continue(state: WellnessState) -> Literal["tools", "end"]:
@@ -112,7 +115,22 @@ def get_wellness_agent():
     return _wellness_agent
 
 
-def chat_with_wellness_agent(user_id: str, message: str) -> str:
+def build_initial_state(user_id: str, message: str) -> dict:
+    """fresh graph state for one user message"""
+    return {
+        "messages": [HumanMessage(content=message)],
+        "user_id": user_id,
+        "timezone": "Asia/Kolkata",
+        "today_health": None,
+        "readiness_score": None,
+        "readiness_zone": None,
+        "sleep_debt": None,
+        "weekly_trend": None,
+        "response": None
+    }
+
+
+async def chat_with_wellness_agent(user_id: str, message: str) -> str:
     """
     send a message to the wellness agent and get response
     
@@ -125,22 +143,10 @@ def chat_with_wellness_agent(user_id: str, message: str) -> str:
     """
     agent = get_wellness_agent()
     
-    # prepare initial state
-    initial_state = {
-        "messages": [HumanMessage(content=message)],
-        "user_id": user_id,
-        "timezone": "Asia/Kolkata",
-        "today_health": None,
-        "readiness_score": None,
-        "readiness_zone": None,
-        "sleep_debt": None,
-        "weekly_trend": None,
-        "response": None
-    }
-    
     # run the graph
     opik_tracer = OpikTracer(project_name="equinox")
-    result = agent.invoke(initial_state, config={"callbacks": [opik_tracer]})
+    async with turn_scope():
+        result = await agent.ainvoke(build_initial_state(user_id, message), config={"callbacks": [opik_tracer]})
     
     # extract response
     last_message = result["messages"][-1]
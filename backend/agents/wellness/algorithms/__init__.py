@@ -1,14 +1,32 @@
 # algorithm exports
 
-from .readiness import calculate_readiness, get_zone_recommendations
-from .sleep_debt import calculate_sleep_debt, get_sleep_recommendations
-from .trends import analyze_trends, get_streak_status
+from .readiness import calculate_readiness, consistency_from_streak, get_zone_recommendations
+from .sleep_debt import calculate_sleep_debt, describe_sleep_debt, get_sleep_recommendations
+from .trends import analyze_trends, trend_report, get_streak_status, streak_message
+from .vectorized import (
+    readiness_batch,
+    sleep_debt_batch,
+    rolling_sleep_debt,
+    recovery_from_debt,
+    streak_lengths,
+    trends_batch
+)
 
 __all__ = [
     "calculate_readiness",
+    "consistency_from_streak",
     "get_zone_recommendations",
     "calculate_sleep_debt",
+    "describe_sleep_debt",
     "get_sleep_recommendations",
     "analyze_trends",
-    "get_streak_status"
+    "trend_report",
+    "get_streak_status",
+    "streak_message",
+    "readiness_batch",
+    "sleep_debt_batch",
+    "rolling_sleep_debt",
+    "recovery_from_debt",
+    "streak_lengths",
+    "trends_batch"
 ]
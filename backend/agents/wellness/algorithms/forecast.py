@@ -0,0 +1,148 @@
+# next-day wellness forecast
+# small per-user models over recent history, fitted for many users at once:
+# readiness = recency-weighted baseline + damped short-term trend + that
+# weekday's usual offset; energy curve from the user's morning / afternoon /
+# evening energy; sleep need = optimal plus part of the current sleep debt.
+# pure numpy so the nightly job can run it across a process pool
+#
+# inputs are (users, days) arrays in date order, newest in the last column,
+# NaN padded on the left
+
+import os
+
+import numpy as np
+
+from .vectorized import readiness_zones
+
+# recency weighting - a log this many days old counts half as much
+FORECAST_HALF_LIFE = float(os.getenv("FORECAST_HALF_LIFE", "7"))
+# trend is fitted over the last this many days
+FORECAST_TREND_DAYS = int(os.getenv("FORECAST_TREND_DAYS", "14"))
+# fewer logs than this -> no forecast
+FORECAST_MIN_LOGS = int(os.getenv("FORECAST_MIN_LOGS", "5"))
+# sleep debt gets paid back over about this many nights (max 1h a night)
+FORECAST_DEBT_PAYBACK_DAYS = float(os.getenv("FORECAST_DEBT_PAYBACK_DAYS", "7"))
+
+# hourly energy curve - anchors at these hours, 6am to 10pm
+CURVE_HOURS = np.arange(6, 23)
+_ANCHOR_HOURS = np.array([6, 9, 14, 19, 22])
+
+RISK_NAMES = ["sleep_debt", "high_stress", "declining", "low_readiness"]
+
+WORKOUT_BY_ZONE = {
+    "peak": {"intensity": "high", "type": "HIIT, running or heavy lifting"},
+    "good": {"intensity": "moderate", "type": "strength training, cycling or swimming"},
+    "moderate": {"intensity": "low", "type": "yoga, walking or stretching"},
+    "low": {"intensity": "recovery", "type": "gentle stretching or a walk"},
+    "critical": {"intensity": "recovery", "type": "rest day"},
+}
+
+
+def _weights(width: int) -> np.ndarray:
+    # newest column weight 1, halving every FORECAST_HALF_LIFE columns back
+    age = np.arange(width)[::-1]
+    return 0.5 ** (age / FORECAST_HALF_LIFE)
+
+
+def weighted_recent(values) -> np.ndarray:
+    """recency-weighted mean per row, NaN where a row has no data"""
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    present = ~np.isnan(values)
+    w = np.where(present, _weights(values.shape[1]), 0.0)
+    total = w.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(total > 0, (w * np.nan_to_num(values)).sum(axis=1) / total, np.nan)
+
+
+def trend_slope(values, days: int = FORECAST_TREND_DAYS) -> np.ndarray:
+    """least-squares change per day over the last `days` columns, 0 with under 3 points"""
+    values = np.atleast_2d(np.asarray(values, dtype=float))[:, -days:]
+    present = ~np.isnan(values)
+    n = present.sum(axis=1)
+    x = np.arange(values.shape[1], dtype=float)[None, :]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_mean = np.where(present, x, 0).sum(axis=1) / np.maximum(n, 1)
+        y_mean = np.where(present, values, 0).sum(axis=1) / np.maximum(n, 1)
+        dx = np.where(present, x - x_mean[:, None], 0)
+        dy = np.where(present, values - y_mean[:, None], 0)
+        var = (dx * dx).sum(axis=1)
+        slope = np.where(var > 0, (dx * dy).sum(axis=1) / np.maximum(var, 1e-9), 0.0)
+    return np.where(n >= 3, slope, 0.0)
+
+
+def weekday_offset(values, weekdays, target_weekday, baseline) -> np.ndarray:
+    """how far the target weekday usually sits from baseline, shrunk towards 0 when rarely seen"""
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    same_day = (np.asarray(weekdays) == np.asarray(target_weekday)[:, None]) & ~np.isnan(values)
+    n = same_day.sum(axis=1)
+    residual = np.where(same_day, values - baseline[:, None], 0.0).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.where(n > 0, residual / np.maximum(n, 1), 0.0)
+    # two sightings count for half - one odd monday shouldn't move tuesday's forecast
+    return np.nan_to_num(mean * n / (n + 2))
+
+
+def energy_curves(morning, afternoon, evening, overall) -> np.ndarray:
+    """(users, hours) energy 1-10 across CURVE_HOURS, piecewise linear between anchors"""
+    fallback = weighted_recent(overall)
+    anchors = []
+    for part in (morning, afternoon, evening):
+        value = weighted_recent(part)
+        anchors.append(np.where(np.isnan(value), fallback, value))
+    m, a, e = anchors
+    # waking up and winding down sit a bit below the day's anchors
+    points = np.stack([m * 0.8, m, a, e, e * 0.8], axis=1)
+
+    # interpolation weights are the same for every user - one matmul
+    weights = np.zeros((len(CURVE_HOURS), len(_ANCHOR_HOURS)))
+    for i, hour in enumerate(CURVE_HOURS):
+        right = min(np.searchsorted(_ANCHOR_HOURS, hour, side="right"), len(_ANCHOR_HOURS) - 1)
+        left = max(right - 1, 0)
+        span = _ANCHOR_HOURS[right] - _ANCHOR_HOURS[left]
+        t = (hour - _ANCHOR_HOURS[left]) / span if span else 0.0
+        t = min(max(t, 0.0), 1.0)
+        weights[i, left] += 1 - t
+        weights[i, right] += t
+    return np.clip(points @ weights.T, 1, 10)
+
+
+def fit_forecasts(data: dict) -> dict:
+    """
+    next-day forecasts for a batch of users
+
+    data: readiness, sleep_hours, energy, morning, afternoon, evening, stress
+    as (users, days) arrays; weekday (users, days) ints; target_weekday,
+    sleep_debt and optimal_sleep per user
+    returns per user: valid, readiness, zone, energy_curve, sleep_need, risks
+    """
+    readiness = np.asarray(data["readiness"], dtype=float)
+    valid = (~np.isnan(readiness)).sum(axis=1) >= FORECAST_MIN_LOGS
+
+    baseline = weighted_recent(readiness)
+    # one day ahead of a damped trend, capped so a noisy fortnight can't run away
+    trend = np.clip(trend_slope(readiness) * 0.5, -5, 5)
+    offset = weekday_offset(readiness, data["weekday"], data["target_weekday"], baseline)
+    predicted = np.clip(np.rint(np.nan_to_num(baseline + trend + offset)), 0, 100).astype(int)
+
+    debt = np.nan_to_num(np.asarray(data["sleep_debt"], dtype=float))
+    optimal = np.asarray(data["optimal_sleep"], dtype=float)
+    sleep_need = np.round(optimal + np.minimum(1.0, debt / FORECAST_DEBT_PAYBACK_DAYS), 1)
+
+    stress = weighted_recent(data["stress"])
+    risks = np.stack([
+        debt >= 5,
+        np.nan_to_num(stress) >= 7,
+        trend_slope(readiness) <= -1,
+        predicted < 40,
+    ], axis=1)
+
+    return {
+        "valid": valid,
+        "readiness": predicted,
+        "zone": readiness_zones(predicted),
+        "energy_curve": np.round(energy_curves(
+            data["morning"], data["afternoon"], data["evening"], data["energy"]
+        ), 1),
+        "sleep_need": sleep_need,
+        "risks": risks,
+    }
@@ -3,6 +3,19 @@
 from decimal import Decimal
 
 
+def consistency_from_streak(streak_days: int) -> int:
+    """logging streak -> consistency factor (0-100)"""
+    if streak_days >= 30:
+        return 100
+    elif streak_days >= 14:
+        return 80
+    elif streak_days >= 7:
+        return 60
+    elif streak_days >= 3:
+        return 40
+    return 20
+
+
 def calculate_readiness(
     sleep_hours: float,
     sleep_quality: int,
@@ -49,16 +62,7 @@ def calculate_readiness(
     
     # CONSISTENCY FACTOR (10%)
     # based on logging streak
-    if streak_days >= 30:
-        consistency_factor = 100
-    elif streak_days >= 14:
-        consistency_factor = 80
-    elif streak_days >= 7:
-        consistency_factor = 60
-    elif streak_days >= 3:
-        consistency_factor = 40
-    else:
-        consistency_factor = 20
+    consistency_factor = consistency_from_streak(streak_days)
     
     # WEIGHTED SUM
     score = int(
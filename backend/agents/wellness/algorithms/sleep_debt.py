@@ -46,6 +46,12 @@ def calculate_sleep_debt(
     # cap debt
     debt = max(0, min(40, debt))
     
+    return describe_sleep_debt(debt, len(recent))
+
+
+def describe_sleep_debt(debt: float, days_analyzed: int) -> dict:
+    """calculate_sleep_debt's result for an already-capped debt total"""
+    
     # estimate recovery (recover ~1hr extra sleep per night)
     recovery_days = int(debt) if debt > 0 else 0
     
@@ -68,7 +74,7 @@ def calculate_sleep_debt(
     
     return {
         "debt_hours": round(debt, 1),
-        "days_analyzed": len(recent),
+        "days_analyzed": days_analyzed,
         "recovery_days": recovery_days,
         "status": status,
         "message": message
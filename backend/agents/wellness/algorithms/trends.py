@@ -1,8 +1,10 @@
 # trend analysis
 
-from datetime import date
+from datetime import date, timedelta
 from typing import List
 
+TREND_METRICS = ["readiness_score", "sleep_hours", "energy_level", "stress_level"]
+
 
 def analyze_trends(logs: List[dict], days: int = 7) -> dict:
     """
@@ -43,31 +45,39 @@ def analyze_trends(logs: List[dict], days: int = 7) -> dict:
         vals = [x.get(key) for x in items if x.get(key) is not None]
         return sum(vals) / len(vals) if vals else None
     
-    def trend(first, second):
-        if first is None or second is None:
-            return "stable"
-        diff = second - first
-        if abs(diff) < 0.5:  # threshold for "stable"
-            return "stable"
-        return "up" if diff > 0 else "down"
-    
-    def arrow(t):
-        return {"up": "↑", "down": "↓", "stable": "→"}.get(t, "→")
-    
-    metrics = ["readiness_score", "sleep_hours", "energy_level", "stress_level"]
+    return trend_report(n, {
+        m: (avg(first_half, m), avg(second_half, m), avg(sorted_logs, m))
+        for m in TREND_METRICS
+    })
+
+
+def _trend(first, second):
+    if first is None or second is None:
+        return "stable"
+    diff = second - first
+    if abs(diff) < 0.5:  # threshold for "stable"
+        return "stable"
+    return "up" if diff > 0 else "down"
+
+
+def _arrow(t):
+    return {"up": "↑", "down": "↓", "stable": "→"}.get(t, "→")
+
+
+def trend_report(n: int, averages: dict) -> dict:
+    """
+    analyze_trends' result from per-metric averages
+    averages: metric -> (first_half_avg, second_half_avg, overall_avg), None if no data
+    """
     results = {}
     
-    for m in metrics:
-        first_avg = avg(first_half, m)
-        second_avg = avg(second_half, m)
-        overall_avg = avg(sorted_logs, m)
-        
-        t = trend(first_avg, second_avg)
+    for m, (first_avg, second_avg, overall_avg) in averages.items():
+        t = _trend(first_avg, second_avg)
         
         results[m] = {
             "average": round(overall_avg, 1) if overall_avg else None,
             "trend": t,
-            "arrow": arrow(t),
+            "arrow": _arrow(t),
             "first_half_avg": round(first_avg, 1) if first_avg else None,
             "second_half_avg": round(second_avg, 1) if second_avg else None
         }
@@ -115,21 +125,22 @@ def get_streak_status(logs: List[dict]) -> dict:
     for i, d in enumerate(sorted_dates):
         if isinstance(d, str):
             d = date.fromisoformat(d)
-        expected = today - date.timedelta(days=i)
+        expected = today - timedelta(days=i)
         if d == expected:
             streak += 1
         else:
             break
     
+    return {"streak": streak, "message": streak_message(streak)}
+
+
+def streak_message(streak: int) -> str:
     if streak >= 30:
-        message = f"amazing {streak}-day streak!"
+        return f"amazing {streak}-day streak!"
     elif streak >= 7:
-        message = f"great {streak}-day streak going"
+        return f"great {streak}-day streak going"
     elif streak >= 3:
-        message = f"{streak} days in a row, keep it up"
+        return f"{streak} days in a row, keep it up"
     elif streak == 1:
-        message = "logged today, building momentum"
-    else:
-        message = "no current streak"
-    
-    return {"streak": streak, "message": message}
+        return "logged today, building momentum"
+    return "no current streak"
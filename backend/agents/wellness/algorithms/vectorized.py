@@ -0,0 +1,225 @@
+# array versions of the wellness algorithms
+# same maths as readiness.py / sleep_debt.py / trends.py, but over whole
+# date ranges and many users at once - one numpy pass instead of a python
+# loop per log. cohort reports and range queries go through these; the
+# scalar versions stay for single-day agent tools.
+#
+# missing values are NaN. 2d inputs are (users, logs), padded with NaN
+
+import numpy as np
+
+from .trends import TREND_METRICS
+
+ZONE_NAMES = np.array(["critical", "low", "moderate", "good", "peak"])
+TREND_NAMES = np.array(["down", "stable", "up"])
+
+
+def _fill(values, default: float) -> np.ndarray:
+    arr = np.asarray(values, dtype=float)
+    return np.where(np.isnan(arr), default, arr)
+
+
+def consistency_from_streak(streak_days) -> np.ndarray:
+    """logging streak -> consistency factor, same steps as readiness.consistency_from_streak"""
+    streak = np.asarray(streak_days, dtype=float)
+    return np.select(
+        [streak >= 30, streak >= 14, streak >= 7, streak >= 3],
+        [100.0, 80.0, 60.0, 40.0],
+        default=20.0
+    )
+
+
+def streak_lengths(days, groups=None) -> np.ndarray:
+    """
+    logging streak as of each log - consecutive days up to and including it
+    days: day numbers (date.toordinal()) ascending within each group
+    groups: optional key per log (user id), each group contiguous
+    """
+    days = np.asarray(days)
+    if not len(days):
+        return np.zeros(0, dtype=int)
+    breaks = np.ones(len(days), dtype=bool)
+    breaks[1:] = np.diff(days) != 1
+    if groups is not None:
+        groups = np.asarray(groups)
+        breaks[1:] |= groups[1:] != groups[:-1]
+    index = np.arange(len(days))
+    run_start = np.maximum.accumulate(np.where(breaks, index, 0))
+    return index - run_start + 1
+
+
+def readiness_zones(scores) -> np.ndarray:
+    scores = np.asarray(scores)
+    index = np.select(
+        [scores >= 80, scores >= 60, scores >= 40, scores >= 20],
+        [4, 3, 2, 1],
+        default=0
+    )
+    return ZONE_NAMES[index]
+
+
+def readiness_batch(
+    sleep_hours,
+    sleep_quality,
+    energy_level,
+    stress_level,
+    activity_minutes=0,
+    optimal_sleep=8.0,
+    streak_days=0,
+    consistency=None,
+    stress_scale: float = 9.0
+) -> dict:
+    """
+    calculate_readiness over arrays - any shape, inputs broadcast
+
+    missing inputs fall back like the scalar callers do (quality / energy /
+    stress 5, sleep / activity 0). consistency overrides the streak-based
+    factor; stress_scale 10 matches the api's stored readiness scores
+
+    returns score, zone and each factor as arrays
+    """
+    sleep_hours = _fill(sleep_hours, 0)
+    sleep_quality = _fill(sleep_quality, 5)
+    energy_level = _fill(energy_level, 5)
+    stress_level = _fill(stress_level, 5)
+    activity_minutes = _fill(activity_minutes, 0)
+    optimal_sleep = _fill(optimal_sleep, 8.0)
+
+    # SLEEP FACTOR (35%)
+    sleep_base = np.minimum(1.0, sleep_hours / optimal_sleep) * 100
+    sleep_factor = np.clip(sleep_base + (sleep_quality - 5) * 5, 0, 100)
+
+    # ENERGY (25%), STRESS (20%, inverted), ACTIVITY (10%)
+    energy_factor = (energy_level / 10) * 100
+    stress_factor = ((10 - stress_level) / stress_scale) * 100
+    activity_factor = np.minimum(100, (activity_minutes / 30) * 100)
+
+    # CONSISTENCY (10%)
+    if consistency is None:
+        consistency_factor = consistency_from_streak(streak_days)
+    else:
+        consistency_factor = np.asarray(consistency, dtype=float)
+
+    weighted = (
+        sleep_factor * 0.35 +
+        energy_factor * 0.25 +
+        stress_factor * 0.20 +
+        activity_factor * 0.10 +
+        consistency_factor * 0.10
+    )
+    # int() truncates - so does trunc, for negatives too
+    score = np.clip(np.trunc(weighted), 0, 100).astype(int)
+
+    return {
+        "score": score,
+        "zone": readiness_zones(score),
+        "sleep": np.trunc(sleep_factor).astype(int),
+        "energy": np.trunc(energy_factor).astype(int),
+        "stress": np.trunc(stress_factor).astype(int),
+        "activity": np.trunc(activity_factor).astype(int),
+        "consistency": np.broadcast_to(np.trunc(consistency_factor), score.shape).astype(int),
+    }
+
+
+def _round1(values: np.ndarray) -> np.ndarray:
+    # python's round() is correctly rounded (16.95 -> 16.9, it's really
+    # 16.9499..); np.round scales by 10 first and goes the other way.
+    # one value per user/day, so the loop is cheap next to the maths
+    return np.array([round(float(v), 1) for v in np.ravel(values)]).reshape(np.shape(values))
+
+
+def debt_contributions(sleep_hours: np.ndarray, optimal_sleep) -> np.ndarray:
+    """each log's share of sleep debt - the shortfall, or at most 1h paid back"""
+    diff = np.asarray(optimal_sleep, dtype=float) - sleep_hours
+    contrib = np.where(diff > 0, diff, -np.minimum(1.0, -diff))
+    return np.where(np.isnan(sleep_hours), 0.0, contrib)
+
+
+def sleep_debt_batch(sleep_hours, optimal_sleep=8.0, lookback_days: int = 14) -> dict:
+    """
+    calculate_sleep_debt for many users at once
+
+    sleep_hours: (users, logs) newest first, NaN padded. like the scalar
+    version it looks at each user's last `lookback_days` logs, not calendar days
+    optimal_sleep: scalar or one per user
+    """
+    hours = np.atleast_2d(np.asarray(sleep_hours, dtype=float))[:, :lookback_days]
+    optimal = np.asarray(optimal_sleep, dtype=float)
+    if optimal.ndim == 1:
+        optimal = optimal[:, None]
+
+    # cumsum adds left to right like the scalar loop - .sum() pairs terms up
+    # and can land the other side of a rounding boundary
+    contrib = debt_contributions(hours, optimal)
+    total = contrib.cumsum(axis=1)[:, -1] if contrib.shape[1] else np.zeros(len(contrib))
+    debt = np.clip(total, 0, 40)
+    return {
+        "debt_hours": _round1(debt),
+        "days_analyzed": (~np.isnan(hours)).sum(axis=1),
+        "recovery_days": np.trunc(debt).astype(int),
+    }
+
+
+def rolling_sleep_debt(sleep_hours, optimal_sleep=8.0, lookback_days: int = 14) -> np.ndarray:
+    """
+    sleep debt as of each log, for one user's logs in date order -
+    what calculate_sleep_debt would have said on each of those days
+    """
+    hours = np.asarray(sleep_hours, dtype=float)
+    if not len(hours):
+        return np.zeros(0)
+    contrib = debt_contributions(hours, optimal_sleep)
+    # one row per log: the lookback window ending there, newest first, summed
+    # in the scalar loop's order (zero padding before the first log is exact)
+    padded = np.concatenate([np.zeros(lookback_days - 1), contrib])
+    windows = np.lib.stride_tricks.sliding_window_view(padded, lookback_days)[:, ::-1]
+    return _round1(np.clip(windows.cumsum(axis=1)[:, -1], 0, 40))
+
+
+def recovery_from_debt(debt_hours) -> np.ndarray:
+    """recovery score 0-100 - full with no sleep debt, 5 points off per hour owed"""
+    debt = np.asarray(debt_hours, dtype=float)
+    return np.clip(np.trunc(100 - debt * 5), 0, 100).astype(int)
+
+
+def _masked_mean(values: np.ndarray, mask: np.ndarray) -> np.ndarray:
+    present = mask & ~np.isnan(values)
+    counts = present.sum(axis=1)
+    sums = np.where(present, values, 0.0).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+
+
+def trends_batch(metrics: dict, counts) -> dict:
+    """
+    analyze_trends for many users at once
+
+    metrics: metric name -> (users, days) array in date order (oldest first),
+    each row left-aligned and NaN padded past that user's `counts` logs
+    returns per metric: average, first_half_avg, second_half_avg, trend
+    (arrays, NaN where there was no data)
+    """
+    counts = np.asarray(counts)
+    mid = counts // 2
+    # mid 0 only happens with a single log - scalar version uses it for both halves
+    first_end = np.where(mid > 0, mid, 1)
+
+    results = {}
+    for name, values in metrics.items():
+        values = np.atleast_2d(np.asarray(values, dtype=float))
+        cols = np.arange(values.shape[1])[None, :]
+        in_range = cols < counts[:, None]
+
+        first = _masked_mean(values, in_range & (cols < first_end[:, None]))
+        second = _masked_mean(values, in_range & (cols >= mid[:, None]))
+        overall = _masked_mean(values, in_range)
+
+        diff = second - first
+        trend = np.where(np.isnan(diff) | (np.abs(diff) < 0.5), 1, np.where(diff > 0, 2, 0))
+        results[name] = {
+            "average": overall,
+            "first_half_avg": first,
+            "second_half_avg": second,
+            "trend": TREND_NAMES[trend],
+        }
+    return results
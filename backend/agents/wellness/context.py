@@ -0,0 +1,85 @@
+# wellness data loader
+# every health tool needs some slice of the same data - recent health logs,
+# the user's profile and streaks. load it once per turn (logs + profile in a
+# single query, streaks in another) and let the tools read from that
+# instead of each querying on its own
+
+import asyncio
+import os
+from datetime import date
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import select
+
+from database import HealthLog, UserProfile
+from agents.wellness.streaks import get_streaks, streak_days_on
+from utils.turn_cache import in_turn, memoize, turn_session
+
+# how many recent days the loader pulls - covers sleep debt (14) and the
+# default trend windows; tools asking for more query for themselves
+WELLNESS_CONTEXT_DAYS = int(os.getenv("WELLNESS_CONTEXT_DAYS", "30"))
+
+
+class WellnessContext:
+    """a user's recent health logs (newest first), profile and streaks"""
+
+    def __init__(self, logs: list, profile: Optional[UserProfile], streaks: Optional[dict] = None):
+        self.logs = logs
+        self.profile = profile
+        self.streaks = streaks or {}
+
+    def today(self) -> Optional[HealthLog]:
+        if self.logs and self.logs[0].date == date.today():
+            return self.logs[0]
+        return None
+
+    def recent(self, days: int) -> list:
+        return self.logs[:days]
+
+    def covers(self, days: int) -> bool:
+        """whether recent(days) is complete - false if the user has more history than we loaded"""
+        return days <= WELLNESS_CONTEXT_DAYS or len(self.logs) < WELLNESS_CONTEXT_DAYS
+
+    def streak_days(self, kind: str = "daily_logging", day: Optional[date] = None) -> int:
+        """a streak as of day (default today)"""
+        return streak_days_on(self.streaks.get(kind), day or date.today()) or 0
+
+    @property
+    def optimal_sleep(self) -> float:
+        if self.profile and self.profile.optimal_sleep_hours:
+            return float(self.profile.optimal_sleep_hours)
+        return 8.0
+
+
+async def _load(user_id: UUID) -> WellnessContext:
+    # newest logs with the profile joined on - one round trip for both
+    async with turn_session() as db:
+        rows = (await db.execute(
+            select(HealthLog, UserProfile)
+            .outerjoin(UserProfile, UserProfile.user_id == HealthLog.user_id)
+            .where(HealthLog.user_id == user_id)
+            .order_by(HealthLog.date.desc())
+            .limit(WELLNESS_CONTEXT_DAYS)
+        )).all()
+        streaks = await get_streaks(db, user_id)
+
+    logs = [log for log, _ in rows]
+    profile = rows[0][1] if rows else None
+    # no logs means no tool needs the profile beyond the 8h default
+    return WellnessContext(logs, profile, streaks)
+
+
+async def get_wellness_context(user_id: UUID) -> WellnessContext:
+    """the user's wellness context - loaded once per agent turn"""
+    return await memoize(("db", "wellness", str(user_id)), lambda: _load(user_id))
+
+
+def prefetch_wellness_context(user_id: UUID):
+    """start loading in the background so it's ready by the first tool call"""
+    if not in_turn():
+        # nothing would keep the result around for the tools
+        return
+    task = asyncio.ensure_future(get_wellness_context(user_id))
+    # tools will hit (and report) the same error - don't warn about it here
+    task.add_done_callback(lambda t: t.cancelled() or t.exception())
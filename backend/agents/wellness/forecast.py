@@ -0,0 +1,96 @@
+# stored wellness forecasts - reads, and scoring them against what happened
+# the nightly job (jobs/forecast.py) writes a forecast per user per day;
+# when that day's log comes in, its readiness is recorded next to the
+# prediction so we can see how far off we were
+
+from datetime import date
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import case, select, update, func
+
+from database import HealthLog, WellnessForecast
+
+
+def accuracy_expr(predicted, actual):
+    # 100 = spot on, minus a point per point of readiness we missed by
+    miss = func.abs(predicted - actual)
+    return case((miss >= 100, 0), else_=100 - miss)
+
+
+async def record_forecast_actual(db, log: HealthLog):
+    """score the forecast for log's day against its readiness - call before commit"""
+    if log.readiness_score is None:
+        return
+    await db.execute(
+        update(WellnessForecast)
+        .where(
+            WellnessForecast.user_id == log.user_id,
+            WellnessForecast.forecast_date == log.date
+        )
+        .values(
+            actual_readiness=log.readiness_score,
+            accuracy_score=accuracy_expr(WellnessForecast.predicted_readiness, log.readiness_score)
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def score_pending_forecasts(db, user_id: Optional[UUID] = None) -> int:
+    """
+    fill actual_readiness / accuracy_score for past forecasts whose day was
+    logged - catches logs written before their forecast existed, and
+    imported ones. one statement, every user's or just user_id's
+    """
+    actual = (
+        select(HealthLog.readiness_score)
+        .where(
+            HealthLog.user_id == WellnessForecast.user_id,
+            HealthLog.date == WellnessForecast.forecast_date
+        )
+        .scalar_subquery()
+    )
+    query = update(WellnessForecast).where(
+        WellnessForecast.actual_readiness.is_(None),
+        actual.is_not(None)
+    )
+    if user_id is not None:
+        query = query.where(WellnessForecast.user_id == user_id)
+    result = await db.execute(
+        query
+        .values(
+            actual_readiness=actual,
+            accuracy_score=accuracy_expr(WellnessForecast.predicted_readiness, actual)
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+async def get_forecast(db, user_id: UUID, day: Optional[date] = None) -> Optional[WellnessForecast]:
+    """the forecast for day, or the nearest upcoming one"""
+    query = select(WellnessForecast).where(WellnessForecast.user_id == user_id)
+    if day is not None:
+        return await db.scalar(query.where(WellnessForecast.forecast_date == day))
+    return await db.scalar(
+        query
+        .where(WellnessForecast.forecast_date >= date.today())
+        .order_by(WellnessForecast.forecast_date)
+        .limit(1)
+    )
+
+
+async def forecast_accuracy(db, user_id: UUID, days: int = 30) -> Optional[float]:
+    """average accuracy of the user's last `days` scored forecasts"""
+    recent = (
+        select(WellnessForecast.accuracy_score)
+        .where(
+            WellnessForecast.user_id == user_id,
+            WellnessForecast.accuracy_score.is_not(None)
+        )
+        .order_by(WellnessForecast.forecast_date.desc())
+        .limit(days)
+        .subquery()
+    )
+    value = await db.scalar(select(func.avg(recent.c.accuracy_score)))
+    return round(float(value), 1) if value is not None else None
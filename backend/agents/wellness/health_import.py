@@ -0,0 +1,320 @@
+# bulk health data import
+# wearable / spreadsheet exports in, health_logs rows out. the body is read
+# as a stream and parsed as it arrives - csv and ndjson are one day per
+# row/line, apple health's export.xml is raw samples that get rolled up
+# into days. days are written in batched upserts (an executemany each), then
+# a recompute_health_metrics job re-scores the user's readiness, sleep debt,
+# running totals, streaks and forecast accuracy in one vectorized backfill
+# pass - off the request, so a big import returns as soon as it's stored
+#
+# fields a file doesn't have are left alone on days that already have a
+# log, so importing steps from a watch doesn't wipe a manual check-in
+
+import codecs
+import csv
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+from datetime import datetime
+from typing import AsyncIterator, Optional
+from uuid import UUID
+
+from pydantic import ValidationError
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql, sqlite
+
+from database import HealthLog
+from schemas import HealthLogImportRow
+
+IMPORT_FORMATS = ("csv", "ndjson", "apple_health")
+# what a health log's source can say about an imported day
+IMPORT_SOURCES = ("import", "apple_health", "fitbit")
+
+# days per upsert batch
+HEALTH_IMPORT_BATCH = int(os.getenv("HEALTH_IMPORT_BATCH", "1000"))
+# skipped records reported back in the response
+MAX_IMPORT_ERRORS = 10
+
+DEFAULT_SOURCES = {"csv": "import", "ndjson": "import", "apple_health": "apple_health"}
+
+
+class _LineParser:
+    """splits a byte stream into text lines, whatever the chunk boundaries"""
+
+    def __init__(self):
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._buffer = ""
+
+    def _lines(self, chunk: bytes, final: bool = False) -> list:
+        self._buffer += self._decoder.decode(chunk, final)
+        lines = self._buffer.split("\n")
+        self._buffer = "" if final else lines.pop()
+        return [line.rstrip("\r") for line in lines]
+
+
+class NdjsonParser(_LineParser):
+    """one json object per line"""
+
+    def feed(self, chunk: bytes) -> list:
+        return [self._record(line) for line in self._lines(chunk) if line.strip()]
+
+    def close(self) -> list:
+        return [self._record(line) for line in self._lines(b"", final=True) if line.strip()]
+
+    def _record(self, line: str):
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            return ValueError(f"bad json: {e}")
+        return record if isinstance(record, dict) else ValueError("line isn't a json object")
+
+
+class CsvParser(_LineParser):
+    """header row of health log field names, then a day per row"""
+
+    def __init__(self):
+        super().__init__()
+        self._header = None
+        self._pending = []
+
+    def feed(self, chunk: bytes) -> list:
+        return self._rows(self._lines(chunk))
+
+    def close(self) -> list:
+        return self._rows(self._lines(b"", final=True), final=True)
+
+    def _rows(self, lines: list, final: bool = False) -> list:
+        records = []
+        for line in lines:
+            self._pending.append(line)
+            # a quoted field can run over several lines - hold them until quotes balance
+            if sum(part.count('"') for part in self._pending) % 2 and not final:
+                continue
+            text, self._pending = "\n".join(self._pending), []
+            if not text.strip():
+                continue
+            row = next(csv.reader([text]))
+            if self._header is None:
+                self._header = [name.strip().lower() for name in row]
+                continue
+            records.append({name: value for name, value in zip(self._header, row) if value.strip()})
+        return records
+
+
+# apple health sample types -> what we roll up
+_APPLE_SUMS = {
+    "HKQuantityTypeIdentifierStepCount": "steps",
+    "HKQuantityTypeIdentifierAppleExerciseTime": "activity_minutes",
+}
+_APPLE_SLEEP = "HKCategoryTypeIdentifierSleepAnalysis"
+_APPLE_DATE_FORMAT = "%Y-%m-%d %H:%M:%S %z"
+
+
+def _workout_name(activity_type: str) -> str:
+    # HKWorkoutActivityTypeTraditionalStrengthTraining -> traditional strength training
+    name = activity_type.replace("HKWorkoutActivityType", "")
+    return re.sub(r"(?<!^)(?=[A-Z])", " ", name).lower()
+
+
+class AppleHealthParser:
+    """
+    export.xml from the health app - records come grouped by type, not date,
+    so days are only complete at the end of the file. holds a small per-day
+    rollup, not the samples
+    """
+
+    def __init__(self):
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._root = None
+        self._depth = 0
+        self.samples = 0
+        # (day, sample source) -> {field: total} - the phone and the watch
+        # both count steps, so each day takes its biggest source
+        self._sums = {}
+        # wake-up day -> [(start, end)] asleep intervals, overlaps merged at the end
+        self._sleep = {}
+        self._workouts = {}
+
+    def feed(self, chunk: bytes) -> list:
+        self._parser.feed(chunk)
+        return self._drain()
+
+    def close(self) -> list:
+        self._parser.close()
+        errors = self._drain()
+        return errors + self._days()
+
+    def _drain(self) -> list:
+        errors = []
+        for event, elem in self._parser.read_events():
+            if event == "start":
+                if self._root is None:
+                    self._root = elem
+                self._depth += 1
+                continue
+            self._depth -= 1
+            if self._depth != 1:
+                continue
+            try:
+                self._sample(elem)
+            except (KeyError, ValueError) as e:
+                errors.append(ValueError(f"sample {self.samples} ({elem.tag}): {e}"))
+            # done with it - don't let the tree grow with the file
+            self._root.clear()
+        return errors
+
+    def _sample(self, elem):
+        if elem.tag not in ("Record", "Workout"):
+            return
+        self.samples += 1
+        if elem.tag == "Workout":
+            day = elem.attrib["startDate"][:10]
+            self._workouts.setdefault(day, _workout_name(elem.attrib.get("workoutActivityType", "")))
+            return
+
+        kind = elem.attrib.get("type")
+        if kind in _APPLE_SUMS:
+            # dates carry the device's local offset - the prefix is the local day
+            key = (elem.attrib["startDate"][:10], elem.attrib.get("sourceName"))
+            value = float(elem.attrib["value"])
+            totals = self._sums.setdefault(key, {})
+            field = _APPLE_SUMS[kind]
+            totals[field] = totals.get(field, 0) + value
+        elif kind == _APPLE_SLEEP and "Asleep" in elem.attrib.get("value", ""):
+            start = datetime.strptime(elem.attrib["startDate"], _APPLE_DATE_FORMAT)
+            end = datetime.strptime(elem.attrib["endDate"], _APPLE_DATE_FORMAT)
+            self._sleep.setdefault(elem.attrib["endDate"][:10], []).append((start, end))
+
+    def _days(self) -> list:
+        days = {}
+        for (day, _), totals in self._sums.items():
+            record = days.setdefault(day, {"date": day})
+            for field, value in totals.items():
+                record[field] = max(record.get(field, 0), int(round(value)))
+
+        for day, intervals in self._sleep.items():
+            intervals.sort()
+            asleep = 0.0
+            cur_start, cur_end = intervals[0]
+            for start, end in intervals[1:]:
+                if start > cur_end:
+                    asleep += (cur_end - cur_start).total_seconds()
+                    cur_start, cur_end = start, end
+                else:
+                    cur_end = max(cur_end, end)
+            asleep += (cur_end - cur_start).total_seconds()
+            record = days.setdefault(day, {"date": day})
+            record["sleep_hours"] = round(min(24.0, asleep / 3600), 2)
+            record["bed_time"] = intervals[0][0].time().replace(second=0)
+            record["wake_time"] = max(end for _, end in intervals).time().replace(second=0)
+
+        for day, workout in self._workouts.items():
+            record = days.setdefault(day, {"date": day})
+            record["workout_completed"] = True
+            record["workout_type"] = workout or None
+
+        return [days[day] for day in sorted(days)]
+
+
+def make_parser(fmt: str):
+    if fmt == "csv":
+        return CsvParser()
+    if fmt == "ndjson":
+        return NdjsonParser()
+    if fmt == "apple_health":
+        return AppleHealthParser()
+    raise ValueError(f"unknown import format {fmt} - expected one of {', '.join(IMPORT_FORMATS)}")
+
+
+async def _write_batch(db, user_id: UUID, batch: dict, source: str):
+    """upsert a batch of days - one executemany per distinct set of fields"""
+    insert = postgresql.insert if db.bind.dialect.name == "postgresql" else sqlite.insert
+    groups = {}
+    for day, fields in batch.items():
+        groups.setdefault(tuple(sorted(fields)), []).append(
+            {"user_id": user_id, "date": day, "source": source, **fields}
+        )
+    for columns, rows in groups.items():
+        stmt = insert(HealthLog)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "date"],
+            set_={**{col: getattr(stmt.excluded, col) for col in columns}, "updated_at": func.now()}
+        )
+        await db.execute(stmt, rows)
+
+
+async def import_health_stream(
+    db,
+    user_id: UUID,
+    chunks: AsyncIterator[bytes],
+    fmt: str,
+    source: Optional[str] = None
+) -> dict:
+    """
+    parse an export as it streams in and upsert its days for user_id, then
+    queue a rescore of the user. returns HealthImportResponse fields
+    """
+    from jobs import enqueue_job
+
+    parser = make_parser(fmt)
+    source = source or DEFAULT_SOURCES[fmt]
+    if source not in IMPORT_SOURCES:
+        raise ValueError(f"unknown source {source} - expected one of {', '.join(IMPORT_SOURCES)}")
+    result = {"format": fmt, "records": 0, "days": 0, "skipped": 0, "first_date": None, "last_date": None, "errors": []}
+    # date -> fields; a day that shows up twice in a batch keeps the later values
+    batch = {}
+
+    # apple health errors name their sample - records there are rolled-up days
+    numbered = not isinstance(parser, AppleHealthParser)
+
+    def skip(error):
+        result["skipped"] += 1
+        if len(result["errors"]) < MAX_IMPORT_ERRORS:
+            result["errors"].append(f"record {result['records']}: {error}" if numbered else str(error))
+
+    async def take(records: list):
+        for record in records:
+            result["records"] += 1
+            if isinstance(record, Exception):
+                skip(record)
+                continue
+            try:
+                row = HealthLogImportRow.model_validate(record)
+            except ValidationError as e:
+                skip("; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+                continue
+            fields = row.model_dump(exclude_unset=True, exclude={"date"})
+            if not fields:
+                skip("no health fields")
+                continue
+            batch.setdefault(row.date, {}).update(fields)
+            if result["first_date"] is None or row.date < result["first_date"]:
+                result["first_date"] = row.date
+            if result["last_date"] is None or row.date > result["last_date"]:
+                result["last_date"] = row.date
+            if len(batch) >= HEALTH_IMPORT_BATCH:
+                await flush()
+
+    async def flush():
+        if batch:
+            await _write_batch(db, user_id, batch, source)
+            result["days"] += len(batch)
+            batch.clear()
+
+    try:
+        async for chunk in chunks:
+            await take(parser.feed(chunk))
+        await take(parser.close())
+    except (ET.ParseError, UnicodeDecodeError) as e:
+        raise ValueError(f"couldn't parse the file: {e}")
+    await flush()
+    if isinstance(parser, AppleHealthParser):
+        # take() counted rolled-up days - report the samples instead
+        result["records"] = parser.samples
+    await db.commit()
+
+    if result["days"]:
+        # the whole history in one pass - readiness, sleep debt, totals, streaks
+        await enqueue_job("recompute_health_metrics", {"user_id": str(user_id)})
+    return result
@@ -0,0 +1,207 @@
+# running totals on health_logs
+# every log carries sums / counts over the user's logs up to and including
+# it, plus its position (log_seq). averages over any window of logs are then
+# (totals at the end - totals just before the start) / counts - two rows
+# whatever the window length - and sleep debt over the last 14 logs is one
+# subtraction, stored on the log as sleep_debt_hours.
+#
+# log_health keeps them current: appending a day reads the previous row and
+# adds one log's worth. editing or inserting a past day shifts every later
+# row's totals in one UPDATE and re-derives debt for the 14 logs after it.
+# python -m jobs.backfill rebuilds them from scratch
+
+from decimal import Decimal
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import select, update
+
+from database import HealthLog
+from agents.wellness.algorithms import describe_sleep_debt, trend_report
+from agents.wellness.algorithms.vectorized import recovery_from_debt
+from utils.turn_cache import turn_session
+
+SLEEP_DEBT_LOOKBACK = 14
+
+# metric -> (sum column, count column)
+RUNNING_METRICS = {
+    "readiness_score": ("readiness_sum", "readiness_count"),
+    "sleep_hours": ("sleep_hours_sum", "sleep_hours_count"),
+    "energy_level": ("energy_sum", "energy_count"),
+    "stress_level": ("stress_sum", "stress_count"),
+}
+SUM_COLUMNS = ["sleep_debt_sum"] + [col for pair in RUNNING_METRICS.values() for col in pair]
+_DECIMAL_COLUMNS = {"sleep_debt_sum", "sleep_hours_sum"}
+
+
+def has_totals(log) -> bool:
+    return log is not None and log.log_seq is not None
+
+
+def debt_contribution(sleep_hours, optimal_sleep) -> Decimal:
+    """one log's share of sleep debt - the shortfall, or at most 1h paid back"""
+    diff = Decimal(str(optimal_sleep)) - Decimal(str(sleep_hours or 0))
+    return diff if diff > 0 else -min(Decimal(1), -diff)
+
+
+def _totals_after(prev: Optional[HealthLog], log: HealthLog, optimal_sleep) -> dict:
+    # log's totals given the row before it (None for the user's first log)
+    def base(col):
+        return getattr(prev, col) if prev is not None else 0
+
+    totals = {
+        "log_seq": base("log_seq") + 1,
+        "sleep_debt_sum": Decimal(str(base("sleep_debt_sum"))) + debt_contribution(log.sleep_hours, optimal_sleep),
+    }
+    for metric, (sum_col, count_col) in RUNNING_METRICS.items():
+        value = getattr(log, metric)
+        if sum_col in _DECIMAL_COLUMNS:
+            totals[sum_col] = Decimal(str(base(sum_col))) + Decimal(str(value or 0))
+        else:
+            totals[sum_col] = base(sum_col) + int(value or 0)
+        totals[count_col] = base(count_col) + (value is not None)
+    return totals
+
+
+def _debt_fields(debt_sum, debt_sum_before) -> dict:
+    # sleep debt over the window ending at a log, capped like calculate_sleep_debt
+    debt = round(max(0.0, min(40.0, float(debt_sum - debt_sum_before))), 1)
+    return {"sleep_debt_hours": debt, "recovery_score": int(recovery_from_debt(debt))}
+
+
+async def update_running_totals(db, log: HealthLog, optimal_sleep, is_new: bool):
+    """
+    bring log's running totals and sleep debt up to date (and any later
+    logs' if it isn't the latest) - call once log's values are set, before commit
+    """
+    prev = await db.scalar(
+        select(HealthLog)
+        .where(HealthLog.user_id == log.user_id, HealthLog.date < log.date)
+        .order_by(HealthLog.date.desc())
+        .limit(1)
+    )
+    if prev is not None and not has_totals(prev):
+        # history from before running totals - leave it to the backfill
+        return
+
+    old = None if is_new else {col: getattr(log, col) for col in SUM_COLUMNS}
+    totals = _totals_after(prev, log, optimal_sleep)
+    for col, value in totals.items():
+        setattr(log, col, value)
+    seq = totals["log_seq"]
+
+    has_later = await db.scalar(
+        select(HealthLog.id)
+        .where(HealthLog.user_id == log.user_id, HealthLog.date > log.date)
+        .limit(1)
+    )
+
+    if has_later is None:
+        # the common case - appending the latest day
+        before = 0
+        if seq > SLEEP_DEBT_LOOKBACK:
+            before = await db.scalar(
+                select(HealthLog.sleep_debt_sum)
+                .where(HealthLog.user_id == log.user_id, HealthLog.log_seq == seq - SLEEP_DEBT_LOOKBACK)
+            ) or 0
+        for col, value in _debt_fields(totals["sleep_debt_sum"], before).items():
+            setattr(log, col, value)
+        return
+
+    if old is not None and old["sleep_debt_sum"] is None:
+        # an edited log that never had totals - can't tell what later rows
+        # already include, the backfill squares it
+        return
+
+    # a past day - later rows move by this log's change (all of it if it's new)
+    baseline = old or {col: (getattr(prev, col) if prev is not None else 0) for col in SUM_COLUMNS}
+    deltas = {col: totals[col] - baseline[col] for col in SUM_COLUMNS}
+    shift = 1 if is_new else 0
+    if shift or any(deltas.values()):
+        await db.execute(
+            update(HealthLog)
+            .where(HealthLog.user_id == log.user_id, HealthLog.date > log.date)
+            .values(
+                log_seq=HealthLog.log_seq + shift,
+                **{col: getattr(HealthLog, col) + delta for col, delta in deltas.items()}
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+    # debt windows that include this log: its own and the next 13 logs'.
+    # the log itself stays out of the reload - populate_existing would throw
+    # away its unflushed values (readiness, seq, totals) on an edit
+    rows = (await db.scalars(
+        select(HealthLog)
+        .where(
+            HealthLog.user_id == log.user_id,
+            HealthLog.id != log.id,
+            HealthLog.log_seq >= seq - SLEEP_DEBT_LOOKBACK,
+            HealthLog.log_seq < seq + SLEEP_DEBT_LOOKBACK
+        )
+        .execution_options(populate_existing=True)
+    )).all()
+    by_seq = {row.log_seq: row for row in rows}
+    by_seq[seq] = log
+    for row_seq in range(seq, seq + SLEEP_DEBT_LOOKBACK):
+        row = by_seq.get(row_seq)
+        if row is None:
+            break
+        before_row = by_seq.get(row_seq - SLEEP_DEBT_LOOKBACK)
+        before = before_row.sleep_debt_sum if before_row is not None else 0
+        for col, value in _debt_fields(row.sleep_debt_sum, before).items():
+            setattr(row, col, value)
+
+
+def sleep_debt_from_totals(latest: HealthLog) -> dict:
+    """calculate_sleep_debt's result straight off the latest log"""
+    return describe_sleep_debt(
+        float(latest.sleep_debt_hours or 0),
+        min(latest.log_seq, SLEEP_DEBT_LOOKBACK)
+    )
+
+
+def _window_avg(end: HealthLog, start: Optional[HealthLog], sum_col: str, count_col: str) -> Optional[float]:
+    count = getattr(end, count_col) - (getattr(start, count_col) if start is not None else 0)
+    if not count:
+        return None
+    total = getattr(end, sum_col) - (getattr(start, sum_col) if start is not None else 0)
+    return float(total) / count
+
+
+async def trends_from_totals(user_id: UUID, latest: HealthLog, days: int, known: list = ()) -> Optional[dict]:
+    """
+    analyze_trends over the last `days` logs up to latest, from the window's
+    edge rows - taken from known logs where possible, else one query.
+    None if those rows are missing their totals
+    """
+    n = min(days, latest.log_seq)
+    if n < 2:
+        return {"days": n, "trends": {}, "message": "need at least 2 data points"}
+
+    start_seq = latest.log_seq - n
+    mid_seq = start_seq + n // 2
+    wanted = [s for s in (start_seq, mid_seq) if s > 0]
+
+    rows = {log.log_seq: log for log in known if has_totals(log) and log.log_seq in wanted}
+    missing = [s for s in wanted if s not in rows]
+    if missing:
+        async with turn_session() as db:
+            found = (await db.scalars(
+                select(HealthLog)
+                .where(HealthLog.user_id == user_id, HealthLog.log_seq.in_(missing))
+            )).all()
+        rows.update({row.log_seq: row for row in found})
+    if any(s not in rows for s in wanted):
+        return None
+
+    start = rows.get(start_seq)
+    mid = rows[mid_seq]
+    return trend_report(n, {
+        metric: (
+            _window_avg(mid, start, sum_col, count_col),
+            _window_avg(latest, mid, sum_col, count_col),
+            _window_avg(latest, start, sum_col, count_col),
+        )
+        for metric, (sum_col, count_col) in RUNNING_METRICS.items()
+    })
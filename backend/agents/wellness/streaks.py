@@ -0,0 +1,145 @@
+# logging / sleep / workout streaks
+# the streaks table holds each streak's current run (started_at ..
+# last_updated) and best, kept up to date as logs are written - reading a
+# streak is one row instead of sorting the user's log dates. logging the
+# next day extends or restarts the run in place; a write that could change
+# an earlier day's standing rebuilds that streak from the user's logs
+
+import os
+from datetime import date, timedelta
+from typing import Optional
+from uuid import UUID
+
+from sqlalchemy import select
+
+from database import HealthLog, Streak
+
+STREAK_TYPES = ("daily_logging", "good_sleep", "workout_completed")
+
+# good sleep = at least optimal sleep minus this many hours
+GOOD_SLEEP_MARGIN = float(os.getenv("GOOD_SLEEP_MARGIN", "0.5"))
+
+
+def streak_qualifies(kind: str, log, optimal_sleep) -> bool:
+    """whether a log counts towards a streak type"""
+    if kind == "daily_logging":
+        return True
+    if kind == "good_sleep":
+        return log.sleep_hours is not None and float(log.sleep_hours) >= float(optimal_sleep) - GOOD_SLEEP_MARGIN
+    if kind == "workout_completed":
+        return bool(log.workout_completed)
+    raise ValueError(f"unknown streak type {kind}")
+
+
+def streak_state(days: list) -> dict:
+    """streaks row values from qualifying dates (ascending) - the run ending at the last one"""
+    state = {"current_count": 0, "best_count": 0, "started_at": None, "last_updated": None}
+    for day in days:
+        if state["last_updated"] is not None and day == state["last_updated"] + timedelta(days=1):
+            state["current_count"] += 1
+        else:
+            state["current_count"] = 1
+            state["started_at"] = day
+        state["last_updated"] = day
+        state["best_count"] = max(state["best_count"], state["current_count"])
+    return state
+
+
+def streak_days_on(streak: Optional[Streak], day: date) -> Optional[int]:
+    """
+    the streak as of `day` - 0 once a day has been missed
+    None for days before the current run, which the row doesn't cover
+    """
+    if streak is None or streak.last_updated is None:
+        return 0
+    if streak.started_at <= day <= streak.last_updated:
+        return (day - streak.started_at).days + 1
+    if day == streak.last_updated + timedelta(days=1):
+        # not logged yet today - yesterday's run is still alive
+        return streak.current_count
+    if day > streak.last_updated:
+        return 0
+    return None
+
+
+async def get_streaks(db, user_id: UUID) -> dict:
+    """type -> Streak row for a user"""
+    rows = (await db.scalars(select(Streak).where(Streak.user_id == user_id))).all()
+    return {row.type: row for row in rows}
+
+
+async def rebuild_streak(db, user_id: UUID, kind: str, optimal_sleep, streak: Optional[Streak] = None) -> Streak:
+    """recompute one streak from the user's whole log history"""
+    logs = (await db.execute(
+        select(HealthLog.date, HealthLog.sleep_hours, HealthLog.workout_completed)
+        .where(HealthLog.user_id == user_id)
+        .order_by(HealthLog.date)
+    )).all()
+    state = streak_state([log.date for log in logs if streak_qualifies(kind, log, optimal_sleep)])
+
+    if streak is None:
+        streak = Streak(user_id=user_id, type=kind)
+        db.add(streak)
+    for col, value in state.items():
+        setattr(streak, col, value)
+    return streak
+
+
+async def update_streaks(db, log: HealthLog, optimal_sleep) -> dict:
+    """
+    fold a written log into the user's streaks - call once its values are
+    set, before commit. returns type -> Streak
+    """
+    streaks = await get_streaks(db, log.user_id)
+    day = log.date
+
+    for kind in STREAK_TYPES:
+        streak = streaks.get(kind)
+        qualifies = streak_qualifies(kind, log, optimal_sleep)
+
+        if streak is None or streak.last_updated is None:
+            # first write since streaks were tracked - catch up on history once
+            if streak is None or qualifies:
+                streaks[kind] = await rebuild_streak(db, log.user_id, kind, optimal_sleep, streak)
+            continue
+
+        if day > streak.last_updated:
+            if not qualifies:
+                # the gap already ends the run when it's read
+                continue
+            if day == streak.last_updated + timedelta(days=1):
+                streak.current_count += 1
+            else:
+                streak.current_count = 1
+                streak.started_at = day
+            streak.last_updated = day
+            streak.best_count = max(streak.best_count or 0, streak.current_count)
+        elif day >= streak.started_at and qualifies:
+            # already counted in the current run
+            continue
+        else:
+            # breaks the current run, or changes an earlier one (best might move)
+            await rebuild_streak(db, log.user_id, kind, optimal_sleep, streak)
+
+    return streaks
+
+
+async def logging_streak_on(db, user_id: UUID, day: date, streak: Optional[Streak]) -> int:
+    """daily logging streak as of `day` - from the streak row, or the logs before it for past days"""
+    days = streak_days_on(streak, day)
+    if days is not None:
+        return days
+
+    # before the current run - only the last 30 days matter for consistency
+    dates = set((await db.scalars(
+        select(HealthLog.date)
+        .where(
+            HealthLog.user_id == user_id,
+            HealthLog.date <= day,
+            HealthLog.date > day - timedelta(days=30)
+        )
+    )).all())
+    days = 0
+    while day - timedelta(days=days) in dates:
+        days += 1
+    return days
@@ -5,6 +5,7 @@ from .health_tools import (
     get_readiness_score,
     get_sleep_debt_info,
     get_wellness_trends,
+    get_wellness_forecast,
     suggest_activity,
     WELLNESS_TOOLS
 )
@@ -14,6 +15,7 @@ __all__ = [
     "get_readiness_score",
     "get_sleep_debt_info",
     "get_wellness_trends",
+    "get_wellness_forecast",
     "suggest_activity",
     "WELLNESS_TOOLS"
 ]
@@ -1,158 +1,182 @@
 # wellness agent tools
 
-from datetime import date
 from uuid import UUID
 from langchain_core.tools import tool
+from sqlalchemy import select
 
-from database import SessionLocal, HealthLog, UserProfile
+from database import HealthLog
+from utils.turn_cache import turn_session
+from agents.wellness.context import get_wellness_context
+from agents.wellness.running import has_totals, sleep_debt_from_totals, trends_from_totals
 
 # TODO: Replace hardcoded user ID with actual authenticated user
 # For demo, using test user. In production, get user_id from auth/session
 TEST_USER_ID = "a0eebc99-9c0b-4ef8-bb6d-6bb9bd380a11"
 
 
-def get_db_session():
-    return SessionLocal()
+def current_user_id() -> UUID:
+    return UUID(TEST_USER_ID)
 
 
 @tool
-def get_health_today() -> dict:
+async def get_health_today() -> dict:
     """get today's health data. returns empty dict if not logged yet."""
     
-    user_id = UUID(TEST_USER_ID)
-    db = get_db_session()
-    try:
-        log = db.query(HealthLog).filter(
-            HealthLog.user_id == user_id,
-            HealthLog.date == date.today()
-        ).first()
-        
-        if not log:
-            return {"logged": False, "message": "no health data logged today"}
-        
-        return {
-            "logged": True,
-            "date": str(log.date),
-            "sleep_hours": float(log.sleep_hours) if log.sleep_hours else None,
-            "sleep_quality": log.sleep_quality,
-            "energy_level": log.energy_level,
-            "stress_level": log.stress_level,
-            "mood_score": log.mood_score,
-            "activity_minutes": log.activity_minutes,
-            "readiness_score": log.readiness_score
-        }
-    finally:
-        db.close()
+    ctx = await get_wellness_context(current_user_id())
+    log = ctx.today()
+    
+    if not log:
+        return {"logged": False, "message": "no health data logged today"}
+    
+    return {
+        "logged": True,
+        "date": str(log.date),
+        "sleep_hours": float(log.sleep_hours) if log.sleep_hours else None,
+        "sleep_quality": log.sleep_quality,
+        "energy_level": log.energy_level,
+        "stress_level": log.stress_level,
+        "mood_score": log.mood_score,
+        "activity_minutes": log.activity_minutes,
+        "readiness_score": log.readiness_score
+    }
 
 
 @tool
-def get_readiness_score() -> dict:
+async def get_readiness_score() -> dict:
     """get today's readiness score with zone and suggestions"""
     
     from agents.wellness.algorithms import calculate_readiness, get_zone_recommendations
     
-    user_id = UUID(TEST_USER_ID)
-    db = get_db_session()
-    try:
-        log = db.query(HealthLog).filter(
-            HealthLog.user_id == user_id,
-            HealthLog.date == date.today()
-        ).first()
-        
-        if not log:
-            return {"error": "no health data logged today", "score": None}
-        
-        profile = db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
-        optimal = float(profile.optimal_sleep_hours) if profile else 8.0
-        
-        result = calculate_readiness(
-            sleep_hours=float(log.sleep_hours or 0),
-            sleep_quality=log.sleep_quality or 5,
-            energy_level=log.energy_level or 5,
-            stress_level=log.stress_level or 5,
-            activity_minutes=log.activity_minutes or 0,
-            optimal_sleep=optimal
-        )
-        
-        recs = get_zone_recommendations(result["zone"])
-        
-        return {
-            "score": result["score"],
-            "zone": result["zone"],
-            "factors": result["factors"],
-            "summary": recs["summary"],
-            "suggestions": recs["suggestions"]
-        }
-    finally:
-        db.close()
+    ctx = await get_wellness_context(current_user_id())
+    log = ctx.today()
+    
+    if not log:
+        return {"error": "no health data logged today", "score": None}
+    
+    result = calculate_readiness(
+        sleep_hours=float(log.sleep_hours or 0),
+        sleep_quality=log.sleep_quality or 5,
+        energy_level=log.energy_level or 5,
+        stress_level=log.stress_level or 5,
+        activity_minutes=log.activity_minutes or 0,
+        optimal_sleep=ctx.optimal_sleep,
+        streak_days=ctx.streak_days()
+    )
+    
+    recs = get_zone_recommendations(result["zone"])
+    
+    return {
+        "score": result["score"],
+        "zone": result["zone"],
+        "factors": result["factors"],
+        "summary": recs["summary"],
+        "suggestions": recs["suggestions"]
+    }
 
 
 @tool
-def get_sleep_debt_info() -> dict:
+async def get_sleep_debt_info() -> dict:
     """calculate sleep debt from last 14 days of data"""
     
     from agents.wellness.algorithms import calculate_sleep_debt, get_sleep_recommendations
     
-    user_id = UUID(TEST_USER_ID)
-    db = get_db_session()
-    try:
-        logs = db.query(HealthLog).filter(
-            HealthLog.user_id == user_id
-        ).order_by(HealthLog.date.desc()).limit(14).all()
-        
-        if not logs:
-            return {"debt_hours": 0, "message": "no sleep data available"}
-        
+    ctx = await get_wellness_context(current_user_id())
+    logs = ctx.recent(14)
+    
+    if not logs:
+        return {"debt_hours": 0, "message": "no sleep data available"}
+    
+    if has_totals(logs[0]):
+        # kept up to date on every write
+        result = sleep_debt_from_totals(logs[0])
+    else:
         sleep_history = [
             {"date": str(log.date), "sleep_hours": float(log.sleep_hours or 0)}
             for log in logs
         ]
-        
-        profile = db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
-        optimal = float(profile.optimal_sleep_hours) if profile else 8.0
-        
-        result = calculate_sleep_debt(sleep_history, optimal_sleep=optimal)
-        tips = get_sleep_recommendations(result["debt_hours"])
-        
-        return {**result, "tips": tips}
-    finally:
-        db.close()
+        result = calculate_sleep_debt(sleep_history, optimal_sleep=ctx.optimal_sleep)
+    
+    tips = get_sleep_recommendations(result["debt_hours"])
+    
+    return {**result, "tips": tips}
 
 
 @tool
-def get_wellness_trends(days: int = 7) -> dict:
+async def get_wellness_trends(days: int = 7) -> dict:
     """analyze wellness trends over last N days (default 7)"""
     
     from agents.wellness.algorithms import analyze_trends
     
-    user_id = UUID(TEST_USER_ID)
-    db = get_db_session()
-    try:
-        logs = db.query(HealthLog).filter(
-            HealthLog.user_id == user_id
-        ).order_by(HealthLog.date.desc()).limit(days).all()
-        
-        if len(logs) < 2:
+    user_id = current_user_id()
+    ctx = await get_wellness_context(user_id)
+    
+    if ctx.logs and has_totals(ctx.logs[0]):
+        if min(days, ctx.logs[0].log_seq) < 2:
             return {"message": "need more data for trends"}
-        
-        log_dicts = [
-            {
-                "date": str(log.date),
-                "readiness_score": log.readiness_score,
-                "sleep_hours": float(log.sleep_hours) if log.sleep_hours else None,
-                "energy_level": log.energy_level,
-                "stress_level": log.stress_level
-            }
-            for log in logs
-        ]
-        
-        return analyze_trends(log_dicts, days)
-    finally:
-        db.close()
+        # window edges from the running totals - no re-aggregation
+        result = await trends_from_totals(user_id, ctx.logs[0], days, ctx.logs)
+        if result is not None:
+            return result
+    
+    if ctx.covers(days):
+        logs = ctx.recent(days)
+    else:
+        # longer window than the turn's context holds
+        async with turn_session() as db:
+            logs = (await db.scalars(
+                select(HealthLog)
+                .where(HealthLog.user_id == user_id)
+                .order_by(HealthLog.date.desc())
+                .limit(days)
+            )).all()
+    
+    if len(logs) < 2:
+        return {"message": "need more data for trends"}
+    
+    log_dicts = [
+        {
+            "date": str(log.date),
+            "readiness_score": log.readiness_score,
+            "sleep_hours": float(log.sleep_hours) if log.sleep_hours else None,
+            "energy_level": log.energy_level,
+            "stress_level": log.stress_level
+        }
+        for log in logs
+    ]
+    
+    return analyze_trends(log_dicts, days)
+
+
+@tool
+async def get_wellness_forecast() -> dict:
+    """get the forecast for the user's next day - predicted readiness, energy through the day, sleep need and risks"""
+    
+    from agents.wellness.algorithms.vectorized import readiness_zones
+    from agents.wellness.forecast import get_forecast
+    
+    async with turn_session() as db:
+        forecast = await get_forecast(db, current_user_id())
+    
+    if not forecast:
+        return {"message": "no forecast available yet - they're generated nightly from logged data"}
+    
+    return {
+        "date": str(forecast.forecast_date),
+        "predicted_readiness": forecast.predicted_readiness,
+        "predicted_zone": (
+            str(readiness_zones(forecast.predicted_readiness))
+            if forecast.predicted_readiness is not None else None
+        ),
+        "energy_by_hour": forecast.predicted_energy_curve,
+        "sleep_need_hours": float(forecast.predicted_sleep_need) if forecast.predicted_sleep_need else None,
+        "recommended_bedtime": str(forecast.recommended_bedtime) if forecast.recommended_bedtime else None,
+        "recommended_workout": forecast.recommended_workout,
+        "risk_factors": forecast.risk_factors or []
+    }
 
 
 @tool
-def suggest_activity(readiness_zone: str) -> dict:
+async def suggest_activity(readiness_zone: str) -> dict:
     """Suggest activities based on readiness zone.
     
     IMPORTANT: You MUST call get_readiness_score() first to get the user's actual zone.
@@ -198,5 +222,6 @@ WELLNESS_TOOLS = [
     get_readiness_score,
     get_sleep_debt_info,
     get_wellness_trends,
+    get_wellness_forecast,
     suggest_activity
 ]
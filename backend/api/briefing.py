@@ -8,8 +8,9 @@ from email.mime.multipart import MIMEMultipart
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from agents.briefing import generate_briefing
+from agents.llm import PRIORITY_BATCH
 from state.user_tokens import get_user_tokens
-from tools.google_auth import get_gmail_service
+from tools.google_client import AsyncGoogleClient
 
 router = APIRouter()
 
@@ -106,11 +107,7 @@ async def send_briefing_email(req: BriefingRequest):
     
     try:
         # Send email via Gmail API
-        service = get_gmail_service(tokens)
-        service.users().messages().send(
-            userId='me',
-            body={'raw': raw_message}
-        ).execute()
+        await AsyncGoogleClient(tokens).send_email(raw_message)
         
         return {
             "success": True,
@@ -131,8 +128,8 @@ async def send_briefing_email_internal(email: str) -> bool:
         return False
     
     try:
-        # Generate briefing
-        briefing = await generate_briefing(email)
+        # Generate briefing - background send, so chat gets the llm first
+        briefing = await generate_briefing(email, priority=PRIORITY_BATCH)
         
         # Create email content
         html_content = f"""
@@ -169,11 +166,7 @@ async def send_briefing_email_internal(email: str) -> bool:
         
         raw_message = base64.urlsafe_b64encode(message.as_bytes()).decode('utf-8')
         
-        service = get_gmail_service(tokens)
-        service.users().messages().send(
-            userId='me',
-            body={'raw': raw_message}
-        ).execute()
+        await AsyncGoogleClient(tokens).send_email(raw_message)
         
         print(f"✅ Briefing email sent to {email}")
         return True
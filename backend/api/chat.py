@@ -4,6 +4,8 @@ from pydantic import BaseModel
 from fastapi import APIRouter
 
 from agents.wellness.agent import chat_with_wellness_agent
+from opik.integrations.langchain import OpikTracer
+from utils.sse import stream_graph_events, sse_response
 # Note: productivity agent import moved to function level to avoid circular import
 
 router = APIRouter(prefix="/chat", tags=["chat"])
@@ -22,10 +24,10 @@ class ChatResponse(BaseModel):
 
 
 @router.post("/wellness", response_model=ChatResponse)
-def wellness_chat(req: ChatRequest):
+async def wellness_chat(req: ChatRequest):
     """Chat with the wellness agent"""
     
-    response = chat_with_wellness_agent(
+    response = await chat_with_wellness_agent(
         user_id=TEST_USER_ID,
         message=req.message
     )
@@ -37,12 +39,12 @@ def wellness_chat(req: ChatRequest):
 
 
 @router.post("/productivity", response_model=ChatResponse)
-def productivity_chat(req: ChatRequest):
+async def productivity_chat(req: ChatRequest):
     """Chat with the productivity agent - handles emails, tasks, scheduling"""
     # Lazy import to avoid circular dependency
     from agents.productivity.agent import chat_with_productivity_agent
     
-    response = chat_with_productivity_agent(
+    response = await chat_with_productivity_agent(
         user_id=TEST_USER_ID,
         message=req.message
     )
@@ -53,3 +55,31 @@ def productivity_chat(req: ChatRequest):
     )
 
 
+# streaming variants - same agents, but tokens and tool progress are pushed
+# as server-sent events while the graph runs instead of after the last turn
+
+@router.post("/wellness/stream")
+async def wellness_chat_stream(req: ChatRequest):
+    """Chat with the wellness agent, streamed as server-sent events"""
+    from agents.wellness.agent import get_wellness_agent, build_initial_state
+
+    events = stream_graph_events(
+        get_wellness_agent(),
+        build_initial_state(TEST_USER_ID, req.message),
+        config={"callbacks": [OpikTracer(project_name="equinox")]}
+    )
+    return sse_response(events, user_id=TEST_USER_ID)
+
+
+@router.post("/productivity/stream")
+async def productivity_chat_stream(req: ChatRequest):
+    """Chat with the productivity agent, streamed as server-sent events"""
+    # Lazy import to avoid circular dependency
+    from agents.productivity.agent import get_productivity_agent, build_initial_state
+
+    events = stream_graph_events(
+        get_productivity_agent(),
+        build_initial_state(TEST_USER_ID, req.message),
+        config={"callbacks": [OpikTracer(project_name="equinox")]}
+    )
+    return sse_response(events, user_id=TEST_USER_ID)
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from database import get_db, User
+from database import get_db
 from state.user_tokens import get_user_tokens
 from tools.google_auth import get_gmail_service
+from utils.identity_cache import get_identity_sync
 
 router = APIRouter(prefix="/api/emails", tags=["emails"])
 
@@ -12,12 +13,12 @@ def get_user_emails(email: str, limit: int = 50, db: Session = Depends(get_db)):
     Fetch recent emails for a user.
     """
     # 1. Get User
-    user = db.query(User).filter(User.email == email).first()
-    if not user:
+    identity = get_identity_sync(db, email)
+    if not identity:
         raise HTTPException(status_code=404, detail="User not found")
     
     # 2. Get tokens
-    tokens = get_user_tokens(str(user.id))
+    tokens = get_user_tokens(str(identity.user_id))
     if not tokens:
         raise HTTPException(status_code=401, detail="User not authenticated with Google")
         
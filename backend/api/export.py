@@ -0,0 +1,221 @@
+# data export endpoints
+# a user's health logs, mood entries, notes, todos and chat threads as
+# ndjson, csv or parquet. rows come off a server-side cursor (yield_per) and
+# go out a partition at a time as a chunked response, so a heavy user's
+# export runs in the same memory as a light one's
+#
+# parquet needs pyarrow, which isn't a hard requirement - without it that
+# format is a 400
+
+import csv
+import io
+import json
+import os
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import AsyncIterator
+from uuid import UUID
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Boolean, Date, DECIMAL, Integer, Time, TIMESTAMP, select
+
+from database import AsyncSessionLocal, HealthLog, MoodEntry, Note
+from database.models import ChatThread, Todo
+from agents.wellness.running import SUM_COLUMNS
+from utils.auth_middleware import get_current_user
+from utils.identity_cache import get_identity
+
+router = APIRouter(prefix="/api/export", tags=["export"])
+
+# rows per cursor fetch / response chunk
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "1000"))
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+# dataset -> (model, owned by user_id or user_email, sort columns, columns left out)
+EXPORTS = {
+    "health_logs": (HealthLog, "user_id", ("date",), ("log_seq", *SUM_COLUMNS)),
+    "mood_entries": (MoodEntry, "user_id", ("logged_at", "id"), ()),
+    "notes": (Note, "user_email", ("created_at", "id"), ()),
+    "todos": (Todo, "user_email", ("created_at", "id"), ()),
+    "chat_threads": (ChatThread, "user_email", ("created_at", "id"), ()),
+}
+
+
+def export_columns(dataset: str) -> list:
+    model, owner, _, skip = EXPORTS[dataset]
+    return [col for col in model.__table__.columns if col.key != owner and col.key not in skip]
+
+
+def _plain(value, nested: bool = False):
+    """
+    a column value as something json / csv / arrow take as-is
+    json columns stay nested for ndjson, serialized for the flat formats
+    """
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, UUID):
+        return str(value)
+    if isinstance(value, (dict, list)) and not nested:
+        return json.dumps(value)
+    return value
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    return str(value)
+
+
+async def _partitions(dataset: str, owner_value) -> AsyncIterator[list]:
+    """the dataset's rows for one owner, EXPORT_CHUNK_ROWS at a time off a server-side cursor"""
+    model, owner, order_by, _ = EXPORTS[dataset]
+    query = (
+        select(*export_columns(dataset))
+        .where(getattr(model, owner) == owner_value)
+        .order_by(*(getattr(model, col) for col in order_by))
+        .execution_options(yield_per=EXPORT_CHUNK_ROWS)
+    )
+    # own session - the request's is closed before a streamed body finishes
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query)
+        async for partition in result.partitions():
+            yield partition
+
+
+async def _ndjson(dataset: str, owner_value) -> AsyncIterator[bytes]:
+    async for rows in _partitions(dataset, owner_value):
+        lines = [
+            json.dumps({key: _plain(value, nested=True) for key, value in row._mapping.items()}, default=_json_default)
+            for row in rows
+        ]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+async def _csv(dataset: str, owner_value) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([col.key for col in export_columns(dataset)])
+    async for rows in _partitions(dataset, owner_value):
+        writer.writerows([_plain(value) for value in row] for row in rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # header only - nothing exported
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _arrow_schema(dataset: str):
+    import pyarrow as pa
+
+    def arrow_type(col):
+        kind = col.type
+        if isinstance(kind, Boolean):
+            return pa.bool_()
+        if isinstance(kind, Integer):
+            return pa.int64()
+        if isinstance(kind, DECIMAL):
+            return pa.float64()
+        if isinstance(kind, TIMESTAMP):
+            return pa.timestamp("us", tz="UTC")
+        if isinstance(kind, Date):
+            return pa.date32()
+        if isinstance(kind, Time):
+            return pa.time64("us")
+        # text, uuids, and json (serialized)
+        return pa.string()
+
+    return pa.schema([(col.key, arrow_type(col)) for col in export_columns(dataset)])
+
+
+class _ChunkSink:
+    """write-only file for ParquetWriter that hands back what was written since the last take()"""
+
+    def __init__(self):
+        self._chunks = []
+        self._written = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._written += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._written
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def take(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+async def _parquet(dataset: str, owner_value) -> AsyncIterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(dataset)
+    sink = _ChunkSink()
+    # a row group per partition - each one can go out as soon as it's written
+    with pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema) as writer:
+        async for rows in _partitions(dataset, owner_value):
+            columns = list(zip(*rows))
+            writer.write_batch(pa.record_batch(
+                [pa.array([_plain(v) for v in values], type=field.type) for values, field in zip(columns, schema)],
+                schema=schema
+            ))
+            yield sink.take()
+    yield sink.take()
+
+
+_WRITERS = {"ndjson": _ndjson, "csv": _csv, "parquet": _parquet}
+
+
+@router.get("/{email}/{dataset}")
+async def export_user_data(
+    email: str,
+    dataset: str,
+    fmt: str = Query("ndjson", alias="format"),
+    current_user: str = Depends(get_current_user)
+):
+    """
+    stream one of the user's datasets - health_logs, mood_entries, notes,
+    todos or chat_threads - as ndjson (default), csv or parquet
+    """
+    if current_user != email:
+        raise HTTPException(status_code=403, detail="Cannot export another user's data")
+    if dataset not in EXPORTS:
+        raise HTTPException(status_code=404, detail=f"unknown dataset - expected one of {', '.join(EXPORTS)}")
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise HTTPException(status_code=400, detail="parquet export isn't available on this server (needs pyarrow)")
+
+    owner_value = email
+    if EXPORTS[dataset][1] == "user_id":
+        async with AsyncSessionLocal() as db:
+            identity = await get_identity(db, email)
+        if not identity:
+            raise HTTPException(status_code=404, detail="User not found")
+        owner_value = identity.user_id
+
+    media_type, extension = EXPORT_FORMATS[fmt]
+    return StreamingResponse(
+        _WRITERS[fmt](dataset, owner_value),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{dataset}.{extension}"'}
+    )
@@ -1,22 +1,67 @@
 # health api endpoints
 
-from datetime import date, datetime
-from typing import Optional
+import os
+from datetime import date, datetime, timedelta
+from typing import Optional, Union
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+import numpy as np
 
-from database import get_db, HealthLog, User, UserProfile
-from schemas import HealthLogCreate, HealthLogResponse, ReadinessResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import Boolean, func, literal, literal_column, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from agents.briefing.cache import invalidate_briefing
+from agents.briefing.scheduler import BRIEFING_SCHEDULER_ENABLED
+from database import get_async_db, HealthLog, User, UserProfile
+from jobs import enqueue_job
+from agents.wellness.algorithms import consistency_from_streak
+from agents.wellness.algorithms.vectorized import (
+    readiness_batch,
+    readiness_zones,
+    sleep_debt_batch,
+    streak_lengths,
+    trends_batch
+)
+from agents.wellness.health_import import IMPORT_FORMATS, IMPORT_SOURCES, import_health_stream
+from agents.wellness.forecast import forecast_accuracy, get_forecast, record_forecast_actual
+from agents.wellness.running import update_running_totals
+from agents.wellness.streaks import get_streaks, logging_streak_on, update_streaks
+from utils.identity_cache import Identity, get_identity, get_identity_by_id
+from schemas import (
+    HealthLogCreate,
+    HealthLogResponse,
+    HealthImportResponse,
+    ReadinessResponse,
+    ReadinessDay,
+    ReadinessRangeResponse,
+    ReadinessBatchRequest,
+    ReadinessBatchResponse,
+    UserReadinessSummary,
+    ForecastResponse
+)
 
 router = APIRouter(prefix="/health", tags=["health"])
 
 # hardcoded test user for now - will add auth later
 TEST_USER_ID = "a0eebc99-9c0b-4ef8-bb6d-6bb9bd380a11"
 
+# cohort queries load every log in range - keep them bounded
+READINESS_BATCH_MAX_USERS = int(os.getenv("READINESS_BATCH_MAX_USERS", "1000"))
+READINESS_MAX_RANGE_DAYS = int(os.getenv("READINESS_MAX_RANGE_DAYS", "366"))
+
+
+async def _identity(db: AsyncSession, user_email: Optional[str]) -> Identity:
+    """the email's user (cached), falling back to the test user"""
+    if user_email:
+        identity = await get_identity(db, user_email)
+        if identity:
+            return identity
+    return await get_identity_by_id(db, UUID(TEST_USER_ID))
+
 
-def calculate_readiness(log: HealthLog, profile: UserProfile = None) -> dict:
+def calculate_readiness(log: HealthLog, profile: Union[UserProfile, Identity] = None, streak_days: int = 0) -> dict:
     """
     calculate readiness score from health data
     
@@ -25,7 +70,7 @@ def calculate_readiness(log: HealthLog, profile: UserProfile = None) -> dict:
     - energy: 25%
     - stress: 20% (inverted)
     - activity: 10%
-    - consistency: 10%
+    - consistency: 10% (logging streak)
     """
     optimal_sleep = profile.optimal_sleep_hours if profile else 8.0
     
@@ -40,8 +85,7 @@ def calculate_readiness(log: HealthLog, profile: UserProfile = None) -> dict:
     activity_target = 30  # mins
     activity_factor = min(100, ((log.activity_minutes or 0) / activity_target) * 100)
     
-    # consistency - simplified for now (will improve later)
-    consistency_factor = 50  # placeholder
+    consistency_factor = consistency_from_streak(streak_days)
     
     # weighted sum
     score = int(
@@ -76,58 +120,118 @@ def calculate_readiness(log: HealthLog, profile: UserProfile = None) -> dict:
     }
 
 
+def health_log_arrays(logs: list) -> dict:
+    """readiness inputs of many logs as float arrays, None -> NaN"""
+    def column(attr):
+        return np.array([
+            np.nan if getattr(log, attr) is None else float(getattr(log, attr))
+            for log in logs
+        ])
+    
+    return {
+        "sleep_hours": column("sleep_hours"),
+        "sleep_quality": column("sleep_quality"),
+        "energy_level": column("energy_level"),
+        "stress_level": column("stress_level"),
+        "activity_minutes": column("activity_minutes"),
+    }
+
+
+def calculate_readiness_batch(arrays: dict, optimal_sleep, streak_days) -> dict:
+    """calculate_readiness over health_log_arrays - same scores, one numpy pass"""
+    # /10 stress scale, like calculate_readiness
+    return readiness_batch(
+        **arrays,
+        optimal_sleep=optimal_sleep,
+        streak_days=streak_days,
+        stress_scale=10
+    )
+
+
+async def _upsert_log(db: AsyncSession, user_id: UUID, log_date: date, data: HealthLogCreate) -> tuple:
+    """
+    write a day's log in one statement - insert, or merge the fields that
+    were sent into the existing row. returns (log, whether it was new)
+    """
+    values = data.model_dump(exclude={"date", "user_email"})
+    sent = data.model_dump(exclude_unset=True, exclude={"date", "user_email"})
+
+    if db.bind.dialect.name == "postgresql":
+        insert = postgresql.insert
+        # xmax is 0 on a freshly inserted row version, set when on conflict updated it
+        inserted = literal_column("xmax = 0", Boolean)
+    else:
+        insert = sqlite.insert
+        # no xmax outside postgres - check first (dev / sqlite only)
+        inserted = literal(await db.scalar(select(HealthLog.id).where(
+            HealthLog.user_id == user_id,
+            HealthLog.date == log_date
+        )) is None)
+
+    stmt = insert(HealthLog).values(user_id=user_id, date=log_date, **values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["user_id", "date"],
+        set_={**{col: getattr(stmt.excluded, col) for col in sent}, "updated_at": func.now()}
+    ).returning(HealthLog, inserted)
+
+    log, is_new = (await db.execute(stmt, execution_options={"populate_existing": True})).one()
+    return log, bool(is_new)
+
+
 @router.post("/log", response_model=HealthLogResponse)
-async def log_health(data: HealthLogCreate, db: Session = Depends(get_db)):
+async def log_health(data: HealthLogCreate, db: AsyncSession = Depends(get_async_db)):
     """log or update health data for a date"""
     
-    user_id = UUID(TEST_USER_ID)
-    if data.user_email:
-        user = db.query(User).filter(User.email == data.user_email.lower()).first()
-        if user:
-            user_id = user.id
+    identity = await _identity(db, data.user_email)
+    user_id = identity.user_id
             
     log_date = data.date or date.today()
     
-    # check if exists
-    existing = db.query(HealthLog).filter(
-        HealthLog.user_id == user_id,
-        HealthLog.date == log_date
-    ).first()
+    # insert or merge in one round trip - concurrent first logs of the day
+    # meet in on conflict instead of racing on uq_health_logs_user_date.
+    # everything below sees the written row
+    log, is_new_log = await _upsert_log(db, user_id, log_date, data)
     
-    is_new_log = existing is None
+    optimal_sleep = identity.optimal_sleep_hours
     
-    if existing:
-        # update
-        for key, value in data.model_dump(exclude_unset=True, exclude={"date", "user_email"}).items():
-            setattr(existing, key, value)
-        log = existing
-    else:
-        # create
-        log = HealthLog(
-            user_id=user_id,
-            date=log_date,
-            **data.model_dump(exclude={"date", "user_email"})
-        )
-        db.add(log)
+    # streaks first - the logging streak feeds readiness. a rebuild reads
+    # the user's logs back with a select, and nothing autoflushes
+    await db.flush()
+    streaks = await update_streaks(db, log, optimal_sleep)
+    logging_streak = streaks.get("daily_logging")
     
     # calculate readiness
-    profile = db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
-    readiness = calculate_readiness(log, profile)
+    streak_days = await logging_streak_on(db, user_id, log_date, logging_streak)
+    readiness = calculate_readiness(log, identity, streak_days)
     log.readiness_score = readiness["score"]
     
-    db.commit()
-    db.refresh(log)
+    # running totals + sleep debt, same transaction as the log
+    await update_running_totals(db, log, optimal_sleep, is_new_log)
+    await record_forecast_actual(db, log)
+    
+    # readiness + totals go out as one update with the commit
+    await db.commit()
+    
+    # a filled-in past day lengthens the streak behind the days after it -
+    # re-score those in the background
+    if is_new_log and logging_streak and logging_streak.last_updated > log_date:
+        await enqueue_job("recompute_health_metrics", {"user_id": str(user_id)})
+    
+    # cached briefing was built from the previous log
+    invalidate_briefing(data.user_email)
     
     # Trigger auto-email briefing if this is today's first log
-    if is_new_log and log_date == date.today():
+    # (the scheduler sends at check-in time instead when it's running)
+    if is_new_log and log_date == date.today() and not BRIEFING_SCHEDULER_ENABLED:
         try:
-            from api.briefing import send_briefing_email_internal
-            # Get user email from the User table
-            user = db.query(User).filter(User.id == user_id).first()
-            if user and user.email:
-                # Send briefing email in background (fire and forget)
-                import asyncio
-                asyncio.create_task(send_briefing_email_internal(user.email))
+            if identity.email:
+                # Send briefing email on the job queue (retried, survives restarts)
+                await enqueue_job(
+                    "send_briefing_email",
+                    {"email": identity.email},
+                    max_attempts=3,
+                    dedupe_key=f"briefing:{identity.email}:{log_date}"
+                )
         except Exception as e:
             # Don't fail the health log if email fails
             print(f"Auto-email failed: {e}")
@@ -135,22 +239,51 @@ async def log_health(data: HealthLogCreate, db: Session = Depends(get_db)):
     return log
 
 
+@router.post("/import", response_model=HealthImportResponse)
+async def import_health_data(
+    request: Request,
+    fmt: str = Query(..., alias="format"),
+    user_email: Optional[str] = None,
+    source: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    bulk import a wearable or spreadsheet export, sent as the raw request body
+    format: csv / ndjson (a day per row, health log field names) or
+    apple_health (the health app's export.xml)
+    readiness, totals and streaks are re-scored by a background job after it returns
+    """
+    
+    if fmt not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(IMPORT_FORMATS)}")
+    if source is not None and source not in IMPORT_SOURCES:
+        raise HTTPException(status_code=400, detail=f"source must be one of {', '.join(IMPORT_SOURCES)}")
+    
+    identity = await _identity(db, user_email)
+    try:
+        result = await import_health_stream(db, identity.user_id, request.stream(), fmt, source)
+    except ValueError as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    if result["days"]:
+        invalidate_briefing(identity.email or user_email)
+    return HealthImportResponse(**result)
+
+
 @router.get("/today", response_model=HealthLogResponse)
-def get_today(user_email: Optional[str] = None, db: Session = Depends(get_db)):
+async def get_today(user_email: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
     """get today's health log"""
     
-    user_id = UUID(TEST_USER_ID)
-    if user_email:
-        user = db.query(User).filter(User.email == user_email.lower()).first()
-        if user:
-            user_id = user.id
+    identity = await _identity(db, user_email)
+    user_id = identity.user_id
             
     today = date.today()
     
-    log = db.query(HealthLog).filter(
+    log = await db.scalar(select(HealthLog).where(
         HealthLog.user_id == user_id,
         HealthLog.date == today
-    ).first()
+    ))
     
     if not log:
         raise HTTPException(status_code=404, detail="no log for today yet")
@@ -159,44 +292,126 @@ def get_today(user_email: Optional[str] = None, db: Session = Depends(get_db)):
 
 
 @router.get("/history")
-def get_history(days: int = 7, user_email: Optional[str] = None, db: Session = Depends(get_db)):
+async def get_history(days: int = 7, user_email: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
     """get health history for last N days"""
     
-    user_id = UUID(TEST_USER_ID)
-    if user_email:
-        user = db.query(User).filter(User.email == user_email.lower()).first()
-        if user:
-            user_id = user.id
+    identity = await _identity(db, user_email)
+    user_id = identity.user_id
             
-    logs = db.query(HealthLog).filter(
-        HealthLog.user_id == user_id
-    ).order_by(HealthLog.date.desc()).limit(days).all()
+    logs = (await db.scalars(
+        select(HealthLog)
+        .where(HealthLog.user_id == user_id)
+        .order_by(HealthLog.date.desc())
+        .limit(days)
+    )).all()
     
     return [HealthLogResponse.model_validate(log) for log in logs]
 
 
-@router.get("/readiness", response_model=ReadinessResponse)
-def get_readiness(user_email: Optional[str] = None, db: Session = Depends(get_db)):
-    """get current readiness score with breakdown"""
+def _check_range(start: date, end: date):
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must be on or after start")
+    if (end - start).days >= READINESS_MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"range is limited to {READINESS_MAX_RANGE_DAYS} days")
+
+
+async def _lead_in_dates(db: AsyncSession, start: date, user_filter) -> list:
+    # log dates in the 29 days before a range - consistency tops out at a
+    # 30-day streak, so that's all the history a range's streaks need
+    return (await db.execute(
+        select(User.email, HealthLog.date)
+        .join(HealthLog, HealthLog.user_id == User.id)
+        .where(
+            user_filter,
+            HealthLog.date >= start - timedelta(days=29),
+            HealthLog.date < start
+        )
+        .order_by(HealthLog.date)
+    )).all()
+
+
+def _range_streaks(lead_in: list, dates: list) -> np.ndarray:
+    """logging streak on each of `dates`, given the log dates just before them"""
+    days = [d.toordinal() for d in lead_in + dates]
+    return streak_lengths(days)[len(lead_in):]
+
+
+async def _readiness_range(identity: Identity, start: date, end: date, db: AsyncSession) -> ReadinessRangeResponse:
+    user_id = identity.user_id
+    logs = (await db.scalars(
+        select(HealthLog)
+        .where(
+            HealthLog.user_id == user_id,
+            HealthLog.date >= start,
+            HealthLog.date <= end
+        )
+        .order_by(HealthLog.date)
+    )).all()
     
-    user_id = UUID(TEST_USER_ID)
-    if user_email:
-        user = db.query(User).filter(User.email == user_email.lower()).first()
-        if user:
-            user_id = user.id
+    if not logs:
+        return ReadinessRangeResponse(start=start, end=end, days=[], avg_score=None)
+    
+    optimal = identity.optimal_sleep_hours
+    lead_in = [day for _, day in await _lead_in_dates(db, start, User.id == user_id)]
+    streaks = _range_streaks(lead_in, [log.date for log in logs])
+    result = calculate_readiness_batch(health_log_arrays(logs), optimal, streaks)
+    
+    days = [
+        ReadinessDay(
+            date=log.date,
+            score=int(result["score"][i]),
+            zone=str(result["zone"][i]),
+            sleep_factor=int(result["sleep"][i]),
+            energy_factor=int(result["energy"][i]),
+            stress_factor=int(result["stress"][i]),
+            activity_factor=int(result["activity"][i]),
+            consistency_factor=int(result["consistency"][i])
+        )
+        for i, log in enumerate(logs)
+    ]
+    
+    return ReadinessRangeResponse(
+        start=start,
+        end=end,
+        days=days,
+        avg_score=round(float(result["score"].mean()), 1)
+    )
+
+
+@router.get("/readiness", response_model=Union[ReadinessResponse, ReadinessRangeResponse])
+async def get_readiness(
+    user_email: Optional[str] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    get current readiness score with breakdown
+    pass start (and optionally end, default today) for every logged day in that range
+    """
+    
+    identity = await _identity(db, user_email)
+    user_id = identity.user_id
             
     today = date.today()
     
-    log = db.query(HealthLog).filter(
+    if start or end:
+        start = start or end
+        end = end or today
+        _check_range(start, end)
+        return await _readiness_range(identity, start, end, db)
+    
+    log = await db.scalar(select(HealthLog).where(
         HealthLog.user_id == user_id,
         HealthLog.date == today
-    ).first()
+    ))
     
     if not log:
         raise HTTPException(status_code=404, detail="log today's health first")
     
-    profile = db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
-    result = calculate_readiness(log, profile)
+    streaks = await get_streaks(db, user_id)
+    streak_days = await logging_streak_on(db, user_id, today, streaks.get("daily_logging"))
+    result = calculate_readiness(log, identity, streak_days)
     
     # add suggestions based on zone
     zone = result["zone"]
@@ -221,3 +436,149 @@ def get_readiness(user_email: Optional[str] = None, db: Session = Depends(get_db
         summary=summary,
         suggestions=suggestions
     )
+
+
+@router.get("/forecast", response_model=ForecastResponse)
+async def get_wellness_forecast(
+    user_email: Optional[str] = None,
+    day: Optional[date] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """stored forecast for a day (default: the next one) - written nightly"""
+    
+    identity = await _identity(db, user_email)
+    user_id = identity.user_id
+    
+    forecast = await get_forecast(db, user_id, day)
+    if not forecast:
+        raise HTTPException(status_code=404, detail="no forecast yet - they're generated nightly")
+    
+    return ForecastResponse(
+        forecast_date=forecast.forecast_date,
+        predicted_readiness=forecast.predicted_readiness,
+        predicted_zone=(
+            str(readiness_zones(forecast.predicted_readiness))
+            if forecast.predicted_readiness is not None else None
+        ),
+        predicted_energy_curve=forecast.predicted_energy_curve,
+        predicted_sleep_need=forecast.predicted_sleep_need,
+        recommended_bedtime=forecast.recommended_bedtime,
+        recommended_workout=forecast.recommended_workout,
+        risk_factors=forecast.risk_factors,
+        actual_readiness=forecast.actual_readiness,
+        accuracy_score=forecast.accuracy_score,
+        recent_accuracy=await forecast_accuracy(db, user_id)
+    )
+
+
+@router.post("/readiness/batch", response_model=ReadinessBatchResponse)
+async def get_readiness_batch(data: ReadinessBatchRequest, db: AsyncSession = Depends(get_async_db)):
+    """
+    readiness over a date range for a group of users
+    one query for everyone's logs, then the numbers for all users at once
+    """
+    
+    _check_range(data.start, data.end)
+    emails = list(dict.fromkeys(email.lower() for email in data.user_emails))
+    if len(emails) > READINESS_BATCH_MAX_USERS:
+        raise HTTPException(status_code=400, detail=f"at most {READINESS_BATCH_MAX_USERS} users per request")
+    
+    rows = (await db.execute(
+        select(User.email, HealthLog, UserProfile.optimal_sleep_hours)
+        .join(HealthLog, HealthLog.user_id == User.id)
+        .outerjoin(UserProfile, UserProfile.user_id == User.id)
+        .where(
+            User.email.in_(emails),
+            HealthLog.date >= data.start,
+            HealthLog.date <= data.end
+        )
+        .order_by(User.email, HealthLog.date)
+    )).all()
+    
+    by_user = {}
+    optimal_by_user = {}
+    for email, log, optimal in rows:
+        by_user.setdefault(email, []).append(log)
+        optimal_by_user[email] = float(optimal) if optimal else 8.0
+    
+    lead_in_by_user = {}
+    for email, day in await _lead_in_dates(db, data.start, User.email.in_(emails)):
+        lead_in_by_user.setdefault(email, []).append(day)
+    
+    # unknown emails / users with no logs come back empty rather than missing
+    users = [email for email in emails if email in by_user]
+    summaries = {
+        email: UserReadinessSummary(
+            user_email=email,
+            days_logged=0,
+            avg_readiness=None,
+            latest_score=None,
+            latest_zone=None,
+            sleep_debt_hours=None,
+            readiness_trend="stable",
+            sleep_trend="stable",
+            energy_trend="stable",
+            stress_trend="stable"
+        )
+        for email in emails
+    }
+    
+    if users:
+        # (users, days) arrays, oldest first, left-aligned and NaN padded
+        counts = np.array([len(by_user[email]) for email in users])
+        width = int(counts.max())
+        grids = {}
+        # sleep debt wants newest first; untracked sleep counts as a full
+        # shortfall, like the agent's sleep debt tool
+        newest_first = np.full((len(users), width), np.nan)
+        streaks = np.zeros((len(users), width), dtype=int)
+        for i, email in enumerate(users):
+            arrays = health_log_arrays(by_user[email])
+            for name, values in arrays.items():
+                grid = grids.setdefault(name, np.full((len(users), width), np.nan))
+                grid[i, :len(values)] = values
+            newest_first[i, :counts[i]] = np.nan_to_num(arrays["sleep_hours"][::-1])
+            streaks[i, :counts[i]] = _range_streaks(
+                lead_in_by_user.get(email, []),
+                [log.date for log in by_user[email]]
+            )
+        
+        cols = np.arange(width)[None, :]
+        logged = cols < counts[:, None]
+        optimal = np.array([optimal_by_user[email] for email in users])
+        
+        readiness = calculate_readiness_batch(grids, optimal[:, None], streaks)
+        scores = np.where(logged, readiness["score"], np.nan)
+        avg = np.nanmean(scores, axis=1)
+        latest = counts - 1
+        debt = sleep_debt_batch(newest_first, optimal)
+        
+        trends = trends_batch(
+            {
+                "readiness_score": scores,
+                "sleep_hours": grids["sleep_hours"],
+                "energy_level": grids["energy_level"],
+                "stress_level": grids["stress_level"],
+            },
+            counts
+        )
+        
+        for i, email in enumerate(users):
+            summaries[email] = UserReadinessSummary(
+                user_email=email,
+                days_logged=int(counts[i]),
+                avg_readiness=round(float(avg[i]), 1),
+                latest_score=int(readiness["score"][i, latest[i]]),
+                latest_zone=str(readiness["zone"][i, latest[i]]),
+                sleep_debt_hours=float(debt["debt_hours"][i]),
+                readiness_trend=str(trends["readiness_score"]["trend"][i]),
+                sleep_trend=str(trends["sleep_hours"]["trend"][i]),
+                energy_trend=str(trends["energy_level"]["trend"][i]),
+                stress_trend=str(trends["stress_level"]["trend"][i])
+            )
+    
+    return ReadinessBatchResponse(
+        start=data.start,
+        end=data.end,
+        users=[summaries[email] for email in emails]
+    )
@@ -1,11 +1,13 @@
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from pydantic import BaseModel
-from typing import List, Dict, Any
-from sqlalchemy.orm import Session
-from database import get_db
+from typing import List, Dict, Any, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
 from database.models import ChatThread
 from utils.auth_middleware import get_current_user
+from utils.pagination import NEXT_CURSOR_HEADER, keyset_page, page_size, split_page
 
 router = APIRouter(prefix="/api/history", tags=["history"])
 
@@ -14,11 +16,11 @@ class ThreadCreate(BaseModel):
     title: str = "New Conversation"
 
 @router.post("/{email}/{thread_id}")
-def save_thread(
+async def save_thread(
     email: str, 
     thread_id: str, 
     thread_data: ThreadCreate, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: str = Depends(get_current_user)
 ):
     """
@@ -30,7 +32,7 @@ def save_thread(
         raise HTTPException(status_code=403, detail="Cannot access another user's threads")
     
     # Check if exists
-    existing_thread = db.query(ChatThread).filter(ChatThread.id == thread_id).first()
+    existing_thread = await db.scalar(select(ChatThread).where(ChatThread.id == thread_id))
     
     if existing_thread:
         # Update
@@ -50,32 +52,52 @@ def save_thread(
         db.add(new_thread)
     
     try:
-        db.commit()
+        await db.commit()
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
         
     return {"status": "success", "thread_id": thread_id}
 
 @router.get("/{email}")
-def get_user_threads(
+async def get_user_threads(
     email: str, 
-    db: Session = Depends(get_db),
+    response: Response,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
     current_user: str = Depends(get_current_user)
 ):
-    """Get all threads for a user - requires authentication"""
+    """
+    Get a page of a user's threads, newest first - requires authentication.
+    Pass the X-Next-Cursor response header back as cursor for the next page.
+    """
     # Verify authenticated user matches the email in URL
     if current_user != email:
         raise HTTPException(status_code=403, detail="Cannot access another user's threads")
     
-    threads = db.query(ChatThread).filter(ChatThread.user_email == email).order_by(ChatThread.created_at.desc()).all()
+    limit = page_size(limit)
+    try:
+        query = keyset_page(
+            select(ChatThread).where(ChatThread.user_email == email),
+            ChatThread.created_at,
+            ChatThread.id,
+            cursor,
+            limit
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    threads, next_cursor = split_page((await db.scalars(query)).all(), limit)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return threads
 
 @router.get("/{email}/{thread_id}")
-def get_thread(
+async def get_thread(
     email: str, 
     thread_id: str, 
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: str = Depends(get_current_user)
 ):
     """Get a specific thread - requires authentication"""
@@ -83,7 +105,7 @@ def get_thread(
     if current_user != email:
         raise HTTPException(status_code=403, detail="Cannot access another user's threads")
     
-    thread = db.query(ChatThread).filter(ChatThread.id == thread_id, ChatThread.user_email == email).first()
+    thread = await db.scalar(select(ChatThread).where(ChatThread.id == thread_id, ChatThread.user_email == email))
     if not thread:
         raise HTTPException(status_code=404, detail="Thread not found")
     return thread
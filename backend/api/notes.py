@@ -1,19 +1,22 @@
 # routers/notes.py
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from uuid import UUID
 
-from database import get_db
+from database import get_async_db
 from database.models import Note
 from schemas.notes import NoteCreate, NoteUpdate, NoteResponse
+from utils.pagination import NEXT_CURSOR_HEADER, keyset_page, page_size, split_page
+from utils.turn_cache import memoize, forget
 
 router = APIRouter(prefix="/notes", tags=["notes"])
 
 
 
 # Service Functions (for Agent Use)
-def create_note_service(db: Session, user_email: str, title: str, content: str, source: str = "user"):
+async def create_note_service(db: AsyncSession, user_email: str, title: str, content: str, source: str = "user"):
     note = Note(
         user_email=user_email,
         title=title,
@@ -21,21 +24,40 @@ def create_note_service(db: Session, user_email: str, title: str, content: str,
         source=source
     )
     db.add(note)
-    db.commit()
-    db.refresh(note)
+    await db.commit()
+    await db.refresh(note)
+    forget("db", "notes", user_email)
     return note
 
-def get_user_notes_service(db: Session, user_email: str):
-    return db.query(Note)\
-        .filter(Note.user_email == user_email)\
-        .order_by(Note.created_at.desc())\
-        .all()
-
-def get_note_service(db: Session, note_id: UUID):
-    return db.query(Note).filter(Note.id == note_id).first()
-
-def update_note_service(db: Session, note_id: UUID, title: str | None = None, content: str | None = None):
-    note = get_note_service(db, note_id)
+async def get_user_notes_service(
+    db: AsyncSession,
+    user_email: str,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+):
+    """
+    a user's notes, newest first - limit of them after cursor, or all of them
+    returns (notes, cursor for the next page or None)
+    """
+    async def _load():
+        result = await db.scalars(keyset_page(
+            select(Note).where(Note.user_email == user_email),
+            Note.created_at,
+            Note.id,
+            cursor,
+            limit
+        ))
+        return result.all()
+
+    # once per agent turn - plain query outside one
+    rows = await memoize(("db", "notes", user_email, limit, cursor), _load)
+    return split_page(rows, limit)
+
+async def get_note_service(db: AsyncSession, note_id: UUID):
+    return await db.scalar(select(Note).where(Note.id == note_id))
+
+async def update_note_service(db: AsyncSession, note_id: UUID, title: str | None = None, content: str | None = None):
+    note = await get_note_service(db, note_id)
     if not note:
         return None
     
@@ -44,24 +66,26 @@ def update_note_service(db: Session, note_id: UUID, title: str | None = None, co
     if content is not None:
         note.content = content
     
-    db.commit()
-    db.refresh(note)
+    await db.commit()
+    await db.refresh(note)
+    forget("db", "notes", note.user_email)
     return note
 
-def delete_note_service(db: Session, note_id: UUID):
-    note = get_note_service(db, note_id)
+async def delete_note_service(db: AsyncSession, note_id: UUID):
+    note = await get_note_service(db, note_id)
     if not note:
         return False
     
-    db.delete(note)
-    db.commit()
+    await db.delete(note)
+    await db.commit()
+    forget("db", "notes", note.user_email)
     return True
 
 # Route Handlers
 @router.post("/", response_model=NoteResponse, status_code=201)
-def create_note(note_data: NoteCreate, db: Session = Depends(get_db)):
+async def create_note(note_data: NoteCreate, db: AsyncSession = Depends(get_async_db)):
     """Create a new note"""
-    return create_note_service(
+    return await create_note_service(
         db, 
         note_data.user_email, 
         note_data.title, 
@@ -71,33 +95,48 @@ def create_note(note_data: NoteCreate, db: Session = Depends(get_db)):
 
 
 @router.get("/{user_email}", response_model=List[NoteResponse])
-def get_user_notes(user_email: str, db: Session = Depends(get_db)):
-    """Get all notes for a user, ordered by most recent first"""
-    return get_user_notes_service(db, user_email)
+async def get_user_notes(
+    user_email: str,
+    response: Response,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get a page of a user's notes, most recent first.
+    Pass the X-Next-Cursor response header back as cursor for the next page.
+    """
+    try:
+        notes, next_cursor = await get_user_notes_service(db, user_email, page_size(limit), cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return notes
 
 
 @router.get("/note/{note_id}", response_model=NoteResponse)
-def get_note(note_id: UUID, db: Session = Depends(get_db)):
+async def get_note(note_id: UUID, db: AsyncSession = Depends(get_async_db)):
     """Get a specific note by ID"""
-    note = get_note_service(db, note_id)
+    note = await get_note_service(db, note_id)
     if not note:
         raise HTTPException(status_code=404, detail="Note not found")
     return note
 
 
 @router.patch("/{note_id}", response_model=NoteResponse)
-def update_note(note_id: UUID, update_data: NoteUpdate, db: Session = Depends(get_db)):
+async def update_note(note_id: UUID, update_data: NoteUpdate, db: AsyncSession = Depends(get_async_db)):
     """Update a note's title and/or content"""
-    note = update_note_service(db, note_id, update_data.title, update_data.content)
+    note = await update_note_service(db, note_id, update_data.title, update_data.content)
     if not note:
         raise HTTPException(status_code=404, detail="Note not found")
     return note
 
 
 @router.delete("/{note_id}", status_code=204)
-def delete_note(note_id: UUID, db: Session = Depends(get_db)):
+async def delete_note(note_id: UUID, db: AsyncSession = Depends(get_async_db)):
     """Delete a note"""
-    success = delete_note_service(db, note_id)
+    success = await delete_note_service(db, note_id)
     if not success:
         raise HTTPException(status_code=404, detail="Note not found")
     return None
\ No newline at end of file
@@ -3,9 +3,12 @@
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database import get_db, User, UserProfile
+from database import get_async_db, User, UserProfile
+from jobs import enqueue_job
+from utils.identity_cache import invalidate_identity
 from schemas import UserProfileCreate, UserProfileUpdate, UserProfileResponse, UserResponse
 
 router = APIRouter(prefix="/profile", tags=["profile"])
@@ -15,12 +18,12 @@ TEST_USER_ID = "a0eebc99-9c0b-4ef8-bb6d-6bb9bd380a11"
 
 
 @router.get("/", response_model=UserProfileResponse)
-def get_profile(db: Session = Depends(get_db)):
+async def get_profile(db: AsyncSession = Depends(get_async_db)):
     """get user profile"""
     
     user_id = UUID(TEST_USER_ID)
     
-    profile = db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
+    profile = await db.scalar(select(UserProfile).where(UserProfile.user_id == user_id))
     
     if not profile:
         raise HTTPException(status_code=404, detail="profile not found")
@@ -29,35 +32,42 @@ def get_profile(db: Session = Depends(get_db)):
 
 
 @router.put("/", response_model=UserProfileResponse)
-def update_profile(data: UserProfileUpdate, db: Session = Depends(get_db)):
+async def update_profile(data: UserProfileUpdate, db: AsyncSession = Depends(get_async_db)):
     """update user profile"""
     
     user_id = UUID(TEST_USER_ID)
     
-    profile = db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
+    profile = await db.scalar(select(UserProfile).where(UserProfile.user_id == user_id))
     
     if not profile:
         raise HTTPException(status_code=404, detail="profile not found")
     
-    for key, value in data.model_dump(exclude_unset=True).items():
+    updates = data.model_dump(exclude_unset=True)
+    old_optimal_sleep = profile.optimal_sleep_hours
+    for key, value in updates.items():
         setattr(profile, key, value)
     
-    db.commit()
-    db.refresh(profile)
+    await db.commit()
+    await db.refresh(profile)
+    invalidate_identity(user_id=user_id)
+    
+    # stored readiness / sleep debt were scored against the old target
+    if "optimal_sleep_hours" in updates and profile.optimal_sleep_hours != old_optimal_sleep:
+        await enqueue_job("recompute_health_metrics", {"user_id": str(user_id)})
     
     return profile
 
 
 @router.get("/user", response_model=UserResponse)
-def get_user(email: str | None = None, db: Session = Depends(get_db)):
+async def get_user(email: str | None = None, db: AsyncSession = Depends(get_async_db)):
     """get basic user info"""
     
     if email:
-        user = db.query(User).filter(User.email == email).first()
+        user = await db.scalar(select(User).where(User.email == email))
     else:
         # Fallback to test user if no email provided (for dev compatibility)
         user_id = UUID(TEST_USER_ID)
-        user = db.query(User).filter(User.id == user_id).first()
+        user = await db.scalar(select(User).where(User.id == user_id))
     
     if not user:
         raise HTTPException(status_code=404, detail="user not found")
@@ -1,14 +1,18 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Response
 from pydantic import BaseModel
 from datetime import datetime, date
 from typing import List, Optional
 import uuid
-from sqlalchemy.orm import Session
-from database.connection import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.connection import get_async_db
 from database.models import Todo as TodoModel
 
+from agents.briefing.cache import invalidate_briefing
 from state.user_tokens import get_user_tokens
-from tools.google_auth import get_tasks_service, fetch_tasks
+from tools.google_client import AsyncGoogleClient
+from utils.pagination import NEXT_CURSOR_HEADER, keyset_page, page_size, split_page
+from utils.turn_cache import memoize, forget
 
 router = APIRouter(prefix="/todos", tags=["todos"])
 
@@ -34,22 +38,44 @@ class TodoResponse(BaseModel):
         orm_mode = True
 
 # Service Functions
-def create_todo_service(db: Session, user_email: str, text: str, due_date: Optional[date] = None):
+async def create_todo_service(db: AsyncSession, user_email: str, text: str, due_date: Optional[date] = None):
     db_todo = TodoModel(
         user_email=user_email,
         text=text,
         due_date=due_date
     )
     db.add(db_todo)
-    db.commit()
-    db.refresh(db_todo)
+    await db.commit()
+    await db.refresh(db_todo)
+    invalidate_briefing(user_email)
+    forget("db", "todos", user_email)
     # Cast uuid to string
     db_todo.id = str(db_todo.id)
     return db_todo
 
-def get_todos_service(db: Session, user_email: str):
-    # 1. Fetch Local Todos
-    local_todos = db.query(TodoModel).filter(TodoModel.user_email == user_email).order_by(TodoModel.created_at.desc()).all()
+async def get_todos_service(
+    db: AsyncSession,
+    user_email: str,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None
+):
+    """
+    local todos newest first - limit of them after cursor, or all of them -
+    merged with google tasks on the first page (google's aren't ours to page)
+    returns (todos, cursor for the next page of local todos or None)
+    """
+    # 1. Fetch Local Todos (once per agent turn)
+    async def _load_local():
+        return (await db.scalars(keyset_page(
+            select(TodoModel).where(TodoModel.user_email == user_email),
+            TodoModel.created_at,
+            TodoModel.id,
+            cursor,
+            limit
+        ))).all()
+
+    rows = await memoize(("db", "todos", user_email, limit, cursor), _load_local)
+    local_todos, next_cursor = split_page(rows, limit)
     
     # Convert to response model format immediately to allow merging
     response_todos = []
@@ -65,11 +91,11 @@ def get_todos_service(db: Session, user_email: str):
 
     # 2. Fetch Google Tasks
     try:
-        tokens = get_user_tokens(user_email)
+        tokens = get_user_tokens(user_email) if not cursor else None
         if tokens:
-            service = get_tasks_service(tokens)
+            client = AsyncGoogleClient(tokens)
             # Fetch from default list
-            google_tasks = fetch_tasks(service, '@default')
+            google_tasks = await client.fetch_tasks('@default')
             
             for g_task in google_tasks:
                 # Map Google Task to TodoResponse
@@ -108,9 +134,9 @@ def get_todos_service(db: Session, user_email: str):
     # 3. Sort combined list by created_at desc
     response_todos.sort(key=lambda x: x.created_at, reverse=True)
     
-    return response_todos
+    return response_todos, next_cursor
 
-def delete_todo_service(db: Session, todo_id_str: str):
+async def delete_todo_service(db: AsyncSession, todo_id_str: str):
     try:
         todo_uuid = uuid.UUID(todo_id_str)
     except ValueError:
@@ -121,22 +147,24 @@ def delete_todo_service(db: Session, todo_id_str: str):
         # TODO: Implement Google Task deletion
         return False
         
-    db_todo = db.query(TodoModel).filter(TodoModel.id == todo_uuid).first()
+    db_todo = await db.scalar(select(TodoModel).where(TodoModel.id == todo_uuid))
     if not db_todo:
         return False
     
-    db.delete(db_todo)
-    db.commit()
+    await db.delete(db_todo)
+    await db.commit()
+    invalidate_briefing(db_todo.user_email)
+    forget("db", "todos", db_todo.user_email)
     return True
 
-def update_todo_service(db: Session, todo_id_str: str, updates: TodoUpdate):
+async def update_todo_service(db: AsyncSession, todo_id_str: str, updates: TodoUpdate):
     try:
         todo_uuid = uuid.UUID(todo_id_str)
     except ValueError:
         # TODO: Implement Google Task update
         return None
         
-    db_todo = db.query(TodoModel).filter(TodoModel.id == todo_uuid).first()
+    db_todo = await db.scalar(select(TodoModel).where(TodoModel.id == todo_uuid))
     if not db_todo:
         return None
     
@@ -147,38 +175,52 @@ def update_todo_service(db: Session, todo_id_str: str, updates: TodoUpdate):
     if updates.due_date is not None:
         db_todo.due_date = updates.due_date
         
-    db.commit()
-    db.refresh(db_todo)
+    await db.commit()
+    await db.refresh(db_todo)
+    invalidate_briefing(db_todo.user_email)
+    forget("db", "todos", db_todo.user_email)
     db_todo.id = str(db_todo.id)
     return db_todo
 
 # Route Handlers
 
 @router.post("/", response_model=TodoResponse)
-def add_todo(todo: TodoCreate, db: Session = Depends(get_db)):
+async def add_todo(todo: TodoCreate, db: AsyncSession = Depends(get_async_db)):
     # TODO: Add to Google Tasks if user is authenticated?
     # For now, add to local DB
-    return create_todo_service(db, todo.user_email.lower(), todo.text, todo.due_date)
+    return await create_todo_service(db, todo.user_email.lower(), todo.text, todo.due_date)
 
 @router.get("/{user_email}", response_model=List[TodoResponse])
-def get_todos(user_email: str, db: Session = Depends(get_db)):
-    return get_todos_service(db, user_email.lower())
+async def get_todos(
+    user_email: str,
+    response: Response,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    # a page of local todos (+ google tasks on the first) - next page's cursor in X-Next-Cursor
+    try:
+        todos, next_cursor = await get_todos_service(db, user_email.lower(), page_size(limit), cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return todos
 
 @router.delete("/{todo_id}")
-def delete_todo(todo_id: str, user_email: Optional[str] = None, db: Session = Depends(get_db)):
+async def delete_todo(todo_id: str, user_email: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
     # Try local delete first
-    success = delete_todo_service(db, todo_id)
+    success = await delete_todo_service(db, todo_id)
     if success:
         return {"message": "Todo deleted successfully"}
         
     # If fetch failed or wasn't a UUID, try Google Task
     if user_email:
-        from tools.google_auth import get_tasks_service, delete_task
         tokens = get_user_tokens(user_email.lower())
         if tokens:
             try:
-                service = get_tasks_service(tokens)
-                delete_task(service, todo_id)
+                await AsyncGoogleClient(tokens).delete_task(todo_id)
+                invalidate_briefing(user_email)
                 return {"message": "Google Task deleted successfully"}
             except Exception as e:
                 print(f"Failed to delete Google Task: {e}")
@@ -186,19 +228,18 @@ def delete_todo(todo_id: str, user_email: Optional[str] = None, db: Session = De
     raise HTTPException(status_code=404, detail="Todo not found (or failed to delete Google Task)")
 
 @router.put("/{todo_id}", response_model=TodoResponse)
-def update_todo(todo_id: str, updates: TodoUpdate, user_email: Optional[str] = None, db: Session = Depends(get_db)):
+async def update_todo(todo_id: str, updates: TodoUpdate, user_email: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
     # Try local update first
-    updated_todo = update_todo_service(db, todo_id, updates)
+    updated_todo = await update_todo_service(db, todo_id, updates)
     if updated_todo:
         return updated_todo
         
     # Try Google Task update
     if user_email:
-        from tools.google_auth import get_tasks_service, update_task
         tokens = get_user_tokens(user_email.lower())
         if tokens:
             try:
-                service = get_tasks_service(tokens)
+                client = AsyncGoogleClient(tokens)
                 
                 status = None
                 if updates.completed is not None:
@@ -209,7 +250,8 @@ def update_todo(todo_id: str, updates: TodoUpdate, user_email: Optional[str] = N
                     # Convert date to RFC 3339 string (e.g. 2023-10-01T00:00:00.000Z)
                     due = f"{updates.due_date.isoformat()}T00:00:00.000Z"
                 
-                g_task = update_task(service, todo_id, title=updates.text, status=status, due=due)
+                g_task = await client.update_task(todo_id, title=updates.text, status=status, due=due)
+                invalidate_briefing(user_email)
                 
                 # Convert back to response model
                 is_completed = g_task.get('status') == 'completed'
@@ -0,0 +1,104 @@
+# benchmark: scalar wellness algorithms vs the numpy batch versions
+# run from backend/: python benchmarks/bench_wellness_analytics.py [users] [days]
+# synthetic data, no database - also checks both paths agree
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from agents.wellness.algorithms import calculate_readiness, calculate_sleep_debt, analyze_trends
+from agents.wellness.algorithms.vectorized import readiness_batch, sleep_debt_batch, trends_batch
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+DAYS = int(sys.argv[2]) if len(sys.argv) > 2 else 90
+
+
+def make_data(rng):
+    return {
+        "sleep_hours": np.round(rng.uniform(4, 10, (USERS, DAYS)), 2),
+        "sleep_quality": rng.integers(1, 11, (USERS, DAYS)),
+        "energy_level": rng.integers(1, 11, (USERS, DAYS)),
+        "stress_level": rng.integers(1, 11, (USERS, DAYS)),
+        "activity_minutes": rng.integers(0, 90, (USERS, DAYS)),
+        "readiness_score": rng.integers(0, 101, (USERS, DAYS)),
+        "optimal": np.round(rng.uniform(7, 9, USERS), 1),
+    }
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def scalar_readiness(d):
+    return [
+        [
+            calculate_readiness(
+                sleep_hours=float(d["sleep_hours"][u, i]),
+                sleep_quality=int(d["sleep_quality"][u, i]),
+                energy_level=int(d["energy_level"][u, i]),
+                stress_level=int(d["stress_level"][u, i]),
+                activity_minutes=int(d["activity_minutes"][u, i]),
+                optimal_sleep=float(d["optimal"][u])
+            )["score"]
+            for i in range(DAYS)
+        ]
+        for u in range(USERS)
+    ]
+
+
+def scalar_sleep_debt(d):
+    # columns are days oldest -> newest; the scalar version sorts by date
+    return [
+        calculate_sleep_debt(
+            [{"date": i, "sleep_hours": float(d["sleep_hours"][u, i])} for i in range(DAYS)],
+            optimal_sleep=float(d["optimal"][u])
+        )["debt_hours"]
+        for u in range(USERS)
+    ]
+
+
+def scalar_trends(d):
+    metrics = ["readiness_score", "sleep_hours", "energy_level", "stress_level"]
+    return [
+        analyze_trends(
+            [{"date": f"{i:04d}", **{m: float(d[m][u, i]) for m in metrics}} for i in range(DAYS)],
+            days=DAYS
+        )["trends"]
+        for u in range(USERS)
+    ]
+
+
+def main():
+    d = make_data(np.random.default_rng(7))
+    print(f"{USERS} users x {DAYS} days\n")
+
+    old, old_ms = timed(lambda: scalar_readiness(d))
+    new, new_ms = timed(lambda: readiness_batch(
+        d["sleep_hours"], d["sleep_quality"], d["energy_level"], d["stress_level"],
+        d["activity_minutes"], optimal_sleep=d["optimal"][:, None]
+    )["score"])
+    assert np.array_equal(np.array(old), new), "readiness mismatch"
+    print(f"readiness   scalar: {old_ms:9.1f} ms   numpy: {new_ms:7.1f} ms   {old_ms / new_ms:6.0f}x")
+
+    old, old_ms = timed(lambda: scalar_sleep_debt(d))
+    # batch wants newest first
+    new, new_ms = timed(lambda: sleep_debt_batch(d["sleep_hours"][:, ::-1], d["optimal"])["debt_hours"])
+    assert np.allclose(np.array(old), new), "sleep debt mismatch"
+    print(f"sleep debt  scalar: {old_ms:9.1f} ms   numpy: {new_ms:7.1f} ms   {old_ms / new_ms:6.0f}x")
+
+    metrics = ["readiness_score", "sleep_hours", "energy_level", "stress_level"]
+    old, old_ms = timed(lambda: scalar_trends(d))
+    new, new_ms = timed(lambda: trends_batch({m: d[m] for m in metrics}, np.full(USERS, DAYS)))
+    for m in metrics:
+        assert [t[m]["trend"] for t in old] == list(new[m]["trend"]), f"{m} trend mismatch"
+    print(f"trends      scalar: {old_ms:9.1f} ms   numpy: {new_ms:7.1f} ms   {old_ms / new_ms:6.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -38,10 +38,10 @@ async def test():
     # Extra Debug for Todos
     print("\n=== DEBUGGING GET_TODOS_SERVICE ===")
     try:
-        from database import SessionLocal
+        from database import AsyncSessionLocal
         from api.todos import get_todos_service
-        db = SessionLocal()
-        todos = get_todos_service(db, email)
+        async with AsyncSessionLocal() as db:
+            todos, _ = await get_todos_service(db, email)
         print(f"Total Todos Returned: {len(todos)}")
         for t in todos:
             print(f" - {t.text} [Completed: {t.completed}] [Source: {'Google' if not t.id.isdigit() and '-' not in t.id else 'Local/UUID'}]") 
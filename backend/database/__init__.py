@@ -1,7 +1,16 @@
 # database module exports
 # sqlalchemy models + pinecone vector store
 
-from .connection import Base, engine, SessionLocal, get_db, test_connection
+from .connection import (
+    Base,
+    engine,
+    SessionLocal,
+    get_db,
+    async_engine,
+    AsyncSessionLocal,
+    get_async_db,
+    test_connection
+)
 from .models import (
     Note,
     User,
@@ -13,6 +22,7 @@ from .models import (
     Achievement,
     AgentSignal,
     WellnessForecast,
+    BackgroundJob,
 )
 from .pinecone_db import (
     get_pinecone_index,
@@ -30,6 +40,9 @@ __all__ = [
     "engine",
     "SessionLocal",
     "get_db",
+    "async_engine",
+    "AsyncSessionLocal",
+    "get_async_db",
     "test_connection",
     # models
     "User",
@@ -41,6 +54,7 @@ __all__ = [
     "Achievement",
     "AgentSignal",
     "WellnessForecast",
+    "BackgroundJob",
     # pinecone
     "get_pinecone_index",
     "store_memory",
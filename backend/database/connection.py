@@ -3,6 +3,8 @@
 
 import os
 from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
 
@@ -26,6 +28,51 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
 
+def to_async_url(url: str):
+    """
+    map a sync db url onto its async driver
+    postgresql -> asyncpg, sqlite -> aiosqlite
+
+    asyncpg doesn't understand libpq query args (neon urls ship with
+    sslmode/channel_binding) so those get stripped and returned as connect_args
+    """
+    parsed = make_url(url)
+    connect_args = {}
+
+    if parsed.get_backend_name() == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite"), connect_args
+
+    query = dict(parsed.query)
+    sslmode = query.pop("sslmode", None)
+    query.pop("channel_binding", None)
+    if sslmode and sslmode != "disable":
+        connect_args["ssl"] = "require"
+
+    return parsed.set(drivername="postgresql+asyncpg", query=query), connect_args
+
+
+# async engine - same neon db, but endpoints await it instead of parking a thread
+ASYNC_DATABASE_URL, _async_connect_args = to_async_url(DATABASE_URL)
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    echo=False,
+    pool_pre_ping=True,
+    pool_size=10,
+    max_overflow=20,
+    connect_args=_async_connect_args
+)
+
+# expire_on_commit off - objects get returned after commit and lazy loads
+# aren't allowed on an async session
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+
 def get_db():
     """fastapi dependency - yields a db session"""
     db = SessionLocal()
@@ -35,6 +82,12 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """fastapi dependency - yields an async db session"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def test_connection():
     """quick check if db is reachable"""
     try:
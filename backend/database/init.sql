@@ -108,6 +108,18 @@ CREATE TABLE IF NOT EXISTS health_logs (
     sleep_debt_hours    DECIMAL(5,2) DEFAULT 0,
     recovery_score      INTEGER CHECK (recovery_score >= 0 AND recovery_score <= 100),
     
+    -- Running Totals (user's logs up to and including this one)
+    log_seq             INTEGER,
+    sleep_debt_sum      DECIMAL(10,2),
+    sleep_hours_sum     DECIMAL(10,2),
+    sleep_hours_count   INTEGER,
+    energy_sum          INTEGER,
+    energy_count        INTEGER,
+    stress_sum          INTEGER,
+    stress_count        INTEGER,
+    readiness_sum       INTEGER,
+    readiness_count     INTEGER,
+    
     -- Metadata
     notes               TEXT,
     source              TEXT DEFAULT 'manual',
@@ -120,6 +132,19 @@ CREATE TABLE IF NOT EXISTS health_logs (
 CREATE INDEX IF NOT EXISTS idx_health_logs_user_date ON health_logs(user_id, date DESC);
 CREATE INDEX IF NOT EXISTS idx_health_logs_readiness ON health_logs(user_id, readiness_score);
 
+-- running totals for databases created before them (fill with: python -m jobs.backfill)
+ALTER TABLE health_logs ADD COLUMN IF NOT EXISTS log_seq INTEGER;
+ALTER TABLE health_logs ADD COLUMN IF NOT EXISTS sleep_debt_sum DECIMAL(10,2);
+ALTER TABLE health_logs ADD COLUMN IF NOT EXISTS sleep_hours_sum DECIMAL(10,2);
+ALTER TABLE health_logs ADD COLUMN IF NOT EXISTS sleep_hours_count INTEGER;
+ALTER TABLE health_logs ADD COLUMN IF NOT EXISTS energy_sum INTEGER;
+ALTER TABLE health_logs ADD COLUMN IF NOT EXISTS energy_count INTEGER;
+ALTER TABLE health_logs ADD COLUMN IF NOT EXISTS stress_sum INTEGER;
+ALTER TABLE health_logs ADD COLUMN IF NOT EXISTS stress_count INTEGER;
+ALTER TABLE health_logs ADD COLUMN IF NOT EXISTS readiness_sum INTEGER;
+ALTER TABLE health_logs ADD COLUMN IF NOT EXISTS readiness_count INTEGER;
+CREATE INDEX IF NOT EXISTS idx_health_logs_user_seq ON health_logs(user_id, log_seq);
+
 -- ============================================
 -- TABLE 4: mood_entries
 -- ============================================
@@ -326,7 +351,20 @@ CREATE TABLE IF NOT EXISTS notes (
 );
 
 CREATE INDEX IF NOT EXISTS idx_notes_user_email ON notes(user_email);
-CREATE INDEX IF NOT EXISTS idx_notes_created_at ON notes(user_email, created_at DESC);
+-- keyset pagination (created_at, id) newest first - covers the old (user_email, created_at) index
+CREATE INDEX IF NOT EXISTS idx_notes_user_created_id ON notes(user_email, created_at DESC, id DESC);
+DROP INDEX IF EXISTS idx_notes_created_at;
+
+-- todos / chat_threads aren't created by this file - index them if they exist
+DO $$
+BEGIN
+    IF to_regclass('todos') IS NOT NULL THEN
+        CREATE INDEX IF NOT EXISTS idx_todos_user_created_id ON todos(user_email, created_at DESC, id DESC);
+    END IF;
+    IF to_regclass('chat_threads') IS NOT NULL THEN
+        CREATE INDEX IF NOT EXISTS idx_chat_threads_user_created_id ON chat_threads(user_email, created_at DESC, id DESC);
+    END IF;
+END $$;
 
 -- Add auto-update trigger for updated_at
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -339,3 +377,35 @@ $$ language 'plpgsql';
 
 CREATE TRIGGER update_notes_updated_at BEFORE UPDATE ON notes
     FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
+
+-- ============================================
+-- TABLE: background_jobs (durable job queue)
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS background_jobs (
+    id                  TEXT PRIMARY KEY,
+    kind                TEXT NOT NULL,
+    payload             JSONB DEFAULT '{}',
+    
+    status              TEXT NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'done', 'failed')),
+    attempts            INTEGER NOT NULL DEFAULT 0,
+    max_attempts        INTEGER NOT NULL DEFAULT 5,
+    last_error          TEXT,
+    
+    run_at              TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    locked_until        TIMESTAMP WITH TIME ZONE,
+    locked_by           TEXT,
+    
+    dedupe_key          TEXT,
+    progress            JSONB,
+    
+    created_at          TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    finished_at         TIMESTAMP WITH TIME ZONE
+);
+
+CREATE INDEX IF NOT EXISTS idx_background_jobs_ready ON background_jobs(status, run_at);
+-- dedupe keys are unique among live jobs only - a finished job frees its key
+ALTER TABLE background_jobs DROP CONSTRAINT IF EXISTS background_jobs_dedupe_key_key;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_background_jobs_live_dedupe ON background_jobs(dedupe_key) WHERE status IN ('queued', 'running');
+-- purging finished jobs
+CREATE INDEX IF NOT EXISTS idx_background_jobs_finished ON background_jobs(finished_at);
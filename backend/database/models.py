@@ -7,8 +7,8 @@ from uuid import UUID, uuid4
 import uuid
 
 from sqlalchemy import (
-    Column, Integer, Boolean, Text, Date, Time,
-    TIMESTAMP, DECIMAL, ForeignKey, Index, UniqueConstraint
+    Column, Integer, Boolean, Text, Date, Time, JSON,
+    TIMESTAMP, DECIMAL, ForeignKey, Index, UniqueConstraint, text
 )
 from sqlalchemy.dialects.postgresql import UUID as PGUUID, JSONB
 from sqlalchemy.orm import relationship
@@ -125,6 +125,19 @@ class HealthLog(Base):
     sleep_debt_hours = Column(DECIMAL(5, 2), default=0)
     recovery_score = Column(Integer)  # 0-100
     
+    # running totals over the user's logs up to and including this one -
+    # any window's averages / sleep debt are the difference of two rows
+    log_seq = Column(Integer)  # 1 = user's first log
+    sleep_debt_sum = Column(DECIMAL(10, 2))
+    sleep_hours_sum = Column(DECIMAL(10, 2))
+    sleep_hours_count = Column(Integer)
+    energy_sum = Column(Integer)
+    energy_count = Column(Integer)
+    stress_sum = Column(Integer)
+    stress_count = Column(Integer)
+    readiness_sum = Column(Integer)
+    readiness_count = Column(Integer)
+    
     # user notes
     notes = Column(Text)
     source = Column(Text, default='manual')  # manual/fitbit/apple_health
@@ -134,6 +147,7 @@ class HealthLog(Base):
     __table_args__ = (
         UniqueConstraint('user_id', 'date', name='uq_health_logs_user_date'),
         Index('idx_health_logs_user_date', 'user_id', 'date'),
+        Index('idx_health_logs_user_seq', 'user_id', 'log_seq'),
     )
 
     user = relationship("User", back_populates="health_logs")
@@ -323,6 +337,11 @@ class Note(Base):
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
     updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now())
 
+    __table_args__ = (
+        # keyset pagination - newest first
+        Index('idx_notes_user_created_id', user_email, created_at.desc(), id.desc()),
+    )
+
 
 class Todo(Base):
     """User todos/tasks"""
@@ -337,6 +356,10 @@ class Todo(Base):
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
     updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now())
 
+    __table_args__ = (
+        Index('idx_todos_user_created_id', user_email, created_at.desc(), id.desc()),
+    )
+
 
 class ChatThread(Base):
     """Archived chat threads"""
@@ -349,6 +372,10 @@ class ChatThread(Base):
     
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
 
+    __table_args__ = (
+        Index('idx_chat_threads_user_created_id', user_email, created_at.desc(), id.desc()),
+    )
+
 
 
 class UserToken(Base):
@@ -370,3 +397,38 @@ class UserToken(Base):
     created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
     updated_at = Column(TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now())
 
+
+class BackgroundJob(Base):
+    """durable job queue - generic column types so it also runs on sqlite locally"""
+    __tablename__ = "background_jobs"
+
+    id = Column(Text, primary_key=True, default=lambda: str(uuid.uuid4()))
+    kind = Column(Text, nullable=False)  # handler name, e.g. send_briefing_email
+    payload = Column(JSON().with_variant(JSONB, "postgresql"), default={})
+
+    status = Column(Text, nullable=False, default='queued')  # queued/running/done/failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    last_error = Column(Text)
+
+    # scheduling + visibility timeout
+    run_at = Column(TIMESTAMP(timezone=True), nullable=False)
+    locked_until = Column(TIMESTAMP(timezone=True))
+    locked_by = Column(Text)
+
+    dedupe_key = Column(Text)  # optional - one live (queued/running) job per key
+    progress = Column(JSON().with_variant(JSONB, "postgresql"))  # checkpoints for long jobs
+
+    created_at = Column(TIMESTAMP(timezone=True), server_default=func.now())
+    finished_at = Column(TIMESTAMP(timezone=True))
+
+    __table_args__ = (
+        Index('idx_background_jobs_ready', 'status', 'run_at'),
+        # unique among live jobs only - a finished job frees its key
+        Index(
+            'uq_background_jobs_live_dedupe', 'dedupe_key', unique=True,
+            postgresql_where=text("status IN ('queued', 'running')"),
+            sqlite_where=text("status IN ('queued', 'running')")
+        ),
+        Index('idx_background_jobs_finished', 'finished_at'),
+    )
@@ -1,15 +1,20 @@
-from sqlalchemy.orm import Session
-from database import get_db, HealthLog, User
-from database.connection import SessionLocal
+from sqlalchemy import select
+from database import HealthLog
+from database.connection import AsyncSessionLocal
+from utils.identity_cache import get_identity
 
-def get_latest_health_log(user_email: str):
-    db = SessionLocal()
-    try:
-        user = db.query(User).filter(User.email == user_email).first()
-        if not user:
+async def get_latest_health_log(user_email: str):
+    async with AsyncSessionLocal() as db:
+        identity = await get_identity(db, user_email)
+        if not identity:
             return None
         
-        log = db.query(HealthLog).filter(HealthLog.user_id == user.id).order_by(HealthLog.date.desc()).first()
+        log = await db.scalar(
+            select(HealthLog)
+            .where(HealthLog.user_id == identity.user_id)
+            .order_by(HealthLog.date.desc())
+            .limit(1)
+        )
         if not log:
             return None
             
@@ -19,5 +24,3 @@ def get_latest_health_log(user_email: str):
             "energy_level": log.energy_level,
             "stress_level": log.stress_level
         }
-    finally:
-        db.close()
@@ -0,0 +1,23 @@
+# background job queue exports
+
+from .queue import (
+    register_job,
+    enqueue_job,
+    job_exists,
+    purge_finished_jobs,
+    start_job_workers,
+    stop_job_workers,
+    JobContext,
+    JOB_WORKERS,
+)
+
+__all__ = [
+    "register_job",
+    "enqueue_job",
+    "job_exists",
+    "purge_finished_jobs",
+    "start_job_workers",
+    "stop_job_workers",
+    "JobContext",
+    "JOB_WORKERS",
+]
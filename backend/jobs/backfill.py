@@ -0,0 +1,237 @@
+# bulk recompute of the derived health_logs columns
+# readiness, sleep debt, recovery, the running totals log_health keeps
+# (agents/wellness/running.py) and the streaks rows - for rows from before
+# they existed, and for when the formula or a profile's optimal sleep
+# changes. this walks users in chunks: one query for a chunk's logs +
+# profiles, numpy for the scores, batched UPDATEs for the rows that
+# actually changed, then a checkpoint so a retry picks up after the last
+# finished chunk.
+#
+# usage (from backend/):
+#   python -m jobs.backfill                 run it here, all users
+#   python -m jobs.backfill --user <uuid>   just one user (repeatable)
+#   python -m jobs.backfill --enqueue       hand it to the job workers
+
+import argparse
+import asyncio
+import os
+from typing import Awaitable, Callable, Optional
+from uuid import UUID
+
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy import select, update
+
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), ".env"))
+
+from database import AsyncSessionLocal, HealthLog, Streak, User, UserProfile
+from agents.wellness.algorithms.vectorized import (
+    debt_contributions,
+    recovery_from_debt,
+    rolling_sleep_debt,
+    streak_lengths
+)
+from agents.wellness.running import RUNNING_METRICS, SUM_COLUMNS
+from agents.wellness.streaks import STREAK_TYPES, streak_qualifies, streak_state
+
+# users per chunk - each chunk is one read, its updates and one commit
+BACKFILL_CHUNK_USERS = int(os.getenv("BACKFILL_CHUNK_USERS", "200"))
+# rows per UPDATE executemany
+BACKFILL_UPDATE_BATCH = int(os.getenv("BACKFILL_UPDATE_BATCH", "1000"))
+
+_LOG_COLUMNS = (
+    HealthLog.id,
+    HealthLog.user_id,
+    HealthLog.date,
+    HealthLog.sleep_hours,
+    HealthLog.sleep_quality,
+    HealthLog.energy_level,
+    HealthLog.stress_level,
+    HealthLog.activity_minutes,
+    HealthLog.workout_completed,
+    HealthLog.readiness_score,
+    HealthLog.sleep_debt_hours,
+    HealthLog.recovery_score,
+    HealthLog.log_seq,
+    *(getattr(HealthLog, col) for col in SUM_COLUMNS),
+)
+
+
+def score_logs(rows: list) -> dict:
+    """
+    derived columns for a chunk's rows, ordered by user then date
+    returns column name -> array aligned with rows
+    """
+    from api.health import calculate_readiness_batch, health_log_arrays
+
+    optimal = np.array([
+        float(row.optimal_sleep_hours) if row.optimal_sleep_hours else 8.0
+        for row in rows
+    ])
+    user_keys = [row.user_id for row in rows]
+    streaks = streak_lengths([row.date.toordinal() for row in rows], np.array(user_keys, dtype=object))
+    arrays = health_log_arrays(rows)
+    readiness = calculate_readiness_batch(arrays, optimal, streaks)["score"]
+    values = {**arrays, "readiness_score": readiness.astype(float)}
+
+    # running totals and sleep debt go over each user's own history - rows
+    # are grouped by user, so every user is one contiguous slice. untracked
+    # sleep counts as 0h, same as the agent's sleep debt tool
+    hours = np.nan_to_num(arrays["sleep_hours"])
+    contrib = debt_contributions(hours, optimal)
+    starts = [i for i in range(len(rows)) if i == 0 or user_keys[i] != user_keys[i - 1]]
+
+    columns = {col: np.zeros(len(rows)) for col in ["log_seq", "sleep_debt_hours", *SUM_COLUMNS]}
+    for start, end in zip(starts, starts[1:] + [len(rows)]):
+        columns["log_seq"][start:end] = np.arange(1, end - start + 1)
+        columns["sleep_debt_hours"][start:end] = rolling_sleep_debt(hours[start:end], optimal[start])
+        columns["sleep_debt_sum"][start:end] = contrib[start:end].cumsum()
+        for metric, (sum_col, count_col) in RUNNING_METRICS.items():
+            user_values = values[metric][start:end]
+            columns[sum_col][start:end] = np.nan_to_num(user_values).cumsum()
+            columns[count_col][start:end] = (~np.isnan(user_values)).cumsum()
+
+    columns["readiness_score"] = readiness
+    columns["recovery_score"] = recovery_from_debt(columns["sleep_debt_hours"])
+    return columns
+
+
+# stored as DECIMAL - compare / write them at 2dp, the rest are integers
+_FLOAT_COLUMNS = {"sleep_debt_hours", "sleep_debt_sum", "sleep_hours_sum"}
+
+
+def _changed_rows(rows: list, scores: dict) -> list[dict]:
+    # only write rows whose stored values differ - a rerun is mostly reads
+    def normalize(col, value):
+        if value is None:
+            return None
+        return round(float(value), 2) if col in _FLOAT_COLUMNS else int(value)
+
+    changed = []
+    for i, row in enumerate(rows):
+        values = {col: normalize(col, scores[col][i]) for col in scores}
+        stored = {col: normalize(col, getattr(row, col)) for col in scores}
+        if values != stored:
+            changed.append({"id": row.id, **values})
+    return changed
+
+
+async def _rebuild_streaks(db, user_ids: list, rows: list):
+    # streaks rows from the chunk's full history - rows are grouped by user
+    existing = {
+        (streak.user_id, streak.type): streak
+        for streak in (await db.scalars(select(Streak).where(Streak.user_id.in_(user_ids)))).all()
+    }
+    by_user = {}
+    for row in rows:
+        by_user.setdefault(row.user_id, []).append(row)
+
+    for user_id in user_ids:
+        logs = by_user.get(user_id, [])
+        optimal = float(logs[0].optimal_sleep_hours or 8.0) if logs else 8.0
+        for kind in STREAK_TYPES:
+            state = streak_state([log.date for log in logs if streak_qualifies(kind, log, optimal)])
+            streak = existing.get((user_id, kind))
+            if streak is None:
+                if not logs:
+                    continue
+                streak = Streak(user_id=user_id, type=kind)
+                db.add(streak)
+            for col, value in state.items():
+                setattr(streak, col, value)
+
+
+async def _backfill_chunk(user_ids: list) -> tuple[int, int]:
+    """recompute one chunk of users - returns (logs read, rows updated)"""
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            select(*_LOG_COLUMNS, UserProfile.optimal_sleep_hours)
+            .outerjoin(UserProfile, UserProfile.user_id == HealthLog.user_id)
+            .where(HealthLog.user_id.in_(user_ids))
+            .order_by(HealthLog.user_id, HealthLog.date)
+        )).all()
+        await _rebuild_streaks(db, user_ids, rows)
+        if not rows:
+            await db.commit()
+            return 0, 0
+
+        changed = _changed_rows(rows, score_logs(rows))
+        for i in range(0, len(changed), BACKFILL_UPDATE_BATCH):
+            # update-by-primary-key with a list of params -> one executemany
+            await db.execute(update(HealthLog), changed[i:i + BACKFILL_UPDATE_BATCH])
+        await db.commit()
+    return len(rows), len(changed)
+
+
+async def backfill_health_metrics(
+    user_ids: Optional[list] = None,
+    progress: Optional[dict] = None,
+    on_progress: Optional[Callable[[dict], Awaitable[None]]] = None,
+    chunk_users: int = BACKFILL_CHUNK_USERS
+) -> dict:
+    """
+    recompute readiness_score, sleep_debt_hours, recovery_score, the
+    running totals and streaks for every user (or just user_ids), in chunks of users
+
+    progress is a checkpoint from an earlier run to resume from;
+    on_progress is awaited with the new checkpoint after each chunk
+    """
+    progress = dict(progress or {})
+    progress.setdefault("users", 0)
+    progress.setdefault("logs", 0)
+    progress.setdefault("updated", 0)
+    wanted = [UUID(str(user_id)) for user_id in user_ids] if user_ids else None
+
+    while True:
+        # keyset on users.id - resumable, and no OFFSET scans on big tables
+        query = select(User.id).order_by(User.id).limit(chunk_users)
+        if progress.get("after"):
+            query = query.where(User.id > UUID(progress["after"]))
+        if wanted is not None:
+            query = query.where(User.id.in_(wanted))
+
+        async with AsyncSessionLocal() as db:
+            chunk = (await db.scalars(query)).all()
+        if not chunk:
+            break
+
+        logs, updated = await _backfill_chunk(chunk)
+        progress["after"] = str(chunk[-1])
+        progress["users"] += len(chunk)
+        progress["logs"] += logs
+        progress["updated"] += updated
+        if on_progress:
+            await on_progress(dict(progress))
+
+        if len(chunk) < chunk_users:
+            break
+
+    progress["done"] = True
+    return progress
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="recompute derived health_logs columns")
+    parser.add_argument("--user", action="append", help="only this user id (repeatable)")
+    parser.add_argument("--chunk", type=int, default=BACKFILL_CHUNK_USERS, help="users per chunk")
+    parser.add_argument("--enqueue", action="store_true", help="queue it for the job workers instead")
+    args = parser.parse_args()
+
+    if args.enqueue:
+        from .queue import enqueue_job, ensure_job_table
+
+        await ensure_job_table()
+        payload = {"user_ids": args.user} if args.user else {}
+        await enqueue_job("backfill_health_metrics", payload, max_attempts=10)
+        print("Backfill queued")
+        return
+
+    async def report(progress: dict):
+        print(f"Backfill: {progress['users']} users, {progress['logs']} logs, {progress['updated']} updated")
+
+    result = await backfill_health_metrics(args.user, on_progress=report, chunk_users=args.chunk)
+    print(f"Backfill done: {result['users']} users, {result['logs']} logs, {result['updated']} updated")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
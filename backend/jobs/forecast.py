@@ -0,0 +1,257 @@
+# nightly wellness forecasts
+# once a night, for every user: fit the forecast model
+# (agents/wellness/algorithms/forecast.py) on their recent logs and upsert
+# tomorrow's wellness_forecasts row, then fill in actual readiness on past
+# forecasts. users go in chunks - the next chunk's read overlaps the current
+# chunk's fit, and fits run in a process pool so a big night stays off the
+# event loop
+#
+# runs as the forecast_wellness job, which queues its own next run.
+# opt-in with FORECAST_ENABLED=true, like the briefing scheduler.
+# usage (from backend/):
+#   python -m jobs.forecast             run it now, here
+#   python -m jobs.forecast --enqueue   queue a run for the job workers
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+from uuid import UUID
+
+import numpy as np
+from dotenv import load_dotenv
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), ".env"))
+
+from database import AsyncSessionLocal, HealthLog, User, UserProfile, WellnessForecast
+from agents.wellness.algorithms.forecast import CURVE_HOURS, RISK_NAMES, WORKOUT_BY_ZONE, fit_forecasts
+from agents.wellness.forecast import score_pending_forecasts
+
+from .queue import enqueue_job
+
+FORECAST_ENABLED = os.getenv("FORECAST_ENABLED", "false").lower() == "true"
+# when the nightly run starts (utc hour) - forecasts are for each user's local tomorrow
+FORECAST_HOUR_UTC = int(os.getenv("FORECAST_HOUR_UTC", "18"))
+# days of history each user's model sees
+FORECAST_HISTORY_DAYS = int(os.getenv("FORECAST_HISTORY_DAYS", "60"))
+FORECAST_CHUNK_USERS = int(os.getenv("FORECAST_CHUNK_USERS", "500"))
+# worker processes for fitting - 0 fits on a thread in this process
+FORECAST_PROCESSES = int(os.getenv("FORECAST_PROCESSES", str(min(4, os.cpu_count() or 1))))
+
+DEFAULT_WAKE_TIME = time(7, 0)
+
+# history columns per user; right-aligned, the day before the forecast last
+_HISTORY = {
+    "readiness": HealthLog.readiness_score,
+    "sleep_hours": HealthLog.sleep_hours,
+    "energy": HealthLog.energy_level,
+    "morning": HealthLog.morning_energy,
+    "afternoon": HealthLog.afternoon_energy,
+    "evening": HealthLog.evening_energy,
+    "stress": HealthLog.stress_level,
+}
+
+
+async def _load_chunk(after: Optional[str], chunk_users: int) -> Optional[dict]:
+    """a chunk of users with their recent history laid out as model inputs"""
+    from agents.briefing.scheduler import user_zone
+
+    query = (
+        select(User.id, User.timezone, UserProfile.optimal_sleep_hours, UserProfile.optimal_wake_time)
+        .outerjoin(UserProfile, UserProfile.user_id == User.id)
+        .order_by(User.id)
+        .limit(chunk_users)
+    )
+    if after:
+        query = query.where(User.id > UUID(after))
+
+    async with AsyncSessionLocal() as db:
+        users = (await db.execute(query)).all()
+        if not users:
+            return None
+
+        now = datetime.now(timezone.utc)
+        targets = [now.astimezone(user_zone(u.timezone)).date() + timedelta(days=1) for u in users]
+        logs = (await db.execute(
+            select(HealthLog.user_id, HealthLog.date, HealthLog.sleep_debt_hours, *_HISTORY.values())
+            .where(
+                HealthLog.user_id.in_([u.id for u in users]),
+                HealthLog.date >= min(targets) - timedelta(days=FORECAST_HISTORY_DAYS),
+                HealthLog.date < max(targets)
+            )
+            .order_by(HealthLog.user_id, HealthLog.date)
+        )).all()
+
+    width = FORECAST_HISTORY_DAYS
+    index = {u.id: i for i, u in enumerate(users)}
+    data = {name: np.full((len(users), width), np.nan) for name in _HISTORY}
+    sleep_debt = np.zeros(len(users))
+    for log in logs:
+        i = index[log.user_id]
+        # column width-1 is the day before the forecast
+        col = width - (targets[i] - log.date).days
+        if not 0 <= col < width:
+            continue
+        for name, column in _HISTORY.items():
+            value = getattr(log, column.key)
+            if value is not None:
+                data[name][i, col] = float(value)
+        # rows come in date order - the last one seen is the latest debt
+        sleep_debt[i] = float(log.sleep_debt_hours or 0)
+
+    target_ordinals = np.array([t.toordinal() for t in targets])
+    day_ordinals = target_ordinals[:, None] - (width - np.arange(width))[None, :]
+    # date.fromordinal(1) was a monday
+    data["weekday"] = (day_ordinals - 1) % 7
+    data["target_weekday"] = (target_ordinals - 1) % 7
+    data["sleep_debt"] = sleep_debt
+    data["optimal_sleep"] = np.array([float(u.optimal_sleep_hours or 8.0) for u in users])
+
+    return {"users": users, "targets": targets, "data": data}
+
+
+def _bedtime(target: date, wake: Optional[time], sleep_need: float) -> time:
+    wake_at = datetime.combine(target, wake or DEFAULT_WAKE_TIME)
+    return (wake_at - timedelta(hours=sleep_need)).time().replace(second=0, microsecond=0)
+
+
+async def _write_chunk(chunk: dict, result: dict) -> int:
+    """upsert the chunk's forecasts - one statement"""
+    now = datetime.now(timezone.utc)
+    rows = []
+    for i, user in enumerate(chunk["users"]):
+        if not result["valid"][i]:
+            continue
+        curve = result["energy_curve"][i]
+        sleep_need = float(result["sleep_need"][i])
+        rows.append({
+            "user_id": user.id,
+            "forecast_date": chunk["targets"][i],
+            "generated_at": now,
+            "predicted_readiness": int(result["readiness"][i]),
+            "predicted_energy_curve": (
+                None if np.isnan(curve).any()
+                else {str(hour): float(value) for hour, value in zip(CURVE_HOURS, curve)}
+            ),
+            "predicted_sleep_need": sleep_need,
+            "recommended_bedtime": _bedtime(chunk["targets"][i], user.optimal_wake_time, sleep_need),
+            "recommended_workout": WORKOUT_BY_ZONE[str(result["zone"][i])],
+            "risk_factors": [name for name, flagged in zip(RISK_NAMES, result["risks"][i]) if flagged],
+        })
+    if not rows:
+        return 0
+
+    async with AsyncSessionLocal() as db:
+        insert = postgresql.insert if db.bind.dialect.name == "postgresql" else sqlite.insert
+        stmt = insert(WellnessForecast).values(rows)
+        # a rerun replaces the prediction, never the recorded actuals
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id", "forecast_date"],
+            set_={
+                col: getattr(stmt.excluded, col)
+                for col in rows[0]
+                if col not in ("user_id", "forecast_date")
+            }
+        )
+        await db.execute(stmt)
+        await db.commit()
+    return len(rows)
+
+
+async def run_forecasts(
+    progress: Optional[dict] = None,
+    on_progress: Optional[Callable[[dict], Awaitable[None]]] = None,
+    chunk_users: int = FORECAST_CHUNK_USERS,
+    processes: int = FORECAST_PROCESSES
+) -> dict:
+    """
+    forecast tomorrow for every user, then score past forecasts
+    progress / on_progress checkpoint per chunk like the backfill
+    """
+    progress = dict(progress or {})
+    progress.setdefault("users", 0)
+    progress.setdefault("forecasts", 0)
+
+    loop = asyncio.get_running_loop()
+    # spawn, not fork - this runs inside the server process, which has a
+    # live event loop and threads a forked child would inherit half of
+    pool = (
+        ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context("spawn"))
+        if processes > 0 else None
+    )
+    try:
+        chunk = await _load_chunk(progress.get("after"), chunk_users)
+        while chunk:
+            fit = loop.run_in_executor(pool, fit_forecasts, chunk["data"])
+            # read the next chunk while this one fits
+            next_chunk = None
+            if len(chunk["users"]) == chunk_users:
+                next_chunk = await _load_chunk(str(chunk["users"][-1].id), chunk_users)
+
+            written = await _write_chunk(chunk, await fit)
+            progress["after"] = str(chunk["users"][-1].id)
+            progress["users"] += len(chunk["users"])
+            progress["forecasts"] += written
+            if on_progress:
+                await on_progress(dict(progress))
+            chunk = next_chunk
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    async with AsyncSessionLocal() as db:
+        progress["scored"] = await score_pending_forecasts(db)
+        await db.commit()
+    progress["done"] = True
+    return progress
+
+
+def next_forecast_run(now: Optional[datetime] = None) -> datetime:
+    now = now or datetime.now(timezone.utc)
+    run_at = now.replace(hour=FORECAST_HOUR_UTC, minute=0, second=0, microsecond=0)
+    return run_at if run_at > now else run_at + timedelta(days=1)
+
+
+async def schedule_nightly_forecast(now: Optional[datetime] = None) -> bool:
+    """queue the next nightly run - safe to call from every process, one run per night"""
+    if not FORECAST_ENABLED:
+        return False
+    run_at = next_forecast_run(now)
+    return await enqueue_job(
+        "forecast_wellness",
+        {},
+        run_at=run_at,
+        max_attempts=3,
+        dedupe_key=f"forecast:{run_at.date()}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="generate next-day wellness forecasts")
+    parser.add_argument("--chunk", type=int, default=FORECAST_CHUNK_USERS, help="users per chunk")
+    parser.add_argument("--processes", type=int, default=FORECAST_PROCESSES, help="fit processes, 0 for none")
+    parser.add_argument("--enqueue", action="store_true", help="queue it for the job workers instead")
+    args = parser.parse_args()
+
+    if args.enqueue:
+        from .queue import ensure_job_table
+
+        await ensure_job_table()
+        await enqueue_job("forecast_wellness", {}, max_attempts=3)
+        print("Forecast run queued")
+        return
+
+    async def report(progress: dict):
+        print(f"Forecasts: {progress['users']} users, {progress['forecasts']} written")
+
+    result = await run_forecasts(on_progress=report, chunk_users=args.chunk, processes=args.processes)
+    print(f"Forecasts done: {result['forecasts']} written, {result['scored']} past forecasts scored")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
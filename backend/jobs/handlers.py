@@ -0,0 +1,76 @@
+# job handlers - imported by the workers so each registers itself
+
+import asyncio
+from uuid import UUID
+
+from database import AsyncSessionLocal
+
+from .backfill import backfill_health_metrics
+from .forecast import run_forecasts, schedule_nightly_forecast
+from .queue import register_job, JobContext
+
+
+@register_job("send_briefing_email", timeout=120)
+async def send_briefing_email_job(payload: dict, job: JobContext):
+    """payload: {email}"""
+    from api.briefing import send_briefing_email_internal
+    from state.user_tokens import get_user_tokens
+
+    email = payload["email"]
+    if not get_user_tokens(email):
+        # nothing to retry - user never connected google
+        print(f"No tokens for {email}, dropping briefing job")
+        return
+
+    if not await send_briefing_email_internal(email):
+        raise RuntimeError(f"briefing email to {email} failed")
+
+
+@register_job("ingest_memory")
+async def ingest_memory_job(payload: dict, job: JobContext):
+    """payload: {user_id, memory_id, text, metadata}"""
+    from database.pinecone_db import store_memory
+
+    ok = await asyncio.to_thread(
+        store_memory,
+        payload["user_id"],
+        payload["memory_id"],
+        payload["text"],
+        payload.get("metadata", {})
+    )
+    if not ok:
+        raise RuntimeError("pinecone store failed")
+
+
+@register_job("recompute_health_metrics", timeout=None)
+async def recompute_health_metrics_job(payload: dict, job: JobContext):
+    """payload: {user_id} - re-score every health log for one user, then their forecasts"""
+    from agents.wellness.forecast import score_pending_forecasts
+
+    # a long history can outlast the lease - checkpoint like the full backfill
+    await backfill_health_metrics(
+        [payload["user_id"]],
+        progress=job.progress,
+        on_progress=job.save_progress
+    )
+    async with AsyncSessionLocal() as db:
+        await score_pending_forecasts(db, UUID(payload["user_id"]))
+        await db.commit()
+
+
+@register_job("backfill_health_metrics", timeout=None)
+async def backfill_health_metrics_job(payload: dict, job: JobContext):
+    """payload: {user_ids?} - re-score everyone's logs, resuming from the last checkpoint"""
+    await backfill_health_metrics(
+        payload.get("user_ids"),
+        progress=job.progress,
+        on_progress=job.save_progress
+    )
+
+
+@register_job("forecast_wellness", timeout=None)
+async def forecast_wellness_job(payload: dict, job: JobContext):
+    """payload: {} - nightly forecasts for every user"""
+    # queue tomorrow night's first, so a failed run doesn't end the cycle
+    await schedule_nightly_forecast()
+    await run_forecasts(progress=job.progress, on_progress=job.save_progress)
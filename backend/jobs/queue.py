@@ -0,0 +1,310 @@
+# durable background job queue
+# jobs live in the background_jobs table (postgres, or sqlite via JOB_QUEUE_URL
+# for local runs) so they survive restarts, get retried with backoff and
+# are picked back up if a worker dies mid-job (visibility timeout)
+
+import asyncio
+import os
+import random
+import socket
+import traceback
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import delete, select, update, or_, and_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from database.connection import async_engine, to_async_url
+from database.models import BackgroundJob
+
+# unset -> same postgres as everything else
+JOB_QUEUE_URL = os.getenv("JOB_QUEUE_URL")
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+# a claimed job is invisible to other workers for this long (seconds);
+# if the worker doesn't finish or heartbeat in time, someone else retries it
+JOB_VISIBILITY_TIMEOUT = float(os.getenv("JOB_VISIBILITY_TIMEOUT", "300"))
+# default handler timeout - well inside the lease, so a job that runs long
+# is cancelled and retried before another worker can claim it mid-write
+JOB_TIMEOUT = float(os.getenv("JOB_TIMEOUT", str(JOB_VISIBILITY_TIMEOUT / 2)))
+# retry delay = base * 2^(attempt-1), capped, plus jitter
+JOB_BACKOFF_BASE = float(os.getenv("JOB_BACKOFF_BASE", "5"))
+JOB_BACKOFF_MAX = float(os.getenv("JOB_BACKOFF_MAX", "900"))
+# done / failed jobs are kept this long (days) for inspection, then purged
+JOB_RETENTION_DAYS = float(os.getenv("JOB_RETENTION_DAYS", "7"))
+# how often each process looks for jobs to purge (seconds)
+JOB_PURGE_INTERVAL = float(os.getenv("JOB_PURGE_INTERVAL", "3600"))
+
+# a dedupe key is only held by jobs in these states
+LIVE_STATUSES = ("queued", "running")
+
+if JOB_QUEUE_URL:
+    _queue_url, _queue_connect_args = to_async_url(JOB_QUEUE_URL)
+    queue_engine = create_async_engine(_queue_url, connect_args=_queue_connect_args)
+else:
+    queue_engine = async_engine
+
+QueueSession = async_sessionmaker(queue_engine, class_=AsyncSession, expire_on_commit=False)
+
+# kind -> (async handler(payload, job), timeout seconds or None)
+_handlers: dict[str, tuple[Callable[[dict, "JobContext"], Awaitable[None]], Optional[float]]] = {}
+
+_worker_tasks: list[asyncio.Task] = []
+_stopping = asyncio.Event()
+_last_purge = 0.0
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def register_job(kind: str, timeout: Optional[float] = JOB_TIMEOUT):
+    """
+    decorator - register an async handler for a job kind
+    long jobs pass timeout=None and keep their lease alive with save_progress
+    """
+    def decorator(fn):
+        _handlers[kind] = (fn, timeout)
+        return fn
+    return decorator
+
+
+class JobContext:
+    """what a handler sees about the job it's running"""
+
+    def __init__(self, job: BackgroundJob, worker_id: str):
+        self.id = job.id
+        self.kind = job.kind
+        self.attempts = job.attempts
+        self.progress = job.progress or {}
+        self._worker_id = worker_id
+
+    async def save_progress(self, progress: dict):
+        """checkpoint a long job - also extends its visibility timeout"""
+        self.progress = progress
+        async with QueueSession() as db:
+            await db.execute(
+                update(BackgroundJob)
+                .where(BackgroundJob.id == self.id, BackgroundJob.locked_by == self._worker_id)
+                .values(
+                    progress=progress,
+                    locked_until=_now() + timedelta(seconds=JOB_VISIBILITY_TIMEOUT)
+                )
+            )
+            await db.commit()
+
+
+async def ensure_job_table():
+    """create background_jobs if missing (sqlite runs don't go through init.sql)"""
+    async with queue_engine.begin() as conn:
+        await conn.run_sync(BackgroundJob.__table__.create, checkfirst=True)
+
+
+async def enqueue_job(
+    kind: str,
+    payload: dict,
+    run_at: Optional[datetime] = None,
+    max_attempts: int = 5,
+    dedupe_key: Optional[str] = None
+) -> bool:
+    """
+    add a job to the queue
+    with a dedupe_key, enqueueing while a job with that key is still queued
+    or running is a no-op - returns False in that case. once it's done or
+    failed the key is free again
+    """
+    values = {
+        "kind": kind,
+        "payload": payload,
+        "status": "queued",
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "run_at": run_at or _now(),
+        "dedupe_key": dedupe_key,
+    }
+
+    dialect = queue_engine.dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    stmt = insert(BackgroundJob).values(id=str(uuid.uuid4()), **values)
+    if dedupe_key:
+        stmt = stmt.on_conflict_do_nothing(
+            index_elements=["dedupe_key"],
+            index_where=BackgroundJob.status.in_(LIVE_STATUSES)
+        )
+
+    async with QueueSession() as db:
+        result = await db.execute(stmt)
+        await db.commit()
+    return result.rowcount != 0
+
+
+async def job_exists(dedupe_key: str) -> bool:
+    """whether any job with this key is on record - live, or finished and not purged yet"""
+    async with QueueSession() as db:
+        found = await db.scalar(
+            select(BackgroundJob.id).where(BackgroundJob.dedupe_key == dedupe_key).limit(1)
+        )
+    return found is not None
+
+
+async def purge_finished_jobs(older_than_days: float = JOB_RETENTION_DAYS) -> int:
+    """delete done / failed jobs that finished more than older_than_days ago"""
+    cutoff = _now() - timedelta(days=older_than_days)
+    async with QueueSession() as db:
+        result = await db.execute(
+            delete(BackgroundJob)
+            .where(BackgroundJob.status.in_(("done", "failed")), BackgroundJob.finished_at < cutoff)
+        )
+        await db.commit()
+    return result.rowcount
+
+
+async def _maybe_purge():
+    """purge at most once per JOB_PURGE_INTERVAL per process"""
+    global _last_purge
+    now = asyncio.get_running_loop().time()
+    if _last_purge and now - _last_purge < JOB_PURGE_INTERVAL:
+        return
+    _last_purge = now
+    purged = await purge_finished_jobs()
+    if purged:
+        print(f"Purged {purged} finished jobs")
+
+
+async def claim_job(worker_id: str) -> Optional[BackgroundJob]:
+    """
+    atomically take the next runnable job
+    runnable = queued and due, or running with an expired lease
+    """
+    now = _now()
+    candidate = (
+        select(BackgroundJob.id)
+        .where(or_(
+            and_(BackgroundJob.status == "queued", BackgroundJob.run_at <= now),
+            and_(BackgroundJob.status == "running", BackgroundJob.locked_until < now),
+        ))
+        .order_by(BackgroundJob.run_at)
+        .limit(1)
+        # postgres: concurrent workers skip each other's rows
+        # sqlite ignores this - its write lock already serialises claims
+        .with_for_update(skip_locked=True)
+        .scalar_subquery()
+    )
+
+    async with QueueSession() as db:
+        job = (await db.scalars(
+            update(BackgroundJob)
+            .where(BackgroundJob.id == candidate)
+            .values(
+                status="running",
+                attempts=BackgroundJob.attempts + 1,
+                locked_until=now + timedelta(seconds=JOB_VISIBILITY_TIMEOUT),
+                locked_by=worker_id,
+            )
+            .returning(BackgroundJob)
+            .execution_options(synchronize_session=False)
+        )).first()
+        await db.commit()
+    return job
+
+
+async def _finish(job_id: str, worker_id: str, **values):
+    async with QueueSession() as db:
+        await db.execute(
+            update(BackgroundJob)
+            .where(BackgroundJob.id == job_id, BackgroundJob.locked_by == worker_id)
+            .values(locked_until=None, locked_by=None, **values)
+        )
+        await db.commit()
+
+
+def _backoff_seconds(attempts: int) -> float:
+    delay = min(JOB_BACKOFF_MAX, JOB_BACKOFF_BASE * (2 ** max(0, attempts - 1)))
+    return delay * random.uniform(0.8, 1.2)
+
+
+async def run_one_job(worker_id: str) -> bool:
+    """claim and run a single job - returns False if the queue was empty"""
+    job = await claim_job(worker_id)
+    if job is None:
+        return False
+
+    # lease expired too many times (worker crashes / hangs)
+    if job.attempts > job.max_attempts:
+        await _finish(job.id, worker_id, status="failed", finished_at=_now(),
+                      last_error="exceeded max attempts")
+        return True
+
+    if job.kind not in _handlers:
+        await _finish(job.id, worker_id, status="failed", finished_at=_now(),
+                      last_error=f"no handler registered for {job.kind}")
+        return True
+
+    handler, timeout = _handlers[job.kind]
+    try:
+        await asyncio.wait_for(handler(job.payload or {}, JobContext(job, worker_id)), timeout=timeout)
+    except asyncio.CancelledError:
+        # shutting down - leave the lease to expire so another worker retries
+        raise
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        print(f"Job {job.kind} {job.id} failed (attempt {job.attempts}): {error}")
+        if job.attempts >= job.max_attempts:
+            await _finish(job.id, worker_id, status="failed", finished_at=_now(),
+                          last_error=traceback.format_exc()[-2000:])
+        else:
+            await _finish(job.id, worker_id, status="queued", last_error=error,
+                          run_at=_now() + timedelta(seconds=_backoff_seconds(job.attempts)))
+        return True
+
+    await _finish(job.id, worker_id, status="done", finished_at=_now(), last_error=None)
+    return True
+
+
+async def _worker_loop(worker_id: str):
+    while not _stopping.is_set():
+        try:
+            ran = await run_one_job(worker_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Job worker {worker_id} error: {e}")
+            ran = False
+        if not ran:
+            # idle - a good time for housekeeping
+            try:
+                await _maybe_purge()
+            except Exception as e:
+                print(f"Job purge error: {e}")
+            try:
+                await asyncio.wait_for(_stopping.wait(), timeout=JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+
+async def start_job_workers(count: int = JOB_WORKERS) -> list[asyncio.Task]:
+    """start worker tasks on the running loop"""
+    # handlers register themselves on import
+    from . import handlers  # noqa: F401
+
+    await ensure_job_table()
+    _stopping.clear()
+    host = socket.gethostname()
+    for i in range(count):
+        worker_id = f"{host}:{os.getpid()}:{i}"
+        _worker_tasks.append(asyncio.create_task(_worker_loop(worker_id)))
+    return _worker_tasks
+
+
+async def stop_job_workers(grace: float = 10.0):
+    """let in-flight jobs finish for up to `grace` seconds, then cancel"""
+    _stopping.set()
+    if _worker_tasks:
+        _, pending = await asyncio.wait(_worker_tasks, timeout=grace)
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+    _worker_tasks.clear()
@@ -0,0 +1,30 @@
+# standalone job worker - runs the queue outside the api process
+# usage (from backend/): python -m jobs.worker
+
+import asyncio
+import os
+import signal
+
+from dotenv import load_dotenv
+
+load_dotenv(os.path.join(os.path.dirname(os.path.dirname(__file__)), ".env"))
+
+from .forecast import schedule_nightly_forecast
+from .queue import start_job_workers, stop_job_workers, JOB_WORKERS
+
+
+async def main():
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    await start_job_workers(max(1, JOB_WORKERS))
+    await schedule_nightly_forecast()
+    print(f"Job workers running ({max(1, JOB_WORKERS)})")
+    await stop.wait()
+    await stop_job_workers()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -13,6 +13,8 @@ print(f"OPIK_API_KEY present: {'OPIK_API_KEY' in os.environ}")
 # required for local oauth testing
 os.environ["OAUTHLIB_INSECURE_TRANSPORT"] = "1"
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
@@ -23,7 +25,15 @@ from opik.integrations.langchain import OpikTracer
 # from supervisor.supervisor_agent import SupervisorAgent # Removed
 
 from state.user_tokens import get_user_tokens
-from tools.google_auth import router as google_auth_router, get_gmail_service, fetch_recent_emails
+from tools.google_auth import router as google_auth_router
+from tools.google_client import AsyncGoogleClient, close_http_client
+from agents.briefing.scheduler import start_briefing_scheduler, stop_briefing_scheduler
+from supervisor.checkpointer import open_checkpointer, close_checkpointer
+from jobs import start_job_workers, stop_job_workers, JOB_WORKERS
+from jobs.forecast import schedule_nightly_forecast
+from agents.llm import close_llm_clients
+from utils.pagination import NEXT_CURSOR_HEADER
+from utils.turn_cache import turn_scope
 
 from api.notes import router as notes_router
 from api.todos import router as todos_router
@@ -42,10 +52,32 @@ if not groq_api_key:
 
 client = Groq(api_key=groq_api_key)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """startup / shutdown hooks"""
+    await open_checkpointer()
+    if JOB_WORKERS > 0:
+        await start_job_workers()
+        try:
+            await schedule_nightly_forecast()
+        except Exception as e:
+            print(f"Forecast scheduling failed: {e}")
+    start_briefing_scheduler()
+    yield
+    await stop_briefing_scheduler()
+    await stop_job_workers()
+    # drop the pooled google connections
+    await close_http_client()
+    await close_llm_clients()
+    await close_checkpointer()
+
+
 app = FastAPI(
     title="Equinox API",
     description="multi-agent wellness and productivity backend",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # cors setup - allow frontend origins
@@ -61,6 +93,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # list endpoints put the next page's cursor here
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 
@@ -86,6 +120,9 @@ app.include_router(emails_router)
 from api.briefing import router as briefing_router
 app.include_router(briefing_router)
 
+from api.export import router as export_router
+app.include_router(export_router)
+
 
 class ChatRequest(BaseModel):
     message: str
@@ -99,12 +136,12 @@ def ping():
 
 
 @app.post("/supervisor")
-def supervisor_endpoint(req: ChatRequest):
+async def supervisor_endpoint(req: ChatRequest):
     """trigger supervisor agent to get work summary or handle request"""
     # Note: Using ChatRequest which has 'message' field
     user_id = req.email if req.email else "demo_user"
     
-    from supervisor.supervisor_agent import get_supervisor_graph
+    from supervisor.supervisor_agent import get_supervisor_graph, supervisor_config
     from langchain_core.messages import HumanMessage
     
     import uuid
@@ -112,6 +149,7 @@ def supervisor_endpoint(req: ChatRequest):
     
     supervisor = get_supervisor_graph()
     
+    # only the new message - earlier turns come back from the thread's checkpoint
     initial_state = {
         "messages": [HumanMessage(content=req.message)],
         "user_id": user_id,
@@ -119,11 +157,10 @@ def supervisor_endpoint(req: ChatRequest):
     }
     
     try:
-        # Pass thread_id in metadata for Opik
-        result = supervisor.invoke(initial_state, config={
-            "callbacks": [OpikTracer(project_name="equinox")],
-            "metadata": {"thread_id": thread_id}
-        })
+        async with turn_scope():
+            result = await supervisor.ainvoke(initial_state, config=supervisor_config(
+                user_id, thread_id, callbacks=[OpikTracer(project_name="equinox")]
+            ))
         last_message = result["messages"][-1]
         return {"reply": last_message.content, "thread_id": thread_id}
     except Exception as e:
@@ -132,6 +169,30 @@ def supervisor_endpoint(req: ChatRequest):
         return {"reply": f"Error interacting with supervisor: {str(e)}"}
 
 
+@app.post("/supervisor/stream")
+async def supervisor_stream_endpoint(req: ChatRequest):
+    """supervisor as server-sent events - route, tokens and tool progress as they happen"""
+    user_id = req.email if req.email else "demo_user"
+
+    from supervisor.supervisor_agent import get_supervisor_graph, supervisor_config
+    from langchain_core.messages import HumanMessage
+    from utils.sse import stream_graph_events, sse_response
+
+    import uuid
+    thread_id = req.thread_id if req.thread_id else str(uuid.uuid4())
+
+    initial_state = {
+        "messages": [HumanMessage(content=req.message)],
+        "user_id": user_id,
+        "next": None
+    }
+
+    events = stream_graph_events(get_supervisor_graph(), initial_state, config=supervisor_config(
+        user_id, thread_id, callbacks=[OpikTracer(project_name="equinox")]
+    ))
+    return sse_response(events, thread_id=thread_id)
+
+
 @app.post("/chat")
 async def chat(req: ChatRequest):
     """general chat endpoint with email integration"""
@@ -140,13 +201,11 @@ async def chat(req: ChatRequest):
         tokens = get_user_tokens(user_id)
         
         if tokens:
-            service = get_gmail_service(tokens)
-            emails = fetch_recent_emails(service)
+            google = AsyncGoogleClient(tokens)
+            emails = await google.fetch_recent_emails()
             if emails:
                 email_id = emails[0]["id"]
-                email = service.users().messages().get(
-                    userId="me", id=email_id, format="metadata"
-                ).execute()
+                email = await google.get_email_metadata(email_id)
                 
                 subject = None
                 for header in email.get("payload", {}).get("headers", []):
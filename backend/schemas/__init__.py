@@ -3,7 +3,15 @@
 from .health import (
     HealthLogCreate,
     HealthLogResponse,
+    HealthLogImportRow,
+    HealthImportResponse,
     ReadinessResponse,
+    ReadinessDay,
+    ReadinessRangeResponse,
+    ReadinessBatchRequest,
+    ReadinessBatchResponse,
+    UserReadinessSummary,
+    ForecastResponse,
     TrendItem,
     TrendResponse
 )
@@ -24,7 +32,15 @@ __all__ = [
     # health
     "HealthLogCreate",
     "HealthLogResponse",
+    "HealthLogImportRow",
+    "HealthImportResponse",
     "ReadinessResponse",
+    "ReadinessDay",
+    "ReadinessRangeResponse",
+    "ReadinessBatchRequest",
+    "ReadinessBatchResponse",
+    "UserReadinessSummary",
+    "ForecastResponse",
     "TrendItem",
     "TrendResponse",
     # profile
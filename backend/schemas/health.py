@@ -4,7 +4,8 @@ from datetime import date, time
 from decimal import Decimal
 from typing import Optional
 from uuid import UUID
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, create_model
+from pydantic.fields import FieldInfo
 
 
 class HealthLogCreate(BaseModel):
@@ -47,6 +48,41 @@ class HealthLogCreate(BaseModel):
     notes: Optional[str] = None
 
 
+def _all_optional(model: type[BaseModel], exclude: set) -> dict:
+    """a model's fields as create_model definitions - same bounds, but optional and None by default"""
+    fields = {}
+    for name, info in model.model_fields.items():
+        if name not in exclude:
+            fields[name] = (Optional[info.annotation], FieldInfo.merge_field_infos(info, default=None))
+    return fields
+
+
+# one day from a bulk import - any subset of the log fields. a file that
+# leaves a field out must leave it alone, so nothing defaults the way
+# HealthLogCreate's activity / nutrition fields do
+HealthLogImportRow = create_model(
+    "HealthLogImportRow",
+    __doc__="one day from a bulk import - any subset of the log fields",
+    date=(date, ...),
+    **_all_optional(HealthLogCreate, exclude={"user_email", "date"}),
+    # in wearable exports, not on the manual form
+    sleep_interruptions=(Optional[int], Field(None, ge=0)),
+    workout_intensity=(Optional[str], None),
+)
+
+
+class HealthImportResponse(BaseModel):
+    """what a bulk import wrote"""
+    
+    format: str
+    records: int  # rows / samples read from the file
+    days: int  # health logs inserted or updated
+    skipped: int
+    first_date: Optional[date]
+    last_date: Optional[date]
+    errors: list[str]  # the first few skipped records, why
+
+
 class HealthLogResponse(BaseModel):
     """output when retrieving health data"""
     
@@ -139,3 +175,76 @@ class TrendResponse(BaseModel):
     sleep_trend: str
     energy_trend: str
     stress_trend: str
+
+
+class ReadinessDay(BaseModel):
+    """readiness for one logged day"""
+    
+    date: date
+    score: int
+    zone: str
+    sleep_factor: int
+    energy_factor: int
+    stress_factor: int
+    activity_factor: int
+    consistency_factor: int
+
+
+class ReadinessRangeResponse(BaseModel):
+    """readiness for every logged day in a date range"""
+    
+    start: date
+    end: date
+    days: list[ReadinessDay]
+    avg_score: Optional[float]
+
+
+class ReadinessBatchRequest(BaseModel):
+    """cohort query - many users over one date range"""
+    
+    user_emails: list[str] = Field(..., min_length=1)
+    start: date
+    end: date
+
+
+class UserReadinessSummary(BaseModel):
+    """one user's numbers for the range"""
+    
+    user_email: str
+    days_logged: int
+    avg_readiness: Optional[float]
+    latest_score: Optional[int]
+    latest_zone: Optional[str]
+    sleep_debt_hours: Optional[float]
+    
+    # up/down/stable per metric
+    readiness_trend: str
+    sleep_trend: str
+    energy_trend: str
+    stress_trend: str
+
+
+class ReadinessBatchResponse(BaseModel):
+    start: date
+    end: date
+    users: list[UserReadinessSummary]
+
+
+class ForecastResponse(BaseModel):
+    """stored next-day forecast"""
+    
+    forecast_date: date
+    predicted_readiness: Optional[int]
+    predicted_zone: Optional[str]
+    predicted_energy_curve: Optional[dict]  # hour -> energy 1-10
+    predicted_sleep_need: Optional[float]
+    recommended_bedtime: Optional[time]
+    recommended_workout: Optional[dict]
+    risk_factors: Optional[list[str]]
+    
+    # filled in once the day is logged
+    actual_readiness: Optional[int]
+    accuracy_score: Optional[float]
+    
+    # average over recent scored forecasts
+    recent_accuracy: Optional[float]
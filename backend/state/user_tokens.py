@@ -11,6 +11,11 @@ user_tokens_store = {}
 def save_user_tokens(user_email: str, tokens: dict):
     """Save tokens to both memory cache and database"""
     user_email = user_email.lower()
+    # Drop pooled google services built from the old grant
+    previous = user_tokens_store.get(user_email)
+    if previous:
+        from tools.google_auth import invalidate_google_services
+        invalidate_google_services(previous)
     # Update memory cache
     user_tokens_store[user_email] = tokens
     
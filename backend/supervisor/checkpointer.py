@@ -0,0 +1,83 @@
+# langgraph checkpointer for the supervisor
+# conversation state is saved per thread_id, so a client only sends the new
+# message and the graph picks the thread back up from its last checkpoint.
+# postgres in prod, sqlite file for local runs
+
+import os
+
+from sqlalchemy.engine import make_url
+
+from database.connection import DATABASE_URL
+
+# unset -> same db as everything else
+CHECKPOINT_URL = os.getenv("CHECKPOINT_URL", DATABASE_URL)
+CHECKPOINT_POOL_SIZE = int(os.getenv("CHECKPOINT_POOL_SIZE", "10"))
+
+_checkpointer = None
+_closer = None
+
+
+def checkpoint_thread_id(user_id: str, thread_id: str) -> str:
+    """scope a client thread id to its user - nobody resumes someone else's thread"""
+    return f"{user_id}:{thread_id}"
+
+
+async def _open_postgres(url):
+    from psycopg.rows import dict_row
+    from psycopg_pool import AsyncConnectionPool
+    from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+
+    # psycopg wants a plain libpq url - drop any sqlalchemy driver suffix
+    conninfo = url.set(drivername="postgresql").render_as_string(hide_password=False)
+    pool = AsyncConnectionPool(
+        conninfo,
+        max_size=CHECKPOINT_POOL_SIZE,
+        # prepare_threshold=0: neon's pgbouncer doesn't keep prepared statements
+        kwargs={"autocommit": True, "prepare_threshold": 0, "row_factory": dict_row},
+        open=False
+    )
+    await pool.open()
+    saver = AsyncPostgresSaver(pool)
+    await saver.setup()
+    return saver, pool.close
+
+
+async def _open_sqlite(url):
+    import aiosqlite
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+
+    conn = await aiosqlite.connect(url.database or ":memory:")
+    saver = AsyncSqliteSaver(conn)
+    await saver.setup()
+    return saver, conn.close
+
+
+async def open_checkpointer():
+    """connect the checkpointer - call once at startup"""
+    global _checkpointer, _closer
+    if _checkpointer is not None:
+        return _checkpointer
+
+    url = make_url(CHECKPOINT_URL)
+    try:
+        if url.get_backend_name() == "sqlite":
+            _checkpointer, _closer = await _open_sqlite(url)
+        else:
+            _checkpointer, _closer = await _open_postgres(url)
+    except Exception as e:
+        # threads just won't resume - every call starts fresh like before
+        print(f"Checkpointer unavailable, supervisor threads won't persist: {e}")
+        _checkpointer, _closer = None, None
+    return _checkpointer
+
+
+async def close_checkpointer():
+    global _checkpointer, _closer
+    if _closer is not None:
+        await _closer()
+    _checkpointer, _closer = None, None
+
+
+def get_checkpointer():
+    """the open checkpointer, or None if it isn't connected"""
+    return _checkpointer
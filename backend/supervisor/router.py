@@ -0,0 +1,223 @@
+# local intent router - fast path in front of the supervisor llm
+# keyword rules + a tiny naive bayes over past routed messages. when it's
+# confident the supervisor skips its routing llm call; when it isn't (or the
+# message looks like small talk the supervisor should answer itself) it
+# returns None and the llm decides as before
+
+import asyncio
+import json
+import logging
+import math
+import os
+import re
+from collections import Counter
+from typing import Optional
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+# below this posterior we hand the message to the llm
+ROUTER_CONFIDENCE_THRESHOLD = float(os.getenv("ROUTER_CONFIDENCE_THRESHOLD", "0.85"))
+# log-score bonus per keyword hit for its label
+ROUTER_KEYWORD_WEIGHT = float(os.getenv("ROUTER_KEYWORD_WEIGHT", "2.0"))
+# optional jsonl file of {"text", "label"} - llm routing decisions are
+# appended here so the classifier keeps learning across restarts
+ROUTER_EXAMPLES_PATH = os.getenv("ROUTER_EXAMPLES_PATH")
+# don't let one chatty user's history swamp the seed set
+ROUTER_MAX_EXAMPLES = int(os.getenv("ROUTER_MAX_EXAMPLES", "5000"))
+
+LABELS = ("wellness", "productivity", "end")
+# labels we can route on without the llm - "end" needs the llm's own reply
+ROUTABLE = {"wellness", "productivity"}
+
+KEYWORDS = {
+    "wellness": {
+        "sleep", "slept", "sleeping", "tired", "energy", "readiness", "ready",
+        "workout", "workouts", "exercise", "exercises", "gym", "run", "running",
+        "cardio", "stretch", "yoga", "health", "healthy", "hrv", "heart",
+        "steps", "stress", "stressed", "mood", "rest", "recovery", "recover",
+        "water", "hydration", "calories", "weight", "fitness", "sore", "nap",
+        "forecast", "bedtime",
+    },
+    "productivity": {
+        "email", "emails", "mail", "inbox", "gmail", "unread", "reply",
+        "task", "tasks", "todo", "todos", "note", "notes", "meeting",
+        "meetings", "calendar", "schedule", "deadline", "deadlines", "remind",
+        "reminder", "project", "work", "plate", "agenda", "priorities",
+    },
+}
+
+# seed examples - enough for the classifier to be useful on day one
+SEED_EXAMPLES = [
+    ("how did i sleep last night", "wellness"),
+    ("what is my readiness score today", "wellness"),
+    ("should i work out today", "wellness"),
+    ("suggest a workout for upper body", "wellness"),
+    ("i feel exhausted what should i do", "wellness"),
+    ("how much sleep debt do i have", "wellness"),
+    ("show my wellness trends this week", "wellness"),
+    ("am i recovered enough for a hard run", "wellness"),
+    ("give me a light stretching routine", "wellness"),
+    ("my energy is low today", "wellness"),
+    ("summarize my emails", "productivity"),
+    ("do i have any unread emails", "productivity"),
+    ("what tasks do i have today", "productivity"),
+    ("add a todo to buy groceries", "productivity"),
+    ("create a note about the project meeting", "productivity"),
+    ("show my google tasks", "productivity"),
+    ("what do i need to get done today", "productivity"),
+    ("remind me to call the dentist", "productivity"),
+    ("mark the report task as done", "productivity"),
+    ("what is on my plate this week", "productivity"),
+    ("hi", "end"),
+    ("hello there", "end"),
+    ("hey how are you", "end"),
+    ("thanks", "end"),
+    ("thank you so much", "end"),
+    ("who are you", "end"),
+    ("what can you do", "end"),
+    ("good morning", "end"),
+]
+
+_TOKEN_RE = re.compile(r"[a-z][a-z']+")
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class RouteDecision(BaseModel):
+    next: str
+    confidence: float
+
+
+class NaiveBayesRouter:
+    """multinomial naive bayes with laplace smoothing, trainable online"""
+
+    def __init__(self):
+        self.doc_counts = Counter()
+        self.token_counts = {label: Counter() for label in LABELS}
+        self.token_totals = Counter()
+        self.vocab = set()
+
+    def learn(self, text: str, label: str):
+        if label not in self.token_counts:
+            return
+        tokens = tokenize(text)
+        if not tokens:
+            return
+        self.doc_counts[label] += 1
+        self.token_counts[label].update(tokens)
+        self.token_totals[label] += len(tokens)
+        self.vocab.update(tokens)
+
+    def predict(self, tokens: list[str], extra: Optional[dict] = None) -> dict:
+        """
+        posterior per label
+        extra: label -> log-score bonus (keyword hits)
+        """
+        total_docs = sum(self.doc_counts.values())
+        vocab_size = len(self.vocab) + 1
+
+        log_scores = {}
+        for label in LABELS:
+            score = math.log((self.doc_counts[label] + 1) / (total_docs + len(LABELS)))
+            denom = self.token_totals[label] + vocab_size
+            for token in tokens:
+                score += math.log((self.token_counts[label][token] + 1) / denom)
+            if extra:
+                score += extra.get(label, 0.0)
+            log_scores[label] = score
+
+        top = max(log_scores.values())
+        exp = {label: math.exp(s - top) for label, s in log_scores.items()}
+        norm = sum(exp.values())
+        return {label: v / norm for label, v in exp.items()}
+
+
+_model: Optional[NaiveBayesRouter] = None
+_learned = 0
+
+
+def _load_model() -> NaiveBayesRouter:
+    global _model, _learned
+    if _model is not None:
+        return _model
+
+    model = NaiveBayesRouter()
+    for text, label in SEED_EXAMPLES:
+        model.learn(text, label)
+
+    if ROUTER_EXAMPLES_PATH and os.path.exists(ROUTER_EXAMPLES_PATH):
+        try:
+            with open(ROUTER_EXAMPLES_PATH) as f:
+                for line in f:
+                    if _learned >= ROUTER_MAX_EXAMPLES:
+                        break
+                    example = json.loads(line)
+                    model.learn(example["text"], example["label"])
+                    _learned += 1
+        except Exception as e:
+            logger.warning("Router examples load error: %s", e)
+
+    _model = model
+    return _model
+
+
+def keyword_hits(tokens: list[str]) -> Counter:
+    hits = Counter()
+    for token in tokens:
+        for label, words in KEYWORDS.items():
+            if token in words:
+                hits[label] += 1
+    return hits
+
+
+def route_locally(message: str) -> Optional[RouteDecision]:
+    """
+    confident local routing decision, or None to fall back to the llm
+    only ever returns wellness / productivity
+    """
+    tokens = tokenize(message)
+    if not tokens:
+        return None
+
+    hits = keyword_hits(tokens)
+    # spans both domains - leave it to the llm
+    if len(hits) > 1:
+        return None
+
+    # keyword hits push the posterior towards their label
+    extra = {label: n * ROUTER_KEYWORD_WEIGHT for label, n in hits.items()}
+    probs = _load_model().predict(tokens, extra)
+
+    label = max(probs, key=probs.get)
+    if label not in ROUTABLE or probs[label] < ROUTER_CONFIDENCE_THRESHOLD:
+        return None
+    return RouteDecision(next=label, confidence=probs[label])
+
+
+async def record_route(message: str, label: str):
+    """
+    learn from a routing decision the llm made - every label, "end" included,
+    so small talk pulls the posterior away from the agents
+    """
+    global _learned
+    if label not in LABELS or _learned >= ROUTER_MAX_EXAMPLES:
+        return
+
+    _load_model().learn(message, label)
+    _learned += 1
+
+    if ROUTER_EXAMPLES_PATH:
+        # file io off the event loop
+        try:
+            await asyncio.to_thread(_append_example, message, label)
+        except Exception as e:
+            logger.warning("Router examples write error: %s", e)
+
+
+def _append_example(message: str, label: str):
+    with open(ROUTER_EXAMPLES_PATH, "a") as f:
+        f.write(json.dumps({"text": message, "label": label}) + "\n")
@@ -4,6 +4,14 @@ from typing import TypedDict, Annotated, Sequence, Optional, Literal
 from langchain_core.messages import BaseMessage
 import operator
 
+
+def merge_agent_responses(left: Optional[dict], right: Optional[dict]) -> dict:
+    """parallel sub-agents each add their answer - None clears it for a new turn"""
+    if right is None:
+        return {}
+    return {**(left or {}), **right}
+
+
 class SupervisorState(TypedDict):
     """state for the supervisor graph"""
     
@@ -18,3 +26,6 @@ class SupervisorState(TypedDict):
     
     # optional final response aggregation
     final_response: Optional[str]
+    
+    # fan-out answers keyed by agent, waiting for the merge node
+    agent_responses: Annotated[dict, merge_agent_responses]
@@ -3,7 +3,6 @@
 import os
 from typing import Literal
 
-from langchain_groq import ChatGroq
 from opik.integrations.langchain import OpikTracer
 from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
 from langchain_core.runnables import RunnableConfig
@@ -11,10 +10,14 @@ from langgraph.graph import StateGraph, END
 from pydantic import BaseModel, Field
 
 from .state import SupervisorState
+from .checkpointer import get_checkpointer, checkpoint_thread_id
+from .router import route_locally, record_route
 from agents.wellness.agent import get_wellness_agent
 from agents.productivity.agent import get_productivity_agent
 
 from agents.constants import FORMATTING_PROMPT
+from agents.llm import get_llm
+from utils.sse import FANOUT_TAG
 
 # The supervisor's system prompt instructs it to route queries.
 SYSTEM_PROMPT = f"""You are the Supervisor Agent for Equinox.
@@ -27,100 +30,136 @@ Specialist Agents:
 If the user greets you or asks a general question, you can answer directly, but try to steer them to a topic.
 If you answer directly, set 'next' to 'end'.
 If you route to an agent, set 'next' to 'wellness' or 'productivity'.
+If the request needs both agents (e.g. "how did I sleep and what's on my plate today"), set 'next' to 'both'.
 
 {FORMATTING_PROMPT} (when answering directly)
 """
 
+MERGE_PROMPT = f"""You are Equinox. The user's request spanned two specialists, who answered their own parts in parallel.
+Combine their answers into one reply to the user. Keep every concrete fact, number and item they gave,
+drop duplicated greetings, and ignore a specialist saying it can't help with the other one's part.
+
+{FORMATTING_PROMPT}
+"""
+
+# resumed threads keep growing - only the tail goes to the llms
+HISTORY_WINDOW = int(os.getenv("SUPERVISOR_HISTORY_WINDOW", "20"))
+
 # Output structure for routing
 class RouteResponse(BaseModel):
-    next: Literal["wellness", "productivity", "end"]
+    next: Literal["wellness", "productivity", "both", "end"]
     response: str = Field(description="Response to the user if ending, or reasoning if routing.")
 
-def create_supervisor_graph():
-    """create and return the supervisor graph"""
+def _sub_agent_config(state: SupervisorState, config: RunnableConfig) -> RunnableConfig:
+    if state.get("next") != "both":
+        return config
+    return {**config, "tags": [*config.get("tags", []), FANOUT_TAG]}
+
+
+def _sub_agent_output(state: SupervisorState, agent: str, last_msg) -> dict:
+    """single route: answer goes straight to history; fan-out: park it for the merge"""
+    if state.get("next") == "both":
+        return {"agent_responses": {agent: last_msg.content}}
+    return {"messages": [last_msg]}
+
+
+def create_supervisor_graph(checkpointer=None):
+    """create and return the supervisor graph - resumable per thread_id when given a checkpointer"""
     
-    llm = ChatGroq(
-        model="llama-3.3-70b-versatile",
-        temperature=0.1, # Low temp for precise routing
-        api_key=os.getenv("GROQ_API_KEY")
-    )
+    llm = get_llm(temperature=0.1) # Low temp for precise routing
     # structured output for routing
     router = llm.with_structured_output(RouteResponse)
+    merger = get_llm(temperature=0.3)
     
-    def supervisor_node(state: SupervisorState):
-        messages = state["messages"]
+    async def supervisor_node(state: SupervisorState):
+        # fast path - obvious wellness / productivity messages skip the llm hop
+        user_message = next(
+            (m.content for m in reversed(state["messages"]) if isinstance(m, HumanMessage)), ""
+        )
+        decision = route_locally(user_message)
+        if decision:
+            return {"next": decision.next, "agent_responses": None}
+
+        messages = state["messages"][-HISTORY_WINDOW:]
         if not any(isinstance(m, SystemMessage) for m in messages):
             messages = [SystemMessage(content=SYSTEM_PROMPT)] + list(messages)
             
-        result = router.invoke(messages, config={"callbacks": [OpikTracer(project_name="equinox")]})
+        result = await router.ainvoke(messages, config={"callbacks": [OpikTracer(project_name="equinox")]})
+        # the local router learns from what the llm picked
+        await record_route(user_message, result.next)
         
         # We append the supervisor's thought/response to history
         return {
             "next": result.next,
-            "messages": [AIMessage(content=result.response)]
+            "messages": [AIMessage(content=result.response)],
+            "agent_responses": None
         }
     
-    def call_wellness_agent(state: SupervisorState, config: RunnableConfig):
+    async def call_wellness_agent(state: SupervisorState, config: RunnableConfig):
         """Invoke wellness agent graph"""
         wellness_agent = get_wellness_agent()
         
-        # Extract thread_id from metadata if present
-        metadata = config.get("metadata", {})
-        thread_id = metadata.get("thread_id")
-        
         # Transform state for sub-agent
         sub_state = {
-            "messages": state["messages"],
+            "messages": state["messages"][-HISTORY_WINDOW:],
             "user_id": state["user_id"],
             "timezone": "Asia/Kolkata", # Defaulting for now
              # other fields init to None
             "today_health": None
         }
         
-        # Pass metadata to sub-agent
-        invoke_config = {"callbacks": [OpikTracer(project_name="equinox")]}
-        if thread_id:
-            invoke_config["metadata"] = {"thread_id": thread_id}
-            
-        result = wellness_agent.invoke(sub_state, config=invoke_config)
+        # hand the parent config down - thread_id metadata, the opik trace and
+        # the event stream all carry through into the sub-agent's run
+        result = await wellness_agent.ainvoke(sub_state, config=_sub_agent_config(state, config))
         # We want to capture the LAST message from the sub-agent
         last_msg = result["messages"][-1]
-        return {"messages": [last_msg]}
+        return _sub_agent_output(state, "wellness", last_msg)
 
-    def call_productivity_agent(state: SupervisorState, config: RunnableConfig):
+    async def call_productivity_agent(state: SupervisorState, config: RunnableConfig):
         """Invoke productivity agent graph"""
         prod_agent = get_productivity_agent()
         
-        # Extract thread_id from metadata if present
-        metadata = config.get("metadata", {})
-        thread_id = metadata.get("thread_id")
-        
         sub_state = {
-            "messages": state["messages"],
+            "messages": state["messages"][-HISTORY_WINDOW:],
             "user_id": state["user_id"]
         }
         
-        # Pass metadata to sub-agent
-        invoke_config = {"callbacks": [OpikTracer(project_name="equinox")]}
-        if thread_id:
-            invoke_config["metadata"] = {"thread_id": thread_id}
-            
-        result = prod_agent.invoke(sub_state, config=invoke_config)
+        # hand the parent config down - thread_id metadata, the opik trace and
+        # the event stream all carry through into the sub-agent's run
+        result = await prod_agent.ainvoke(sub_state, config=_sub_agent_config(state, config))
         last_msg = result["messages"][-1]
-        return {"messages": [last_msg]}
+        return _sub_agent_output(state, "productivity", last_msg)
+
+    async def merge_responses(state: SupervisorState):
+        """combine the fanned-out answers into one reply"""
+        responses = state.get("agent_responses") or {}
+        parts = [f"{agent.title()} specialist:\n{text}" for agent, text in responses.items()]
+        try:
+            response = await merger.ainvoke([
+                SystemMessage(content=MERGE_PROMPT),
+                *state["messages"][-HISTORY_WINDOW:],
+                HumanMessage(content="\n\n".join(parts))
+            ])
+            content = response.content
+        except Exception as e:
+            print(f"Supervisor merge error: {e}")
+            content = "\n\n".join(responses.values())
+        return {"messages": [AIMessage(content=content)]}
 
     graph = StateGraph(SupervisorState)
     
     graph.add_node("supervisor", supervisor_node)
     graph.add_node("wellness", call_wellness_agent)
     graph.add_node("productivity", call_productivity_agent)
+    graph.add_node("merge", merge_responses)
     
     graph.set_entry_point("supervisor")
     
     # Conditional routing
     graph.add_conditional_edges(
         "supervisor",
-        lambda x: x["next"],
+        # "both" fans out - the two sub-agents run in the same step, concurrently
+        lambda x: ["wellness", "productivity"] if x["next"] == "both" else x["next"],
         {
             "wellness": "wellness",
             "productivity": "productivity",
@@ -132,16 +171,35 @@ def create_supervisor_graph():
     # Simple pattern: Sub-agents do work, then we END (one turn). 
     # Or we can loop back to supervisor. For now, let's END after sub-agent work 
     # so the user gets the response.
-    graph.add_edge("wellness", END)
-    graph.add_edge("productivity", END)
+    # after a fan-out both branches feed the merge node, which runs once
+    # both are done
+    after_agent = lambda x: "merge" if x["next"] == "both" else "end"
+    graph.add_conditional_edges("wellness", after_agent, {"merge": "merge", "end": END})
+    graph.add_conditional_edges("productivity", after_agent, {"merge": "merge", "end": END})
+    graph.add_edge("merge", END)
     
-    return graph.compile()
+    return graph.compile(checkpointer=checkpointer)
 
 
 _supervisor_graph = None
+_supervisor_checkpointer = None
 
 def get_supervisor_graph():
-    global _supervisor_graph
-    if _supervisor_graph is None:
-        _supervisor_graph = create_supervisor_graph()
+    global _supervisor_graph, _supervisor_checkpointer
+    checkpointer = get_checkpointer()
+    # rebuild if the checkpointer was (re)connected since we compiled
+    if _supervisor_graph is None or _supervisor_checkpointer is not checkpointer:
+        _supervisor_graph = create_supervisor_graph(checkpointer)
+        _supervisor_checkpointer = checkpointer
     return _supervisor_graph
+
+
+
+def supervisor_config(user_id: str, thread_id: str, callbacks: list = None) -> dict:
+    """run config for one supervisor turn - checkpoints land under the user's thread"""
+    return {
+        "callbacks": callbacks or [],
+        # Pass thread_id in metadata for Opik
+        "metadata": {"thread_id": thread_id},
+        "configurable": {"thread_id": checkpoint_thread_id(user_id, thread_id)}
+    }
@@ -0,0 +1,66 @@
+# dedupe keys and purging on the background job queue
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+import jobs.queue as queue
+from database.models import BackgroundJob
+
+
+async def _setup(monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite://")
+    monkeypatch.setattr(queue, "queue_engine", engine)
+    monkeypatch.setattr(queue, "QueueSession", async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False))
+    await queue.ensure_job_table()
+
+
+async def _finish_all(status: str, finished_at: datetime):
+    async with queue.QueueSession() as db:
+        await db.execute(update(BackgroundJob).values(status=status, finished_at=finished_at))
+        await db.commit()
+
+
+def test_dedupe_key_only_blocks_live_jobs(monkeypatch):
+    async def run():
+        await _setup(monkeypatch)
+        assert await queue.enqueue_job("noop", {}, dedupe_key="k")
+        assert not await queue.enqueue_job("noop", {}, dedupe_key="k")
+        # jobs without a key never collide
+        assert await queue.enqueue_job("noop", {})
+        assert await queue.enqueue_job("noop", {})
+
+        await _finish_all("done", datetime.now(timezone.utc))
+        assert await queue.job_exists("k")
+        assert await queue.enqueue_job("noop", {}, dedupe_key="k")
+        assert not await queue.enqueue_job("noop", {}, dedupe_key="k")
+
+    asyncio.run(run())
+
+
+def test_purge_keeps_recent_and_live_jobs(monkeypatch):
+    async def run():
+        await _setup(monkeypatch)
+        now = datetime.now(timezone.utc)
+        await queue.enqueue_job("noop", {}, dedupe_key="old")
+        await _finish_all("failed", now - timedelta(days=30))
+        await queue.enqueue_job("noop", {}, dedupe_key="recent")
+        async with queue.QueueSession() as db:
+            await db.execute(
+                update(BackgroundJob).where(BackgroundJob.dedupe_key == "recent").values(status="done", finished_at=now)
+            )
+            await db.commit()
+        await queue.enqueue_job("noop", {}, dedupe_key="live")
+
+        assert await queue.purge_finished_jobs(older_than_days=7) == 1
+        async with queue.QueueSession() as db:
+            keys = set(await db.scalars(select(BackgroundJob.dedupe_key)))
+        assert keys == {"recent", "live"}
+
+    asyncio.run(run())
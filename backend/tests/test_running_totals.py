@@ -0,0 +1,98 @@
+# running totals kept on write vs recomputed from scratch by the backfill
+
+import asyncio
+import uuid
+from datetime import date, timedelta
+
+import pytest
+
+pytest.importorskip("aiosqlite")
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+import database.connection as connection
+import jobs.backfill as backfill
+from agents.wellness.running import SUM_COLUMNS, update_running_totals
+from database import HealthLog, Streak, User, UserProfile
+
+OPTIMAL_SLEEP = 8.0
+
+
+async def _setup(monkeypatch):
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync: HealthLog.metadata.create_all(
+            sync, tables=[User.__table__, UserProfile.__table__, HealthLog.__table__, Streak.__table__]
+        ))
+    # same session settings as the app
+    sessions = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    monkeypatch.setattr(connection, "AsyncSessionLocal", sessions)
+    monkeypatch.setattr(backfill, "AsyncSessionLocal", sessions)
+
+    user_id = uuid.uuid4()
+    async with sessions() as db:
+        db.add(User(id=user_id, email="totals@test.com", name="test"))
+        await db.commit()
+    return sessions, user_id
+
+
+async def _write(sessions, user_id, day: date, sleep_hours: float, readiness: int):
+    """what log_health does: set the values, update totals, commit"""
+    async with sessions() as db:
+        log = await db.scalar(select(HealthLog).where(HealthLog.user_id == user_id, HealthLog.date == day))
+        is_new = log is None
+        if is_new:
+            log = HealthLog(user_id=user_id, date=day)
+            db.add(log)
+        log.sleep_hours = sleep_hours
+        log.energy_level = 6
+        log.stress_level = 4
+        log.readiness_score = readiness
+        await update_running_totals(db, log, OPTIMAL_SLEEP, is_new)
+        await db.commit()
+
+
+async def _snapshot(sessions, user_id) -> dict:
+    async with sessions() as db:
+        logs = (await db.scalars(
+            select(HealthLog).where(HealthLog.user_id == user_id).order_by(HealthLog.date)
+        )).all()
+    return {
+        log.date: (log.readiness_score, log.log_seq, log.sleep_debt_hours, *(getattr(log, col) for col in SUM_COLUMNS))
+        for log in logs
+    }
+
+
+def test_editing_a_past_day_keeps_its_new_values(monkeypatch):
+    async def run():
+        sessions, user_id = await _setup(monkeypatch)
+        start = date(2025, 1, 1)
+        for i in range(20):
+            await _write(sessions, user_id, start + timedelta(days=i), 6 + (i % 3), 50 + i)
+
+        # edit a day in the middle - later rows shift, the edited one must keep its values
+        edited = start + timedelta(days=5)
+        await _write(sessions, user_id, edited, 9.5, 99)
+
+        live = await _snapshot(sessions, user_id)
+        assert live[edited][0] == 99
+
+        # readiness totals follow the scores as written
+        readiness_sum = SUM_COLUMNS.index("readiness_sum") + 3
+        running = 0
+        for day in sorted(live):
+            running += live[day][0]
+            assert live[day][readiness_sum] == running, day
+
+        # everything else matches a from-scratch rebuild. the backfill also
+        # rescores readiness, so leave those columns out
+        skip = {0, readiness_sum, SUM_COLUMNS.index("readiness_count") + 3}
+        result = await backfill.backfill_health_metrics([user_id])
+        assert result["logs"] == 20
+        rebuilt = await _snapshot(sessions, user_id)
+        for day, values in live.items():
+            keep = [i for i in range(len(values)) if i not in skip]
+            assert [values[i] for i in keep] == [rebuilt[day][i] for i in keep], day
+
+    asyncio.run(run())
@@ -1,15 +1,22 @@
 import os
+import threading
+from collections import OrderedDict
+
+import httplib2
 import requests
 from fastapi import APIRouter, Request, Depends
 from fastapi.responses import RedirectResponse
+from google_auth_httplib2 import AuthorizedHttp
 from google_auth_oauthlib.flow import Flow
 from googleapiclient.discovery import build
+from googleapiclient.http import HttpRequest
 from google.oauth2.credentials import Credentials
 from sqlalchemy.orm import Session
 
 from database import get_db, User
 from state.user_tokens import save_user_tokens
 from utils.auth_middleware import create_access_token
+from utils.identity_cache import invalidate_identity
 
 router = APIRouter()
 
@@ -101,6 +108,7 @@ def google_callback(request: Request, db: Session = Depends(get_db)):
 
     db.commit()
     db.refresh(user)
+    invalidate_identity(google_email, user.id)
 
     # Store tokens securely
     tokens = {
@@ -122,11 +130,88 @@ def google_callback(request: Request, db: Session = Depends(get_db)):
     )
 
 
+# ---------- Service pool ----------
+# build() parses a discovery doc and wires up every api method - doing that
+# on every call adds up. we keep ready service objects per user grant
+# (keyed on the refresh token) and rebuild only when the grant changes -
+# a new refresh token, client or scopes, not an access token refresh.
+
+SERVICE_POOL_SIZE = int(os.getenv("GOOGLE_SERVICE_POOL_SIZE", "256"))
+
+_service_pool = OrderedDict()  # (api, grant) -> (fingerprint, service)
+_service_pool_lock = threading.Lock()
+
+
+def _grant_key(tokens: dict) -> str:
+    return tokens.get("refresh_token") or tokens.get("token") or ""
+
+
+def _token_fingerprint(tokens: dict) -> tuple:
+    # not the access token - pooled credentials refresh themselves, and the
+    # hourly refresh written back to the tokens dict shouldn't rebuild the service
+    return (
+        tokens.get("refresh_token"),
+        tokens.get("client_id"),
+        tuple(tokens.get("scopes") or []),
+    )
+
+
+def _build_service(api: str, version: str, tokens: dict):
+    creds = Credentials(**tokens)
+    # httplib2.Http isn't thread safe and pooled services are shared across
+    # the threadpool, so each thread gets its own authorized http
+    local = threading.local()
+
+    def request_builder(http, *args, **kwargs):
+        if not hasattr(local, "http"):
+            local.http = AuthorizedHttp(creds, http=httplib2.Http())
+        return HttpRequest(local.http, *args, **kwargs)
+
+    return build(
+        api,
+        version,
+        credentials=creds,
+        requestBuilder=request_builder,
+        static_discovery=True,  # bundled discovery docs, no fetch
+        cache_discovery=False,
+    )
+
+
+def get_pooled_service(api: str, version: str, tokens: dict):
+    """get a ready service object for these tokens, building it on a miss"""
+    key = (api, version, _grant_key(tokens))
+    fingerprint = _token_fingerprint(tokens)
+
+    with _service_pool_lock:
+        entry = _service_pool.get(key)
+        if entry and entry[0] == fingerprint:
+            _service_pool.move_to_end(key)
+            return entry[1]
+
+    # build outside the lock - two threads may race on a miss, last one wins
+    service = _build_service(api, version, tokens)
+
+    with _service_pool_lock:
+        _service_pool[key] = (fingerprint, service)
+        _service_pool.move_to_end(key)
+        while len(_service_pool) > SERVICE_POOL_SIZE:
+            _service_pool.popitem(last=False)
+
+    return service
+
+
+def invalidate_google_services(tokens: dict):
+    """drop pooled services built from these tokens"""
+    grant = _grant_key(tokens)
+    with _service_pool_lock:
+        for key in [k for k in _service_pool if k[2] == grant]:
+            del _service_pool[key]
+
+
 # ---------- Gmail utilities ----------
 
 def get_gmail_service(tokens: dict):
-    creds = Credentials(**tokens)
-    return build("gmail", "v1", credentials=creds)
+    return get_pooled_service("gmail", "v1", tokens)
 
 
 def fetch_recent_emails(service, max_results: int = 5, query: str = None):
@@ -182,8 +267,7 @@ def get_email_details(service, message_id: str) -> dict:
 
 def get_tasks_service(tokens: dict):
     """Get Google Tasks API service"""
-    creds = Credentials(**tokens)
-    return build("tasks", "v1", credentials=creds)
+    return get_pooled_service("tasks", "v1", tokens)
 
 
 def fetch_task_lists(service):
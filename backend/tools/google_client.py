@@ -0,0 +1,213 @@
+# async google api client - gmail + tasks
+# talks to the REST endpoints directly over one shared keep-alive httpx pool
+# so a slow gmail call only parks its own coroutine, not the event loop
+
+import asyncio
+import base64
+from typing import Optional
+
+import httpx
+from google.auth.transport.requests import Request as GoogleAuthRequest
+from google.oauth2.credentials import Credentials
+
+from utils.turn_cache import memoize, forget
+
+GMAIL_BASE_URL = "https://gmail.googleapis.com/gmail/v1/users/me"
+TASKS_BASE_URL = "https://tasks.googleapis.com/tasks/v1"
+
+# one pool for the whole process - connections to googleapis get reused
+# across users instead of a fresh tls handshake per call
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """get (or lazily create) the shared google http pool"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(15.0, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=20,
+                keepalive_expiry=60.0
+            )
+        )
+    return _http_client
+
+
+async def close_http_client():
+    """close the shared pool - called on app shutdown"""
+    global _http_client
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
+
+
+class GoogleAPIError(Exception):
+    """non-2xx response from a google api"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"google api error {status_code}: {message}")
+        self.status_code = status_code
+
+
+class AsyncGoogleClient:
+    """
+    async gmail + tasks client for one user's tokens
+
+    same operations as the sync helpers in tools.google_auth, returning the
+    same shapes, so callers can swap one for the other
+
+    inside a turn_scope() identical GETs for the same grant are made once per
+    agent turn, and any write drops that grant's memoized reads
+    """
+
+    def __init__(self, tokens: dict):
+        self._tokens = tokens
+        self._creds = Credentials(**tokens)
+        self._refresh_lock = asyncio.Lock()
+        # stable per google grant - access tokens rotate, refresh tokens don't
+        self._grant = tokens.get("refresh_token") or tokens.get("token")
+
+    async def _refresh(self):
+        async with self._refresh_lock:
+            # token refresh is a blocking google-auth call
+            await asyncio.to_thread(self._creds.refresh, GoogleAuthRequest())
+            # write back into the cached token dict so the next client
+            # for this user starts with the fresh access token
+            self._tokens["token"] = self._creds.token
+
+    async def _request(self, method: str, url: str, **kwargs) -> dict:
+        if method == "GET":
+            params = tuple(sorted((kwargs.get("params") or {}).items()))
+            return await memoize(
+                ("google", self._grant, url, params),
+                lambda: self._send(method, url, **kwargs)
+            )
+        result = await self._send(method, url, **kwargs)
+        forget("google", self._grant)
+        return result
+
+    async def _send(self, method: str, url: str, **kwargs) -> dict:
+        if not self._creds.token and self._creds.refresh_token:
+            await self._refresh()
+
+        client = get_http_client()
+        headers = {"Authorization": f"Bearer {self._creds.token}"}
+        resp = await client.request(method, url, headers=headers, **kwargs)
+
+        # access token expired - refresh once and retry
+        if resp.status_code == 401 and self._creds.refresh_token:
+            await self._refresh()
+            headers = {"Authorization": f"Bearer {self._creds.token}"}
+            resp = await client.request(method, url, headers=headers, **kwargs)
+
+        if resp.status_code >= 400:
+            raise GoogleAPIError(resp.status_code, resp.text[:200])
+
+        if resp.status_code == 204 or not resp.content:
+            return {}
+        return resp.json()
+
+    # ---------- Gmail ----------
+
+    async def fetch_recent_emails(self, max_results: int = 5, query: str = None) -> list:
+        params = {"maxResults": max_results}
+        if query:
+            params["q"] = query
+        results = await self._request("GET", f"{GMAIL_BASE_URL}/messages", params=params)
+        return results.get("messages", [])
+
+    async def get_email_metadata(self, message_id: str) -> dict:
+        """headers + snippet only - much cheaper than format=full"""
+        return await self._request(
+            "GET",
+            f"{GMAIL_BASE_URL}/messages/{message_id}",
+            params={"format": "metadata"}
+        )
+
+    async def get_email_details(self, message_id: str) -> dict:
+        """Fetch full email content including subject, sender, and body"""
+        msg = await self._request(
+            "GET",
+            f"{GMAIL_BASE_URL}/messages/{message_id}",
+            params={"format": "full"}
+        )
+
+        headers = msg.get('payload', {}).get('headers', [])
+
+        subject = next((h['value'] for h in headers if h['name'].lower() == 'subject'), 'No Subject')
+        sender = next((h['value'] for h in headers if h['name'].lower() == 'from'), 'Unknown')
+        date = next((h['value'] for h in headers if h['name'].lower() == 'date'), '')
+
+        body = ''
+        payload = msg.get('payload', {})
+
+        if 'body' in payload and payload['body'].get('data'):
+            body = base64.urlsafe_b64decode(payload['body']['data']).decode('utf-8', errors='ignore')
+        elif 'parts' in payload:
+            for part in payload['parts']:
+                if part.get('mimeType') == 'text/plain' and part.get('body', {}).get('data'):
+                    body = base64.urlsafe_b64decode(part['body']['data']).decode('utf-8', errors='ignore')
+                    break
+
+        return {
+            'id': message_id,
+            'subject': subject,
+            'sender': sender,
+            'date': date,
+            'snippet': msg.get('snippet', ''),
+            'body': body[:1000] if body else msg.get('snippet', '')
+        }
+
+    async def send_email(self, raw_message: str) -> dict:
+        """send a base64url encoded rfc 2822 message"""
+        return await self._request(
+            "POST",
+            f"{GMAIL_BASE_URL}/messages/send",
+            json={"raw": raw_message}
+        )
+
+    # ---------- Google Tasks ----------
+
+    async def fetch_task_lists(self) -> list:
+        results = await self._request("GET", f"{TASKS_BASE_URL}/users/@me/lists")
+        return results.get('items', [])
+
+    async def fetch_tasks(self, tasklist_id: str = '@default') -> list:
+        results = await self._request("GET", f"{TASKS_BASE_URL}/lists/{tasklist_id}/tasks")
+        return results.get('items', [])
+
+    async def create_task(self, title: str, notes: str = None, due: str = None, tasklist_id: str = '@default') -> dict:
+        task = {'title': title}
+        if notes:
+            task['notes'] = notes
+        if due:
+            task['due'] = due
+        return await self._request("POST", f"{TASKS_BASE_URL}/lists/{tasklist_id}/tasks", json=task)
+
+    async def complete_task(self, task_id: str, tasklist_id: str = '@default') -> dict:
+        # patch only touches the fields we send - no get+update round trip
+        return await self._request(
+            "PATCH",
+            f"{TASKS_BASE_URL}/lists/{tasklist_id}/tasks/{task_id}",
+            json={'status': 'completed'}
+        )
+
+    async def update_task(self, task_id: str, title: str = None, status: str = None, due: str = None, tasklist_id: str = '@default') -> dict:
+        changes = {}
+        if title:
+            changes['title'] = title
+        if status:
+            changes['status'] = status
+        if due:
+            changes['due'] = due
+        return await self._request(
+            "PATCH",
+            f"{TASKS_BASE_URL}/lists/{tasklist_id}/tasks/{task_id}",
+            json=changes
+        )
+
+    async def delete_task(self, task_id: str, tasklist_id: str = '@default') -> bool:
+        await self._request("DELETE", f"{TASKS_BASE_URL}/lists/{tasklist_id}/tasks/{task_id}")
+        return True
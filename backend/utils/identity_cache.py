@@ -0,0 +1,174 @@
+# email -> user id / profile cache
+# nearly every endpoint starts by turning an email into a user id, and the
+# wellness ones then load the profile for optimal sleep. both barely ever
+# change, so keep them in process: one joined query on a miss, none on a hit.
+#
+# writes we own (google sign-in, profile updates) invalidate straight away.
+# the ttl only bounds how long another worker process can serve a stale
+# entry after a write that happened somewhere else
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from uuid import UUID
+
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import select
+
+IDENTITY_CACHE_TTL = float(os.getenv("IDENTITY_CACHE_TTL", "300"))
+IDENTITY_CACHE_SIZE = int(os.getenv("IDENTITY_CACHE_SIZE", "10000"))
+
+DEFAULT_OPTIMAL_SLEEP = 8.0
+
+
+class Identity(BaseModel):
+    """who an email belongs to, plus the profile fields hot paths need"""
+    model_config = ConfigDict(frozen=True)
+
+    user_id: UUID
+    email: Optional[str] = None
+    # profile's target, or the 8h default when there's no profile / no value
+    optimal_sleep_hours: float = DEFAULT_OPTIMAL_SLEEP
+
+
+# user_id -> (loaded_at, Identity), least recently used first
+_identities = OrderedDict()
+# email -> user_id
+_by_email = {}
+# bumped on every invalidation - a read that raced one doesn't get stored
+_generation = 0
+# sync endpoints hit the cache from the threadpool too
+_lock = threading.Lock()
+
+
+def _identity_query():
+    from database import User, UserProfile
+
+    return (
+        select(User.id, User.email, UserProfile.optimal_sleep_hours)
+        .outerjoin(UserProfile, UserProfile.user_id == User.id)
+    )
+
+
+def _from_row(row) -> Identity:
+    return Identity(
+        user_id=row.id,
+        email=row.email,
+        optimal_sleep_hours=float(row.optimal_sleep_hours) if row.optimal_sleep_hours else DEFAULT_OPTIMAL_SLEEP
+    )
+
+
+def _get(user_id: Optional[UUID]) -> Optional[Identity]:
+    if user_id is None:
+        return None
+    with _lock:
+        entry = _identities.get(user_id)
+        if entry is None:
+            return None
+        loaded_at, identity = entry
+        if time.monotonic() - loaded_at > IDENTITY_CACHE_TTL:
+            _drop(user_id)
+            return None
+        _identities.move_to_end(user_id)
+        return identity
+
+
+def _cached_by_email(email: str) -> Optional[Identity]:
+    with _lock:
+        user_id = _by_email.get(email)
+    return _get(user_id)
+
+
+def _store(identity: Identity, generation: int):
+    with _lock:
+        if generation != _generation or IDENTITY_CACHE_SIZE <= 0:
+            return
+        _drop(identity.user_id)
+        _identities[identity.user_id] = (time.monotonic(), identity)
+        if identity.email:
+            _by_email[identity.email] = identity.user_id
+        while len(_identities) > IDENTITY_CACHE_SIZE:
+            _drop(next(iter(_identities)))
+
+
+def _drop(user_id: UUID):
+    """caller holds _lock"""
+    entry = _identities.pop(user_id, None)
+    if entry and entry[1].email and _by_email.get(entry[1].email) == user_id:
+        del _by_email[entry[1].email]
+
+
+async def get_identity(db, email: str) -> Optional[Identity]:
+    """identity for an email (case-insensitive), None if no such user"""
+    email = email.lower()
+    cached = _cached_by_email(email)
+    if cached:
+        return cached
+
+    from database import User
+
+    generation = _generation
+    row = (await db.execute(_identity_query().where(User.email == email))).first()
+    if not row:
+        return None
+    identity = _from_row(row)
+    _store(identity, generation)
+    return identity
+
+
+def get_identity_sync(db, email: str) -> Optional[Identity]:
+    """get_identity for sync sessions"""
+    email = email.lower()
+    cached = _cached_by_email(email)
+    if cached:
+        return cached
+
+    from database import User
+
+    generation = _generation
+    row = db.execute(_identity_query().where(User.email == email)).first()
+    if not row:
+        return None
+    identity = _from_row(row)
+    _store(identity, generation)
+    return identity
+
+
+async def get_identity_by_id(db, user_id: UUID) -> Identity:
+    """identity for a user id - defaults (not cached) when the user doesn't exist"""
+    cached = _get(user_id)
+    if cached:
+        return cached
+
+    from database import User
+
+    generation = _generation
+    row = (await db.execute(_identity_query().where(User.id == user_id))).first()
+    if not row:
+        return Identity(user_id=user_id)
+    identity = _from_row(row)
+    _store(identity, generation)
+    return identity
+
+
+def invalidate_identity(email: Optional[str] = None, user_id: Optional[UUID] = None):
+    """drop a user's cached identity - call after writing their user or profile row"""
+    global _generation
+    with _lock:
+        _generation += 1
+        if email:
+            cached_id = _by_email.pop(email.lower(), None)
+            if cached_id is not None:
+                _drop(cached_id)
+        if user_id is not None:
+            _drop(user_id)
+
+
+def clear_identity_cache():
+    global _generation
+    with _lock:
+        _generation += 1
+        _identities.clear()
+        _by_email.clear()
@@ -0,0 +1,68 @@
+# keyset pagination for newest-first listings
+# pages are ordered by (created_at, id) descending and the next page starts
+# strictly after the last row's pair - no OFFSET, so page 50 costs what
+# page 1 does, and rows written meanwhile don't shift later pages. the
+# cursor is that pair, opaque to clients. backed by (owner, created_at
+# desc, id desc) indexes
+
+import base64
+import os
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "200"))
+
+# response header carrying the next page's cursor on list endpoints
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(created_at: datetime, row_id) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """(created_at, id string) - ValueError for anything we didn't hand out"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("utf-8")
+        created_at, row_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), row_id
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("invalid cursor")
+
+
+def keyset_page(query, created_col, id_col, cursor: Optional[str], limit: Optional[int]):
+    """
+    newest-first query, resumed after cursor. asks for limit + 1 rows so
+    split_page can tell whether there's another page; limit None = every row
+    """
+    if cursor:
+        created_at, raw_id = decode_cursor(cursor)
+        try:
+            row_id = id_col.type.python_type(raw_id)
+        except (TypeError, ValueError):
+            raise ValueError("invalid cursor")
+        query = query.where(tuple_(created_col, id_col) < tuple_(created_at, row_id))
+    query = query.order_by(created_col.desc(), id_col.desc())
+    if limit is not None:
+        query = query.limit(limit + 1)
+    return query
+
+
+def split_page(rows: list, limit: Optional[int]) -> tuple:
+    """(the page, cursor for the next one or None) from keyset_page's rows"""
+    rows = list(rows)
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(page[-1].created_at, page[-1].id)
+
+
+def page_size(limit: Optional[int]) -> int:
+    """a client-requested page size, defaulted and capped"""
+    if not limit or limit < 1:
+        return DEFAULT_PAGE_SIZE
+    return min(limit, MAX_PAGE_SIZE)
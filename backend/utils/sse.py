@@ -0,0 +1,105 @@
+# server-sent events for agent graphs
+# turns langgraph astream_events into a text/event-stream the frontend can
+# render as it arrives: llm tokens, tool start/end, routing, final reply
+
+import json
+from typing import Any, AsyncIterator
+
+from fastapi.responses import StreamingResponse
+from langchain_core.messages import BaseMessage
+
+from utils.turn_cache import turn_scope
+
+# graph nodes whose llm output is the user-facing answer - tokens from
+# anywhere else (supervisor routing, llm calls inside tools) aren't streamed
+ANSWER_NODES = {"agent", "merge"}
+# runs tagged with this are parallel sub-agents whose answers get merged -
+# only the merged answer is streamed
+FANOUT_TAG = "fanout"
+
+
+def _jsonable(value: Any) -> Any:
+    try:
+        json.dumps(value)
+        return value
+    except (TypeError, ValueError):
+        return str(value)
+
+
+async def stream_graph_events(graph, state: dict, config: dict) -> AsyncIterator[dict]:
+    """
+    run a compiled graph and yield progress events as plain dicts
+
+    event types:
+    - token:      {"content"} chunk of the answer as the llm writes it
+    - tool_start: {"name", "input"}
+    - tool_end:   {"name"}
+    - route:      {"next"} supervisor routing decision
+    - done:       {"reply"} final message content
+    - error:      {"detail"}
+    """
+    final_output = None
+    try:
+        async with turn_scope():
+            async for event in graph.astream_events(state, config=config, version="v2"):
+                kind = event["event"]
+                node = event.get("metadata", {}).get("langgraph_node")
+
+                if (
+                    kind == "on_chat_model_stream"
+                    and node in ANSWER_NODES
+                    and FANOUT_TAG not in event.get("tags", [])
+                ):
+                    content = event["data"]["chunk"].content
+                    if content:
+                        yield {"type": "token", "content": content}
+
+                elif kind == "on_tool_start":
+                    yield {
+                        "type": "tool_start",
+                        "name": event["name"],
+                        "input": _jsonable(event["data"].get("input"))
+                    }
+
+                elif kind == "on_tool_end":
+                    yield {"type": "tool_end", "name": event["name"]}
+
+                elif kind == "on_chain_end" and event["name"] == "supervisor" and node == "supervisor":
+                    output = event["data"].get("output") or {}
+                    if isinstance(output, dict) and output.get("next"):
+                        yield {"type": "route", "next": output["next"]}
+
+                elif kind == "on_chain_end" and not event.get("parent_ids"):
+                    # root run finished - its output is the final graph state
+                    final_output = event["data"].get("output")
+
+    except Exception as e:
+        import traceback
+        traceback.print_exc()
+        yield {"type": "error", "detail": str(e)}
+        return
+
+    reply = ""
+    if isinstance(final_output, dict) and final_output.get("messages"):
+        last_message = final_output["messages"][-1]
+        reply = last_message.content if isinstance(last_message, BaseMessage) else str(last_message)
+    yield {"type": "done", "reply": reply}
+
+
+async def _encode(events: AsyncIterator[dict], extra: dict) -> AsyncIterator[str]:
+    async for event in events:
+        if event["type"] == "done":
+            event = {**event, **extra}
+        yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+
+def sse_response(events: AsyncIterator[dict], **extra) -> StreamingResponse:
+    """wrap an event iterator as an sse response - extra fields ride on the done event"""
+    return StreamingResponse(
+        _encode(events, extra),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # don't let a proxy buffer the stream
+        },
+    )
@@ -0,0 +1,113 @@
+# per-turn memo for upstream reads
+# one agent turn often asks for the same data from several tools (fetch_todos
+# re-lists google tasks after get_google_tasks, get_email_summary re-lists
+# gmail after fetch_recent_emails). inside a turn_scope() identical reads are
+# made once and shared; outside one, memoize() is a plain call.
+#
+# the turn also owns one async db session that its tools share (behind a
+# lock, sessions aren't safe for concurrent use) instead of each tool
+# checking out its own connection.
+#
+# all of it lives in a contextvar, so it follows the graph's tasks and tool
+# threads and disappears when the turn ends - nothing leaks between requests
+
+import asyncio
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Optional
+
+
+class _Turn:
+    def __init__(self):
+        self.reads = {}
+        self.session = None
+        self.session_lock = asyncio.Lock()
+
+
+_turn: ContextVar[Optional[_Turn]] = ContextVar("turn_cache", default=None)
+
+
+@asynccontextmanager
+async def turn_scope():
+    """memoize upstream reads and share one db session for one agent turn"""
+    if _turn.get() is not None:
+        # nested (sub-agent inside the supervisor) - share the outer turn
+        yield
+        return
+    turn = _Turn()
+    token = _turn.set(turn)
+    try:
+        yield
+    finally:
+        if turn.session is not None:
+            await turn.session.close()
+        try:
+            _turn.reset(token)
+        except ValueError:
+            # streamed turns can finish in a copied context - just drop it
+            _turn.set(None)
+
+
+def in_turn() -> bool:
+    return _turn.get() is not None
+
+
+async def memoize(key: tuple, fn: Callable[[], Awaitable]):
+    """
+    await fn() once per key per turn - concurrent callers share the same call
+    results are shared, treat them as read-only
+    """
+    turn = _turn.get()
+    if turn is None:
+        return await fn()
+
+    future = turn.reads.get(key)
+    if future is None:
+        future = asyncio.ensure_future(fn())
+        turn.reads[key] = future
+    try:
+        # shield - one caller being cancelled shouldn't cancel the others' read
+        return await asyncio.shield(future)
+    except Exception:
+        # don't pin a failure for the rest of the turn
+        if turn.reads.get(key) is future:
+            del turn.reads[key]
+        raise
+
+
+def forget(*prefix):
+    """drop memoized reads whose key starts with prefix - call after a write"""
+    turn = _turn.get()
+    if turn is None:
+        return
+    for key in [k for k in turn.reads if k[:len(prefix)] == prefix]:
+        del turn.reads[key]
+
+
+@asynccontextmanager
+async def turn_session():
+    """
+    async db session for a tool
+    inside a turn: the turn's shared session, held exclusively for the block.
+    outside one: a fresh session, closed afterwards
+    """
+    from database.connection import AsyncSessionLocal
+
+    turn = _turn.get()
+    if turn is None:
+        async with AsyncSessionLocal() as session:
+            yield session
+        return
+
+    async with turn.session_lock:
+        if turn.session is None:
+            turn.session = AsyncSessionLocal()
+        try:
+            yield turn.session
+        finally:
+            # end the transaction between tools - a failed statement a tool
+            # swallowed can't poison the next one, and no connection sits idle
+            # in a transaction while the llm thinks. expunge first so rows
+            # other tools already hold (memoized reads) aren't expired
+            turn.session.expunge_all()
+            await turn.session.rollback()